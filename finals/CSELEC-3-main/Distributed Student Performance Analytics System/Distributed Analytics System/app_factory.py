@@ -1,13 +1,17 @@
 from flask import Flask, request, g, current_app
 from flask_cors import CORS
-from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
 import time
 from datetime import datetime
 from db.mongodb import get_db, MongoDB
+from utils.metrics import registry, REQUEST_COUNT, REQUEST_LATENCY
+from utils.startup import StartupReport
+from utils.warmup import WARMUP_HEADER
+from utils.admission import admission
 import sys
 import hashlib
+import threading
 from functools import lru_cache
 
 # Load environment variables
@@ -22,6 +26,53 @@ def get_request_hash(method, path, query_string, ip_address, timestamp):
     data = f"{method}:{path}:{query_string}:{ip_address}:{rounded_time}"
     return hashlib.md5(data.encode()).hexdigest()
 
+# Hashes of requests logged in the current minute (per worker), for deduplication
+_logged_hashes = {"minute": None, "hashes": set()}
+_logged_hashes_lock = threading.Lock()
+
+def is_duplicate_request(request_hash, timestamp):
+    """True if the same request was already logged this minute"""
+    minute = timestamp.replace(second=0, microsecond=0)
+    with _logged_hashes_lock:
+        if _logged_hashes["minute"] != minute:
+            _logged_hashes["minute"] = minute
+            _logged_hashes["hashes"] = set()
+        if request_hash in _logged_hashes["hashes"]:
+            return True
+        _logged_hashes["hashes"].add(request_hash)
+        return False
+
+def after_fork(app):
+    """Reset state a forked worker inherits from the preloading parent"""
+    global _logged_hashes_lock
+    from utils.mongo_metrics import command_listener
+    from utils.slow_ops import slow_op_recorder
+    from utils.cache_warmer import cache_warmer
+    from utils.analytics_snapshot import analytics
+    from utils.rankings import rankings
+    from utils.student_search import student_search
+    from utils.grade_cube import cube_refresher
+
+    # The parent's MongoClient and its sockets must not be used (or closed) here
+    MongoDB.reset(close=False)
+    registry.reset()
+    command_listener.after_fork()
+    slow_op_recorder.after_fork()
+    cache_warmer.after_fork()
+    admission.after_fork()
+    analytics.after_fork()
+    rankings.after_fork()
+    student_search.after_fork()
+    cube_refresher.after_fork()
+    _logged_hashes_lock = threading.Lock()
+    _logged_hashes["minute"] = None
+    _logged_hashes["hashes"] = set()
+
+    from cache_config import cache, entity_cache
+    with app.app_context():
+        cache.clear()
+        entity_cache.clear()
+
 def should_log_request(path):
     """Determine if a request should be logged"""
     # List of paths to exclude from logging
@@ -38,6 +89,7 @@ def should_log_request(path):
         '/students/',
         '/subjects/',
         '/home/',
+        '/export/',
         '/test-mongo'
     }
     
@@ -52,54 +104,82 @@ def should_log_request(path):
     # Default to not logging unknown paths
     return False
 
-def create_app():
-    # Initialize Flask
-    app = Flask(__name__)
-    CORS(app)
-
-    # Configuration
+def configure(app):
     app.config.update({
         'SECRET_KEY': os.getenv('SECRET_KEY', 'secret_key'),
         'MONGO_URI': os.getenv('MONGO_URI', 'mongodb://localhost:27017/'),
         'MONGO_DBNAME': os.getenv('MONGO_DBNAME', 'CSELEC3DB'),
-        'CACHE_TYPE': 'SimpleCache',
+        'CACHE_TYPE': 'cache_config.MetricsSimpleCache',
         'CACHE_DEFAULT_TIMEOUT': 300
     })
 
+def create_app():
+    report = StartupReport()
+
+    # Initialize Flask
+    with report.phase("flask app"):
+        app = Flask(__name__)
+        CORS(app)
+
+    # Configuration
+    with report.phase("config"):
+        configure(app)
+
     # Initialize shared cache
-    from cache_config import cache
-    cache.init_app(app)
-
-    # Initialize MongoDB
-    try:
-        db = get_db()
-        if 'request_logs' not in db.list_collection_names():
-            db.create_collection('request_logs')
-            db.request_logs.create_index([('timestamp', -1)])
-            db.request_logs.create_index([('path', 1)])
-            db.request_logs.create_index([('status_code', 1)])
-            # Add compound index for request deduplication
-            db.request_logs.create_index([
-                ('request_hash', 1),
-                ('timestamp', -1)
-            ])
-    except Exception as e:
-        print(f"MongoDB Connection Failed: {e}")
+    with report.phase("cache"):
+        from cache_config import cache, entity_cache
+        from utils.entity_cache import ENTITY_CACHE_SIZE, ENTITY_CACHE_TIMEOUT
+        cache.init_app(app)
+        # Separate store so clearing cached responses keeps the assembled entities
+        entity_cache.init_app(app, config={
+            'CACHE_TYPE': 'SimpleCache',
+            'CACHE_THRESHOLD': ENTITY_CACHE_SIZE,
+            'CACHE_DEFAULT_TIMEOUT': ENTITY_CACHE_TIMEOUT
+        })
+
+    # Listeners load by name with the first client, keeping pymongo out of startup:
+    # per-command and connection-pool timings for /metrics, and commands over
+    # SLOW_OP_THRESHOLD_MS recorded for /admin/slow-ops
+    MongoDB.add_listener("utils.mongo_metrics:command_listener")
+    MongoDB.add_listener("utils.mongo_metrics:pool_listener")
+    MongoDB.add_listener("utils.slow_ops:slow_op_recorder")
+
+    # Collections and indexes are created by `python -m db.bootstrap`, not on every boot
+    if os.getenv('DB_BOOTSTRAP_ON_START') == '1':
+        with report.phase("db bootstrap"):
+            try:
+                from db.bootstrap import bootstrap
+                with app.app_context():
+                    bootstrap(get_db())
+            except Exception as e:
+                print(f"MongoDB Connection Failed: {e}")
 
     # Request logging middleware
     @app.before_request
     def before_request():
         g.start_time = time.time()
+        # Queue or shed (503) requests over their concurrency limits
+        return admission.admit()
+
+    @app.teardown_request
+    def release_admission(exc):
+        admission.release()
 
     @app.after_request
     def after_request(response):
         try:
-            # Skip logging for non-API requests
-            if not should_log_request(request.path):
-                return response
-
             # Calculate request duration
             duration = time.time() - g.start_time
+
+            # Record latency for every routed request, keyed by URL rule to bound cardinality
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_COUNT.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+            REQUEST_LATENCY.observe(duration, method=request.method, endpoint=endpoint)
+            registry.flush()
+
+            # Skip logging for non-API requests and worker warm-up
+            if not should_log_request(request.path) or request.headers.get(WARMUP_HEADER):
+                return response
             
             # Generate request hash for deduplication
             timestamp = datetime.utcnow()
@@ -114,35 +194,28 @@ def create_app():
             # Log request details
             log_entry = {
                 'timestamp': timestamp,
+                # Time-series key: one bucket per route and method
+                'meta': {'method': request.method, 'endpoint': endpoint},
                 'ip_address': request.remote_addr,
-                'method': request.method,
                 'path': request.path,
                 'status_code': response.status_code,
                 'duration_ms': round(duration * 1000, 2),
                 'user_agent': request.headers.get('User-Agent', ''),
-                'query_params': dict(request.args),
-                'response_size': len(response.get_data()),
-                'request_hash': request_hash
+                'query_params': dict(request.args)
             }
+            # Streamed exports are not buffered just to measure them. The field
+            # is left out rather than null, which the int schema would reject
+            if not response.is_streamed:
+                log_entry['response_size'] = len(response.get_data())
             
-            # Check for duplicate request in the last minute
+            # Skip requests already logged in the last minute
             try:
-                with app.app_context():
-                    db = MongoDB.get_db()
-                    # Look for duplicate request in the last minute
-                    duplicate = db.request_logs.find_one({
-                        'request_hash': request_hash,
-                        'timestamp': {
-                            '$gte': timestamp.replace(second=0, microsecond=0),
-                            '$lt': timestamp.replace(second=59, microsecond=999999)
-                        }
-                    })
-                    
-                    if not duplicate:
-                        # Only log if no duplicate found
+                if not is_duplicate_request(request_hash, timestamp):
+                    with app.app_context():
+                        db = MongoDB.get_db()
                         db.request_logs.insert_one(log_entry)
                         # Simple console log in Flask's default format
-                        print(f"[{log_entry['method']}] {log_entry['path']} - {log_entry['status_code']} ({log_entry['duration_ms']}ms)")
+                        print(f"[{request.method}] {log_entry['path']} - {log_entry['status_code']} ({log_entry['duration_ms']}ms)")
             except Exception as e:
                 print(f"Failed to log to MongoDB: {e}")
             
@@ -154,17 +227,37 @@ def create_app():
             return response
 
     # Import and register blueprints
-    from routes.students import student_bp
-    app.register_blueprint(student_bp, url_prefix='/students')
+    with report.phase("blueprint students"):
+        from routes.students import student_bp
+        app.register_blueprint(student_bp, url_prefix='/students')
+
+    with report.phase("blueprint subjects"):
+        from routes.subjects import subject_bp
+        app.register_blueprint(subject_bp, url_prefix='/subjects')
+
+    with report.phase("blueprint home"):
+        from routes.sy_comprep import genrep_bp
+        app.register_blueprint(genrep_bp, url_prefix='/home')
+
+    with report.phase("blueprint modify"):
+        from routes.students.modify import modify_bp
+        app.register_blueprint(modify_bp, url_prefix='/students/modify')
+
+    with report.phase("blueprint export"):
+        from routes.export import export_bp
+        app.register_blueprint(export_bp, url_prefix='/export')
 
-    from routes.subjects import subject_bp
-    app.register_blueprint(subject_bp, url_prefix='/subjects')
+    with report.phase("blueprint monitoring"):
+        from routes.monitoring import monitoring_bp
+        app.register_blueprint(monitoring_bp)
 
-    from routes.sy_comprep import genrep_bp
-    app.register_blueprint(genrep_bp, url_prefix='/home')
+    with report.phase("blueprint analytics"):
+        from routes.analytics import analytics_bp
+        app.register_blueprint(analytics_bp, url_prefix='/analytics')
 
-    from routes.students.modify import modify_bp
-    app.register_blueprint(modify_bp, url_prefix='/students/modify')
+    with report.phase("blueprint admin"):
+        from routes.admin import admin_bp
+        app.register_blueprint(admin_bp, url_prefix='/admin')
 
     # Register routes
     @app.route('/test-mongo')
@@ -191,4 +284,7 @@ def create_app():
     def home():
         return "Student Analytics API - Use /test-mongo to check database"
 
+    app.extensions['startup_report'] = report
+    if os.getenv('STARTUP_REPORT') == '1':
+        print(report.format())
     return app
\ No newline at end of file
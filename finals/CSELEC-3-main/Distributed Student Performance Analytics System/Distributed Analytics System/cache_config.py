@@ -1,3 +1,66 @@
+import os
+import time
 from flask_caching import Cache
+from flask_caching.backends.simplecache import SimpleCache
+from utils.metrics import CACHE_REQUESTS
 
-cache = Cache()
\ No newline at end of file
+# Seconds a worker reuses the shared response version before reading it again
+RESPONSE_VERSION_SECONDS = float(os.getenv('RESPONSE_VERSION_SECONDS', 1))
+# Bound on that read, so a slow database cannot stall cache hits
+RESPONSE_VERSION_TIMEOUT = 0.5
+
+class MetricsSimpleCache(SimpleCache):
+    """SimpleCache that counts hits and misses for /metrics.
+
+    Each worker has its own store, so keys are prefixed with the response
+    version kept in MongoDB (utils/entity_cache.response_version). A write
+    in any worker bumps it, and every worker's older pages stop matching
+    within RESPONSE_VERSION_SECONDS.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = None
+        self.checked_at = None
+
+    def _key(self, key):
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= RESPONSE_VERSION_SECONDS:
+            import pymongo
+            from db.mongodb import get_db
+            from utils.entity_cache import response_version
+
+            try:
+                with pymongo.timeout(RESPONSE_VERSION_TIMEOUT):
+                    self.version = response_version(get_db())
+            except Exception as e:
+                # Keep serving under the last known version
+                print(f"❌ Response cache version not read: {e}")
+            self.checked_at = now
+        return f"{self.version}:{key}"
+
+    def get(self, key):
+        value = super().get(self._key(key))
+        CACHE_REQUESTS.inc(result="miss" if value is None else "hit")
+        return value
+
+    def set(self, key, value, timeout=None):
+        return super().set(self._key(key), value, timeout)
+
+    def add(self, key, value, timeout=None):
+        return super().add(self._key(key), value, timeout)
+
+    def has(self, key):
+        return super().has(self._key(key))
+
+    def delete(self, key):
+        return super().delete(self._key(key))
+
+    def clear(self):
+        # Read the version again: a clear follows a bump
+        self.checked_at = None
+        return super().clear()
+
+cache = Cache()
+# Assembled student objects (utils/entity_cache.py); survives cache.clear()
+entity_cache = Cache()
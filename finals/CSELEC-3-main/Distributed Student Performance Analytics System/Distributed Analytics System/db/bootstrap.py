@@ -0,0 +1,44 @@
+"""Create the collections and indexes the app expects, once per deploy.
+
+The app no longer touches the database while starting up; run this as a
+migration step before starting (or after upgrading) the server:
+
+    python -m db.bootstrap
+
+Every step is idempotent, so running it again is harmless.
+"""
+import os
+from db.index_sync import sync_indexes
+from utils.slow_ops import ensure_slow_ops_collection
+
+def bootstrap(db):
+    """Ensure request_logs, the route indexes and slow_ops; returns the index report"""
+    # sync_indexes creates request_logs as a time series before indexing it
+    report = sync_indexes(db)
+    ensure_slow_ops_collection(db)
+    return report
+
+def main():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    report = bootstrap(db)
+    failed = False
+    for collection_name, result in report.items():
+        for name in result["created"]:
+            print(f"  + {collection_name}.{name}")
+        for conflict in result["conflicts"]:
+            print(f"  ! {collection_name}.{conflict['name']}: live {conflict['live']} != declared {conflict['declared']}")
+        for error in result["errors"]:
+            failed = True
+            print(f"  ❌ {collection_name} {error['keys']}: {error['error']}")
+
+    print(f"✅ {db.name} bootstrapped" if not failed else f"❌ {db.name} bootstrapped with index errors")
+    return 0 if not failed else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+"""Bring the live database's indexes in line with a declared index set.
+
+Collections are never dropped. Run from the application directory:
+
+    python -m db.index_sync [--drop-undeclared]
+"""
+import argparse
+import os
+from pymongo.errors import OperationFailure
+from db.schema import ROUTE_INDEXES
+from db.request_logs import REQUEST_LOGS, ensure_request_logs
+
+# Options that change what an index enforces; anything else is cosmetic
+SIGNIFICANT_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+def _key_spec(keys):
+    # Older servers report numeric directions as floats
+    return tuple(
+        (field, int(direction) if isinstance(direction, float) else direction)
+        for field, direction in keys
+    )
+
+def _significant(options):
+    return {k: options[k] for k in SIGNIFICANT_OPTIONS if k in options}
+
+def sync_indexes(db, declared=None, drop_undeclared=False):
+    """Create missing declared indexes and report differences per collection"""
+    declared = ROUTE_INDEXES if declared is None else declared
+    report = {}
+
+    for collection_name, indexes in declared.items():
+        if collection_name == REQUEST_LOGS:
+            # Creating an index first would make request_logs a plain collection that never expires
+            ensure_request_logs(db)
+        collection = db[collection_name]
+        existing = {
+            _key_spec(info["key"]): (name, info)
+            for name, info in collection.index_information().items()
+        }
+        result = {"created": [], "existing": [], "conflicts": [], "undeclared": [], "dropped": [], "errors": []}
+        wanted = set()
+
+        for index in indexes:
+            keys = _key_spec(index["keys"])
+            options = index.get("options", {})
+            wanted.add(keys)
+
+            if keys in existing:
+                name, info = existing[keys]
+                if _significant(info) != _significant(options):
+                    # Rebuilding would need a drop; leave that decision to a human
+                    result["conflicts"].append({"name": name, "live": _significant(info), "declared": _significant(options)})
+                else:
+                    result["existing"].append(name)
+                continue
+
+            try:
+                result["created"].append(collection.create_index(list(keys), **options))
+            except OperationFailure as e:
+                result["errors"].append({"keys": list(keys), "error": str(e)})
+
+        for keys, (name, _) in existing.items():
+            if name == "_id_" or keys in wanted:
+                continue
+            if drop_undeclared:
+                collection.drop_index(name)
+                result["dropped"].append(name)
+            else:
+                result["undeclared"].append(name)
+
+        report[collection_name] = result
+
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync declared indexes with the live database")
+    parser.add_argument("--drop-undeclared", action="store_true",
+                        help="also drop indexes that are not declared in ROUTE_INDEXES")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    report = sync_indexes(db, drop_undeclared=args.drop_undeclared)
+    failed = False
+    for collection_name, result in report.items():
+        print(f"{collection_name}: {len(result['created'])} created, {len(result['existing'])} existing, "
+              f"{len(result['dropped'])} dropped")
+        for name in result["created"]:
+            print(f"  + {name}")
+        for name in result["undeclared"]:
+            print(f"  ? {name} (not declared)")
+        for conflict in result["conflicts"]:
+            print(f"  ! {conflict['name']}: live {conflict['live']} != declared {conflict['declared']}")
+        for error in result["errors"]:
+            failed = True
+            print(f"  ❌ {error['keys']}: {error['error']}")
+
+    print("✅ Indexes in sync" if not failed else "❌ Some indexes could not be created")
+    return 0 if not failed else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
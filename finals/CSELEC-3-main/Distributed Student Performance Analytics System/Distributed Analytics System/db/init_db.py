@@ -3,6 +3,7 @@ from datetime import datetime
 import os
 from dotenv import load_dotenv
 from schema import COLLECTIONS, INDEXES
+from request_logs import REQUEST_LOGS, create_request_logs
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +20,12 @@ def init_database():
             if collection_name in db.list_collection_names():
                 db[collection_name].drop()
             
+            # request_logs is a time-series collection with TTL expiry
+            if collection_name == REQUEST_LOGS:
+                create_request_logs(db)
+                print(f"✅ Created time-series collection: {collection_name}")
+                continue
+
             # Create collection with schema validation
             db.create_collection(
                 collection_name,
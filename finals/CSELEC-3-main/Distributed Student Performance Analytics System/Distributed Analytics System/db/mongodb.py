@@ -1,13 +1,34 @@
-from pymongo import MongoClient
+import importlib
 from flask import current_app
 
+def _resolve_listener(listener):
+    """Import a listener registered as "module:attribute" (objects pass through)"""
+    if not isinstance(listener, str):
+        return listener
+    module_name, attribute = listener.split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
 class MongoDB:
     _instance = None
+    # Command and pool listeners attached to every client this class opens.
+    # "module:attribute" strings are imported only when the first client opens,
+    # so pymongo stays out of app startup.
+    event_listeners = []
 
     def __init__(self):
         if not current_app.config['TESTING']:
-            self.client = MongoClient('mongodb://localhost:27017/')
-            self.db = self.client['CSELEC3DB']
+            from pymongo import MongoClient
+
+            listeners = [_resolve_listener(listener) for listener in MongoDB.event_listeners]
+            for listener in listeners:
+                # Listeners that work in the background need the app for its config
+                if hasattr(listener, 'init_app'):
+                    listener.init_app(current_app._get_current_object())
+            self.client = MongoClient(
+                current_app.config.get('MONGO_URI', 'mongodb://localhost:27017/'),
+                event_listeners=listeners
+            )
+            self.db = self.client[current_app.config.get('MONGO_DBNAME', 'CSELEC3DB')]
 
     @classmethod
     def get_db(cls):
@@ -15,5 +36,22 @@ class MongoDB:
             cls._instance = MongoDB()
         return cls._instance.db
 
+    @classmethod
+    def add_listener(cls, listener):
+        """Register a pymongo listener (or "module:attribute") for clients opened from now on"""
+        if listener not in cls.event_listeners:
+            cls.event_listeners.append(listener)
+
+    @classmethod
+    def reset(cls, close=True):
+        """Drop the shared client so the next get_db() opens a fresh one.
+
+        Pass close=False in a forked child: its sockets are copies of the
+        parent's, and closing them would send commands on the parent's connections.
+        """
+        if close and cls._instance is not None and hasattr(cls._instance, 'client'):
+            cls._instance.client.close()
+        cls._instance = None
+
 # Shortcut for routes
-get_db = MongoDB.get_db
\ No newline at end of file
+get_db = MongoDB.get_db
@@ -0,0 +1,256 @@
+"""Explain every query the API routes issue and flag bad plans.
+
+The audit drives each route through Flask's test client, captures the
+find/aggregate/update commands it sends with a pymongo CommandListener,
+then re-runs each one as ``explain`` with executionStats. Run from the
+application directory against a seeded database:
+
+    python -m db.query_audit [--sync-indexes]
+"""
+import argparse
+import json
+from pymongo import monitoring
+
+# Commands that can be explained
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Driver bookkeeping that explain does not accept
+COMMAND_META_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "$readConcern", "readConcern"}
+
+# Small reference collections that are always read whole
+COLLSCAN_ALLOWED = {"semesters"}
+
+DEFAULT_MAX_RATIO = 10.0
+
+# Stages that legitimately read many documents to return few
+REDUCING_STAGES = {"$group", "$count", "$bucket", "$bucketAuto", "$facet", "$sortByCount", "$setWindowFields"}
+
+class CommandCapture(monitoring.CommandListener):
+    """Collect explainable commands, tagged with the route probe that sent them"""
+
+    def __init__(self):
+        self.commands = []
+        self.probe = None
+
+    def started(self, event):
+        if self.probe is None or event.command_name not in EXPLAINABLE_COMMANDS:
+            return
+        command = {k: v for k, v in event.command.items() if k not in COMMAND_META_FIELDS}
+        self.commands.append({
+            "probe": self.probe,
+            "command_name": event.command_name,
+            "collection": command.get(event.command_name),
+            "command": command
+        })
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def route_probes(db):
+    """Representative requests for every data route, using ids from the seeded data"""
+    grade_doc = db.grades.find_one({}, {"StudentID": 1, "SemesterID": 1, "SubjectCodes": 1, "Grades": 1})
+    if not grade_doc:
+        raise ValueError("The audit needs a seeded database (no grades found)")
+
+    student_id = grade_doc["StudentID"]
+    semester_id = grade_doc["SemesterID"]
+    semester = db.semesters.find_one({"_id": semester_id}) or {}
+    school_year = semester.get("SchoolYear")
+    student = db.students.find_one({"_id": student_id}) or {}
+    search = (student.get("Name") or "a")[:3]
+
+    return [
+        ("GET", "/students/at_risk", None),
+        ("GET", f"/students/at_risk?semester_id={semester_id}", None),
+        ("GET", f"/students/at_risk?semester_id={semester_id}&search={search}", None),
+        ("GET", f"/students/at_risk?semester_id={semester_id}&sort=score", None),
+        ("GET", "/students/at_risk?min_score=50", None),
+        ("GET", f"/students/performance/{student_id}?semester_id={semester_id}", None),
+        ("GET", "/students/performance/all?page=1", None),
+        ("GET", "/students/performance/all?page=2&per_page=200&sort=name", None),
+        ("GET", f"/students/performance/all?per_page=200&sort=gpa&semester_id={semester_id}", None),
+        ("GET", f"/students/performance/all?sort=weighted_average&order=asc&semester_id={semester_id}", None),
+        ("GET", f"/students/subjects/{student_id}", None),
+        ("GET", f"/students/{student_id}/timeline", None),
+        ("GET", f"/students/search?prefix={search}", None),
+        ("GET", f"/students/{student_id}/rank?semester_id={semester_id}", None),
+        ("GET", f"/students/leaderboard?semester_id={semester_id}&course={student.get('Course', '')}", None),
+        ("GET", "/subjects/analytics", None),
+        ("GET", f"/subjects/analytics?semester_id={semester_id}", None),
+        ("GET", f"/subjects/analytics?year={school_year}", None),
+        ("GET", f"/subjects/distribution?semester_id={semester_id}", None),
+        ("GET", f"/subjects/distribution?year={school_year}&bins=60,70,80,90", None),
+        ("GET", f"/home/?sy={school_year}", None),
+        ("GET", f"/analytics/cube?group_by=course,year_level&semester_id={semester_id}", None),
+        # Re-submits the current grade so the audit leaves the data unchanged
+        ("POST", "/students/modify/update-grade", {
+            "student_id": student_id,
+            "subject_code": grade_doc["SubjectCodes"][0],
+            "semester_id": semester_id,
+            "new_grade": grade_doc["Grades"][0]
+        })
+    ]
+
+def collect_route_commands(app, probes):
+    """Send each probe through the app and capture the commands it issues"""
+    from cache_config import cache
+    from db.mongodb import MongoDB
+
+    capture = CommandCapture()
+    monitoring.register(capture)
+    # Listeners only attach to clients created after registration
+    MongoDB.reset()
+
+    client = app.test_client()
+    with app.app_context():
+        for method, path, body in probes:
+            cache.clear()
+            capture.probe = f"{method} {path}"
+            client.open(path, method=method, json=body)
+    capture.probe = None
+    return capture.commands
+
+def explain_command(db, command):
+    """Run a captured command as explain with executionStats"""
+    pipeline = command.get("pipeline")
+    if pipeline and ("$merge" in pipeline[-1] or "$out" in pipeline[-1]):
+        # explain cannot run $merge/$out in executionStats mode; the reads are the same without it
+        command = {**command, "pipeline": pipeline[:-1]}
+    return db.command({"explain": command, "verbosity": "executionStats"})
+
+def _walk(node, visit, context=None):
+    if isinstance(node, dict):
+        visit(node, context)
+        for key, value in node.items():
+            _walk(value, visit, key if key.startswith("$") else context)
+    elif isinstance(node, list):
+        for value in node:
+            _walk(value, visit, context)
+
+def summarize_explain(explain):
+    """Reduce an explain document to scans, docs examined and docs returned"""
+    summary = {"collscans": [], "docs_examined": 0, "keys_examined": 0, "returned": None}
+
+    def visit(node, context):
+        if node.get("stage") == "COLLSCAN":
+            summary["collscans"].append(context or "query")
+        if node.get("collectionScans"):
+            # $lookup stage statistics
+            summary["collscans"].append(context or "$lookup")
+        if isinstance(node.get("totalDocsExamined"), (int, float)):
+            summary["docs_examined"] += node["totalDocsExamined"]
+        if isinstance(node.get("totalKeysExamined"), (int, float)):
+            summary["keys_examined"] += node["totalKeysExamined"]
+
+    _walk(explain, visit)
+
+    if "executionStats" in explain:
+        summary["returned"] = explain["executionStats"].get("nReturned")
+    elif explain.get("stages"):
+        last = explain["stages"][-1]
+        summary["returned"] = last.get("nReturned")
+        if summary["returned"] is None:
+            cursor_stage = explain["stages"][0].get("$cursor", {})
+            summary["returned"] = cursor_stage.get("executionStats", {}).get("nReturned")
+
+    returned = summary["returned"] or 0
+    summary["ratio"] = round(summary["docs_examined"] / max(returned, 1), 2)
+    return summary
+
+def _is_unfiltered(captured):
+    """True for queries that read a whole collection by design"""
+    command = captured["command"]
+    if captured["command_name"] == "find":
+        return not command.get("filter")
+    if captured["command_name"] == "aggregate":
+        pipeline = command.get("pipeline") or []
+        return not pipeline or "$match" not in pipeline[0] or not pipeline[0]["$match"]
+    if captured["command_name"] == "count":
+        return not command.get("query")
+    return False
+
+def _reduces(captured):
+    """True for aggregations whose output is a summary of their input"""
+    if captured["command_name"] == "count":
+        return True
+    pipeline = captured["command"].get("pipeline") or []
+    return any(REDUCING_STAGES.intersection(stage) for stage in pipeline)
+
+def audit_commands(db, commands, max_ratio=DEFAULT_MAX_RATIO):
+    """Explain captured commands and attach the problems found in each plan"""
+    findings = []
+    seen = set()
+
+    for captured in commands:
+        key = json.dumps(captured["command"], sort_keys=True, default=str)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        try:
+            summary = summarize_explain(explain_command(db, captured["command"]))
+        except Exception as e:
+            findings.append({**captured, "summary": None, "problems": [f"explain failed: {e}"]})
+            continue
+
+        problems = []
+        if summary["collscans"] and captured["collection"] not in COLLSCAN_ALLOWED and not _is_unfiltered(captured):
+            problems.append(f"COLLSCAN in {', '.join(sorted(set(summary['collscans'])))}")
+        if summary["returned"] and summary["ratio"] > max_ratio and not _reduces(captured):
+            problems.append(f"examined {summary['docs_examined']} docs for {summary['returned']} returned")
+
+        findings.append({**captured, "summary": summary, "problems": problems})
+
+    return findings
+
+def audit_routes(app, max_ratio=DEFAULT_MAX_RATIO):
+    """Capture and explain every query the routes issue against the app's database"""
+    from db.mongodb import get_db
+
+    with app.app_context():
+        probes = route_probes(get_db())
+        commands = collect_route_commands(app, probes)
+        # collect_route_commands replaced the shared client
+        return audit_commands(get_db(), commands, max_ratio)
+
+def format_findings(findings):
+    lines = []
+    for finding in findings:
+        summary = finding["summary"] or {}
+        status = "FAIL" if finding["problems"] else "ok"
+        lines.append(
+            f"[{status:4}] {finding['probe']:70} {finding['command_name']:9} {str(finding['collection']):16} "
+            f"examined={summary.get('docs_examined')} returned={summary.get('returned')} ratio={summary.get('ratio')}"
+        )
+        for problem in finding["problems"]:
+            lines.append(f"       - {problem}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain every route query and flag collection scans")
+    parser.add_argument("--sync-indexes", action="store_true", help="create missing ROUTE_INDEXES first")
+    parser.add_argument("--max-ratio", type=float, default=DEFAULT_MAX_RATIO,
+                        help="flag queries examining more than this many docs per returned doc")
+    args = parser.parse_args()
+
+    from app_factory import create_app
+    from db.mongodb import get_db
+
+    app = create_app()
+    if args.sync_indexes:
+        from db.index_sync import sync_indexes
+        with app.app_context():
+            sync_indexes(get_db())
+
+    findings = audit_routes(app, args.max_ratio)
+
+    print(format_findings(findings))
+    failures = [f for f in findings if f["problems"]]
+    print(f"\n{len(findings)} queries audited, {len(failures)} flagged")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+# db/request_logs.py
+"""request_logs as a MongoDB time-series collection with TTL expiry.
+
+Each log document has a `timestamp` (time field) and a `meta` object
+holding the low-cardinality series key (HTTP method and route rule), so
+MongoDB buckets a minute of one route's requests into one compressed
+document instead of maintaining several B-tree indexes per insert.
+
+An existing plain request_logs collection is converted with:
+
+    python -m db.request_logs migrate [--batch-size 10000] [--keep-legacy]
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+REQUEST_LOGS = "request_logs"
+LEGACY_REQUEST_LOGS = "request_logs_legacy"
+MIGRATION_STATE = "migration_state"
+MIGRATION_ID = "request_logs_timeseries"
+
+def log_ttl_seconds():
+    return int(float(os.getenv('REQUEST_LOG_TTL_DAYS', 30)) * 24 * 3600)
+
+def collection_type(db, name):
+    """'timeseries', 'collection', or None when it does not exist"""
+    for info in db.list_collections(filter={"name": name}):
+        return info.get("type", "collection")
+    return None
+
+def create_request_logs(db, name=REQUEST_LOGS):
+    db.create_collection(
+        name,
+        timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"},
+        expireAfterSeconds=log_ttl_seconds()
+    )
+    # Range scans by time for the rollup job
+    db[name].create_index([("timestamp", 1)])
+
+def ensure_request_logs(db):
+    """Create the time-series collection, or keep its TTL in line with REQUEST_LOG_TTL_DAYS"""
+    kind = collection_type(db, REQUEST_LOGS)
+    if kind is None:
+        create_request_logs(db)
+    elif kind == "timeseries":
+        db.command({"collMod": REQUEST_LOGS, "expireAfterSeconds": log_ttl_seconds()})
+    else:
+        print("⚠️ request_logs is not a time-series collection; run python -m db.request_logs migrate")
+
+def to_time_series(doc):
+    """Convert a legacy flat log row to the time-series shape"""
+    doc = dict(doc)
+    doc.pop("_id", None)
+    doc.pop("request_hash", None)
+    doc["meta"] = {"method": doc.pop("method", None), "endpoint": doc.pop("endpoint", None)}
+    return doc
+
+def migrate_request_logs(db, batch_size=10000, keep_legacy=False, progress=print):
+    """Copy a plain request_logs collection into a new time-series one in batches.
+
+    The plain collection is renamed to request_logs_legacy first, so new logs
+    go to the time-series collection while the copy runs. The last copied _id
+    is saved after every batch, so an interrupted migration resumes.
+    """
+    kind = collection_type(db, REQUEST_LOGS)
+    if kind == "collection":
+        db[REQUEST_LOGS].rename(LEGACY_REQUEST_LOGS)
+        kind = None
+    if kind is None:
+        create_request_logs(db)
+    if collection_type(db, LEGACY_REQUEST_LOGS) is None:
+        progress("Nothing to migrate")
+        return 0
+
+    state = db[MIGRATION_STATE].find_one({"_id": MIGRATION_ID}) or {}
+    # Rows older than the TTL would expire as soon as they were copied
+    query = {"timestamp": {"$gte": datetime.utcnow() - timedelta(seconds=log_ttl_seconds())}}
+    if state.get("last_id") is not None:
+        query["_id"] = {"$gt": state["last_id"]}
+
+    copied = state.get("copied", 0)
+    batch = []
+    for doc in db[LEGACY_REQUEST_LOGS].find(query).sort("_id", 1).batch_size(batch_size):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            copied += _copy_batch(db, batch, copied)
+            progress(f"  copied {copied} log rows")
+            batch = []
+    if batch:
+        copied += _copy_batch(db, batch, copied)
+        progress(f"  copied {copied} log rows")
+
+    if not keep_legacy:
+        db[LEGACY_REQUEST_LOGS].drop()
+    db[MIGRATION_STATE].delete_one({"_id": MIGRATION_ID})
+    return copied
+
+def _copy_batch(db, batch, copied):
+    db[REQUEST_LOGS].insert_many([to_time_series(doc) for doc in batch], ordered=False)
+    db[MIGRATION_STATE].update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {"last_id": batch[-1]["_id"], "copied": copied + len(batch)}},
+        upsert=True
+    )
+    return len(batch)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the time-series request_logs collection")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="convert a plain request_logs collection")
+    migrate.add_argument("--batch-size", type=int, default=10000)
+    migrate.add_argument("--keep-legacy", action="store_true", help="keep request_logs_legacy after copying")
+    subparsers.add_parser("ensure", help="create the collection or update its TTL")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    if args.command == "ensure":
+        ensure_request_logs(db)
+        print(f"✅ request_logs keeps {log_ttl_seconds() // 86400} days of logs")
+        return 0
+
+    copied = migrate_request_logs(db, batch_size=args.batch_size, keep_legacy=args.keep_legacy)
+    print(f"✅ Migrated {copied} request logs to the time-series collection")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
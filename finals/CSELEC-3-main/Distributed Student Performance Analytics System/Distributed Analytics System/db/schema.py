@@ -113,15 +113,10 @@ COLLECTIONS = {
                     "passing_rate": {"bsonType": "double", "minimum": 0, "maximum": 100},
                     "at_risk_rate": {"bsonType": "double", "minimum": 0, "maximum": 100},
                     "top_grade": {"bsonType": "int", "minimum": 0, "maximum": 100},
+                    # Count per grade bin, e.g. {"0-74": 3, "75-79": 10, ...} (utils/grade_distribution.py)
                     "grade_distribution": {
                         "bsonType": "object",
-                        "properties": {
-                            "A": {"bsonType": "int", "minimum": 0},
-                            "B": {"bsonType": "int", "minimum": 0},
-                            "C": {"bsonType": "int", "minimum": 0},
-                            "D": {"bsonType": "int", "minimum": 0},
-                            "F": {"bsonType": "int", "minimum": 0}
-                        }
+                        "additionalProperties": {"bsonType": "int", "minimum": 0}
                     },
                     "total_students": {"bsonType": "int", "minimum": 0},
                     "created_at": {"bsonType": "date"},
@@ -170,12 +165,17 @@ COLLECTIONS = {
         "validator": {
             "$jsonSchema": {
                 "bsonType": "object",
-                "required": ["timestamp", "ip_address", "method", "path", "status_code", "duration_ms"],
+                "required": ["timestamp", "meta", "ip_address", "path", "status_code", "duration_ms"],
                 "properties": {
                     "timestamp": {"bsonType": "date"},
+                    "meta": {
+                        "bsonType": "object",
+                        "properties": {
+                            "method": {"bsonType": "string"},
+                            "endpoint": {"bsonType": ["string", "null"]}
+                        }
+                    },
                     "ip_address": {"bsonType": "string"},
-                    "method": {"bsonType": "string"},
-                    "endpoint": {"bsonType": ["string", "null"]},
                     "path": {"bsonType": "string"},
                     "status_code": {"bsonType": "int"},
                     "duration_ms": {"bsonType": "double"},
@@ -226,10 +226,61 @@ INDEXES = {
         {"keys": [("academic_standing", 1)]}
     ],
     "request_logs": [
-        {"keys": [("timestamp", -1)]},  # For time-based queries
-        {"keys": [("ip_address", 1)]},  # For IP-based queries
-        {"keys": [("path", 1)]},        # For endpoint-based queries
-        {"keys": [("status_code", 1)]}, # For status code analysis
-        {"keys": [("duration_ms", 1)]}  # For performance analysis
+        {"keys": [("timestamp", 1)]}    # Time-series collection; rollups serve path/status/latency queries
+    ]
+} 
+
+# Indexes for the fields the API routes actually query. INDEXES above belongs to
+# the snake_case schema created by init_db.py; the routes read the PascalCase
+# grades/students/subjects/semesters documents and the derived collections below.
+ROUTE_INDEXES = {
+    "grades": [
+        {"keys": [("StudentID", 1), ("SemesterID", 1)]},  # performance, modify, subjects
+        {"keys": [("SemesterID", 1), ("Grades", 1)]},     # at_risk with a semester filter
+        {"keys": [("Grades", 1)]},                        # at_risk across all semesters
+        {"keys": [("SubjectCodes", 1), ("SemesterID", 1)]}  # class average updater
+    ],
+    "semesters": [
+        {"keys": [("SchoolYear", 1), ("Semester", 1)]}
+    ],
+    "class_averages": [
+        {"keys": [("subject_code", 1), ("semester_id", 1)]},
+        {"keys": [("semester_id", 1), ("subject_code", 1)]}
+    ],
+    "students": [
+        {"keys": [("Name", 1), ("_id", 1)]}  # performance/all?sort=name
+    ],
+    "student_gpas": [
+        {"keys": [("student_id", 1), ("semester_id", 1)], "options": {"unique": True}},
+        {"keys": [("semester_id", 1)]},
+        {"keys": [("semester_id", 1), ("gpa", 1), ("student_id", 1)]},               # performance/all?sort=gpa
+        {"keys": [("semester_id", 1), ("weighted_average", 1), ("student_id", 1)]}   # performance/all?sort=weighted_average
+    ],
+    "semester_metrics": [
+        {"keys": [("semester_id", 1)]}
+    ],
+    "grade_cube": [
+        {"keys": [("semester_id", 1), ("course", 1), ("year_level", 1)]}  # /analytics/cube filters
+    ],
+    "risk_scores": [
+        {"keys": [("student_id", 1), ("semester_id", 1)], "options": {"unique": True}},
+        {"keys": [("semester_id", 1), ("score", -1), ("student_id", 1)]},  # at_risk?sort=score with a semester filter
+        {"keys": [("score", -1), ("student_id", 1)]}                       # at_risk?sort=score across all semesters
+    ],
+    "grade_changes": [
+        {"keys": [("seq", 1)], "options": {"unique": True}},                        # replay after a watermark
+        {"keys": [("timestamp", 1)], "options": {"expireAfterSeconds": 7 * 24 * 3600}}  # keep one week
+    ],
+    # Time-series collection (db/request_logs.py): only the rollup job's time range scan
+    "request_logs": [
+        {"keys": [("timestamp", 1)]}
+    ],
+    "request_rollups_minute": [
+        {"keys": [("start", 1)], "options": {"expireAfterSeconds": 14 * 24 * 3600}},  # keep two weeks
+        {"keys": [("path", 1), ("start", 1)]}   # latency trend for one path
+    ],
+    "request_rollups_hour": [
+        {"keys": [("start", 1)]},                # top slow paths over a range
+        {"keys": [("path", 1), ("start", 1)]}
     ]
-} 
\ No newline at end of file
+}
@@ -0,0 +1,251 @@
+# db/seed_synthetic.py
+"""Generate a synthetic dataset in the schema the routes query.
+
+Students are generated in id-range chunks by a pool of worker processes,
+each seeded from (seed, chunk index) so the same arguments always give
+the same data whatever the worker count. Grades are skewed per student
+(ability) and per subject (difficulty), and subject popularity follows a
+Zipf curve so class sizes range from a handful to thousands.
+
+    python -m db.seed_synthetic --students 100000 --drop
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+from pymongo import MongoClient
+
+SEEDED_COLLECTIONS = [
+    "students", "subjects", "semesters", "grades",
+    "class_averages", "student_gpas", "semester_metrics"
+]
+
+FIRST_NAMES = [
+    "Juan", "Maria", "Jose", "Ana", "Mark", "Angel", "John", "Kristine", "Paolo", "Camille",
+    "Miguel", "Andrea", "Carlo", "Nicole", "Rafael", "Patricia", "Gabriel", "Bea", "Luis", "Isabel",
+    "Kharl", "Louie", "Daniel", "Sofia", "Adrian", "Trisha", "Joshua", "Clarisse", "Vincent", "Erika"
+]
+LAST_NAMES = [
+    "Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza", "Torres", "Flores", "Villanueva",
+    "Ramos", "Aquino", "Castillo", "Rivera", "Dela Cruz", "Gonzales", "Navarro", "Salazar", "Domingo", "Lim",
+    "Tan", "Del Rosario", "Mercado", "Pascual", "Soriano", "Aguilar", "Valdez", "Manalo", "Marquez", "Fernandez"
+]
+# Course name and share of enrolment
+COURSES = [("BSIT", 0.35), ("BSCS", 0.25), ("BSIS", 0.15), ("BSEMC", 0.10), ("BSCpE", 0.08), ("BSECE", 0.07)]
+SUBJECT_PREFIXES = ["IT", "CS", "IS", "GE", "MATH", "PE", "NSTP", "EMC"]
+UNITS_CHOICES = ([1, 2, 3, 4, 5], [0.05, 0.15, 0.60, 0.15, 0.05])
+
+MAX_SUBJECTS_PER_TERM = 9
+FAILING_SHARE = 0.04
+
+def build_catalog(rng, subjects, school_years, start_year):
+    """Subjects and semesters shared by every chunk"""
+    codes = [f"{SUBJECT_PREFIXES[i % len(SUBJECT_PREFIXES)]}{101 + i // len(SUBJECT_PREFIXES)}" for i in range(subjects)]
+    units = rng.choice(UNITS_CHOICES[0], size=subjects, p=UNITS_CHOICES[1])
+    # Zipf-like popularity (randomly ordered) and per-subject difficulty
+    popularity = 1.0 / np.arange(1, subjects + 1) ** 1.1
+    rng.shuffle(popularity)
+    difficulty = rng.normal(0, 3, size=subjects)
+
+    semesters = []
+    for year_index in range(school_years):
+        for term_index, term in enumerate(["First", "Second"]):
+            semesters.append({
+                "_id": year_index * 2 + term_index + 1,
+                "Semester": term,
+                "SchoolYear": start_year + year_index
+            })
+
+    return {
+        "subjects": [
+            {"_id": code, "Description": f"{code} Course {i + 1}", "Units": int(u)}
+            for i, (code, u) in enumerate(zip(codes, units))
+        ],
+        "codes": codes,
+        "log_popularity": np.log(popularity / popularity.sum()),
+        "difficulty": difficulty,
+        "semesters": semesters
+    }
+
+def generate_chunk(catalog, first_id, count, rng):
+    """Student and grade documents for ids first_id .. first_id + count - 1"""
+    n_semesters = len(catalog["semesters"])
+    n_subjects = len(catalog["codes"])
+    ids = np.arange(first_id, first_id + count)
+
+    # Enrolment: an entry semester, then a run of terms until dropping out or graduating
+    entry = rng.integers(0, n_semesters, size=count)
+    terms = np.minimum(n_semesters - entry, np.minimum(rng.geometric(0.12, size=count), 8))
+    ability = rng.normal(83, 6, size=count)
+
+    course_names = [c for c, _ in COURSES]
+    courses = rng.choice(len(COURSES), size=count, p=[share for _, share in COURSES])
+    first = rng.integers(0, len(FIRST_NAMES), size=count)
+    last = rng.integers(0, len(LAST_NAMES), size=count)
+    students = [
+        {
+            "_id": int(student_id),
+            "Name": f"{FIRST_NAMES[f]} {LAST_NAMES[l]}",
+            "Course": course_names[c],
+            "YearLevel": int(min(4, 1 + (t - 1) // 2))
+        }
+        for student_id, f, l, c, t in zip(ids.tolist(), first.tolist(), last.tolist(), courses.tolist(), terms.tolist())
+    ]
+
+    # One row per (student, semester) enrolment
+    row_student = np.repeat(np.arange(count), terms)
+    offsets = np.arange(len(row_student)) - np.repeat(np.cumsum(terms) - terms, terms)
+    row_semester = entry[row_student] + offsets
+    rows = len(row_student)
+
+    # Subjects per term, picked without replacement by popularity (Gumbel top-k)
+    max_k = min(MAX_SUBJECTS_PER_TERM, n_subjects)
+    k = np.clip(rng.poisson(5, size=rows) + 1, min(3, max_k), max_k)
+    keys = catalog["log_popularity"] + rng.gumbel(size=(rows, n_subjects))
+    top = np.argpartition(-keys, max_k - 1, axis=1)[:, :max_k]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+
+    grades = ability[row_student][:, None] - catalog["difficulty"][top] + rng.normal(0, 4, size=top.shape)
+    failing = rng.random(size=top.shape) < FAILING_SHARE
+    grades = np.where(failing, rng.integers(50, 75, size=top.shape), grades)
+    grades = np.clip(np.rint(grades), 50, 99).astype(int)
+
+    codes = catalog["codes"]
+    semester_ids = [s["_id"] for s in catalog["semesters"]]
+    grade_docs = [
+        {
+            "StudentID": int(ids[s]),
+            "SemesterID": semester_ids[sem],
+            "SubjectCodes": [codes[j] for j in subject_row[:n]],
+            "Grades": grade_row[:n]
+        }
+        for s, sem, n, subject_row, grade_row in zip(
+            row_student.tolist(), row_semester.tolist(), k.tolist(), top.tolist(), grades.tolist())
+    ]
+    return students, grade_docs
+
+_worker = {}
+
+def init_worker(uri, dbname, catalog, seed):
+    _worker["db"] = MongoClient(uri)[dbname]
+    _worker["catalog"] = catalog
+    _worker["seed"] = seed
+
+def load_chunk(task):
+    """Generate one chunk and bulk insert it; returns (students, grade docs)"""
+    chunk_index, first_id, count = task
+    rng = np.random.default_rng([_worker["seed"], chunk_index])
+    students, grade_docs = generate_chunk(_worker["catalog"], first_id, count, rng)
+    db = _worker["db"]
+    db.students.insert_many(students, ordered=False)
+    db.grades.insert_many(grade_docs, ordered=False)
+    return len(students), len(grade_docs)
+
+def seed_database(uri, dbname, students=1000, subjects=120, school_years=4, start_year=2021,
+                  seed=42, workers=None, chunk_size=5000, drop=False):
+    """Generate and load a dataset, then build indexes and derived collections"""
+    from db.index_sync import sync_indexes
+    from utils.class_average_updater import update_entire_class_average, update_semester_metrics
+    from utils.student_gpa_aggregator import update_student_gpa_collection
+    from utils.entity_cache import bump_all
+    from utils.grade_changes import record_reload
+
+    db = MongoClient(uri)[dbname]
+    existing = [name for name in SEEDED_COLLECTIONS if db[name].estimated_document_count()]
+    if existing and not drop:
+        raise ValueError(f"{dbname} already has data in {', '.join(existing)}; pass drop=True to replace it")
+    for name in SEEDED_COLLECTIONS:
+        db[name].drop()
+
+    timings = {}
+    started = time.perf_counter()
+    catalog = build_catalog(np.random.default_rng(seed), subjects, school_years, start_year)
+    db.subjects.insert_many(catalog["subjects"])
+    db.semesters.insert_many(catalog["semesters"])
+
+    tasks = [
+        (index, first_id, min(chunk_size, students - first_id + 1))
+        for index, first_id in enumerate(range(1, students + 1, chunk_size))
+    ]
+    workers = workers or min(os.cpu_count() or 1, len(tasks))
+    student_count = grade_count = 0
+    if workers <= 1:
+        init_worker(uri, dbname, catalog, seed)
+        results = map(load_chunk, tasks)
+    else:
+        ctx = mp.get_context('spawn')
+        pool = ctx.Pool(workers, initializer=init_worker, initargs=(uri, dbname, catalog, seed))
+        results = pool.imap_unordered(load_chunk, tasks)
+    try:
+        for done, (chunk_students, chunk_grades) in enumerate(results, 1):
+            student_count += chunk_students
+            grade_count += chunk_grades
+            print(f"  chunk {done}/{len(tasks)}: {student_count} students, {grade_count} grade documents")
+    finally:
+        if workers > 1:
+            pool.close()
+            pool.join()
+    timings["load_seconds"] = round(time.perf_counter() - started, 2)
+    # New students: running workers reload their search index and cached counts
+    bump_all(db)
+    # New grades: analytics snapshots (in memory and on disk) and the grade cube rebuild
+    record_reload(db, "synthetic seed")
+
+    started = time.perf_counter()
+    index_report = sync_indexes(db)
+    timings["index_seconds"] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    update_entire_class_average(db)
+    update_student_gpa_collection(db)
+    update_semester_metrics(db)
+    timings["derived_seconds"] = round(time.perf_counter() - started, 2)
+
+    return {
+        "students": student_count,
+        "grade_documents": grade_count,
+        "subjects": subjects,
+        "semesters": len(catalog["semesters"]),
+        "indexes": index_report,
+        **timings
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic dataset in the live grades schema")
+    parser.add_argument("--students", type=int, default=10000, help="number of students (1k to 1M)")
+    parser.add_argument("--subjects", type=int, default=120)
+    parser.add_argument("--school-years", type=int, default=4, help="two semesters per school year")
+    parser.add_argument("--start-year", type=int, default=2021)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, help="generator processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="students per chunk")
+    parser.add_argument("--dbname", help="target database (default: MONGO_DBNAME)")
+    parser.add_argument("--drop", action="store_true", help="replace existing data in the seeded collections")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+    dbname = args.dbname or os.getenv('MONGO_DBNAME', 'CSELEC3DB')
+
+    print(f"Seeding {args.students} students into {dbname}...")
+    try:
+        result = seed_database(
+            uri, dbname, students=args.students, subjects=args.subjects, school_years=args.school_years,
+            start_year=args.start_year, seed=args.seed, workers=args.workers, chunk_size=args.chunk_size,
+            drop=args.drop
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"✅ {result['students']} students, {result['grade_documents']} grade documents, "
+          f"{result['subjects']} subjects, {result['semesters']} semesters")
+    print(f"   load {result['load_seconds']}s, indexes {result['index_seconds']}s, "
+          f"derived collections {result['derived_seconds']}s")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
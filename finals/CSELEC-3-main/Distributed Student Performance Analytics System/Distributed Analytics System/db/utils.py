@@ -4,6 +4,8 @@ from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.errors import DuplicateKeyError
 import os
 from dotenv import load_dotenv
+from utils.grading_scales import US4_SCALE
+from utils.grade_distribution import bin_edges, histogram
 
 # Load environment variables
 load_dotenv()
@@ -15,20 +17,7 @@ def get_db():
 
 def calculate_gpa(weighted_average: float) -> float:
     """Calculate GPA from weighted average"""
-    if weighted_average >= 97: return 4.0
-    elif weighted_average >= 94: return 3.75
-    elif weighted_average >= 91: return 3.5
-    elif weighted_average >= 88: return 3.25
-    elif weighted_average >= 85: return 3.0
-    elif weighted_average >= 82: return 2.75
-    elif weighted_average >= 79: return 2.5
-    elif weighted_average >= 76: return 2.25
-    elif weighted_average >= 73: return 2.0
-    elif weighted_average >= 70: return 1.75
-    elif weighted_average >= 67: return 1.5
-    elif weighted_average >= 64: return 1.25
-    elif weighted_average >= 60: return 1.0
-    else: return 0.0
+    return US4_SCALE.convert_one(weighted_average)
 
 def get_academic_standing(gpa: float) -> str:
     """Determine academic standing based on GPA"""
@@ -114,13 +103,7 @@ def update_class_averages(subject_code: str, semester_id: int) -> Dict[str, Any]
     at_risk_count = sum(1 for g in all_grades if g < 75)
     
     # Calculate grade distribution
-    distribution = {
-        "A": sum(1 for g in all_grades if g >= 97),
-        "B": sum(1 for g in all_grades if 94 <= g < 97),
-        "C": sum(1 for g in all_grades if 91 <= g < 94),
-        "D": sum(1 for g in all_grades if 88 <= g < 91),
-        "F": sum(1 for g in all_grades if g < 88)
-    }
+    distribution = histogram(all_grades, bin_edges())
     
     subject = db.subjects.find_one({"id": subject_code})
     
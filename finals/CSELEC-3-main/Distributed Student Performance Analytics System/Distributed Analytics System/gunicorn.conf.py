@@ -0,0 +1,66 @@
+# gunicorn.conf.py
+"""Production server settings: gunicorn -c gunicorn.conf.py
+
+The app is imported once in the master (preload_app) and forked into
+workers. Each worker drops the Mongo client, caches and metrics it
+inherited, warms up before taking traffic and flushes its metrics and
+slow-op queue on exit. Settings can be overridden through environment
+variables.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+wsgi_app = "app:app"
+
+# gthread: each worker serves `threads` requests at once from one MongoClient pool.
+# Response caches are per worker but keyed by a shared version in MongoDB
+# (cache_config.py), so a write in one worker invalidates them all.
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+# Seconds a stopping worker gets to finish in-flight requests
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+# Recycle workers now and then so slow leaks can't accumulate
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+# Requests are logged to MongoDB by the app; keep gunicorn's own log for errors
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Workers share metrics snapshots through this directory (see utils/metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f"cselec3_metrics_{os.getpid()}"))
+
+def on_starting(server):
+    os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
+    server.log.info(f"Metrics directory: {os.environ['METRICS_DIR']}")
+
+def post_fork(server, worker):
+    from app_factory import after_fork
+
+    after_fork(worker.app.wsgi())
+
+def post_worker_init(worker):
+    # Runs before the worker's first accept(), so warm-up delays only this worker
+    from utils.warmup import warm_up
+
+    report = warm_up(worker.app.wsgi(), connections=threads)
+    worker.log.info(f"Worker {worker.pid} warmed up: {report}")
+
+def worker_exit(server, worker):
+    from db.mongodb import MongoDB
+    from utils.metrics import registry
+    from utils.slow_ops import slow_op_recorder
+
+    slow_op_recorder.drain()
+    registry.flush(force=True)
+    MongoDB.reset()
+    sys.stdout.flush()
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, request
+from db.mongodb import get_db
+
+admin_bp = Blueprint('admin_bp', __name__)
+
+@admin_bp.route('/slow-ops', methods=['GET'])
+def get_slow_ops():
+    try:
+        db = get_db()
+        limit = min(request.args.get('limit', default=20, type=int), 100)
+        hours = request.args.get('hours', type=float)
+        since = datetime.utcnow() - timedelta(hours=hours) if hours else None
+
+        from utils.slow_ops import slow_op_report
+        shapes = slow_op_report(db, since=since, limit=limit)
+        return jsonify({
+            "since": since.isoformat() if since else None,
+            "count": len(shapes),
+            "shapes": shapes
+        })
+
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+def _rollup_range():
+    hours = request.args.get('hours', default=24, type=float)
+    since = datetime.utcnow() - timedelta(hours=hours)
+    # Minute buckets for short ranges, hour buckets beyond that
+    granularity = request.args.get('granularity') or ('minute' if hours <= 6 else 'hour')
+    if granularity not in ('minute', 'hour'):
+        raise ValueError("granularity must be 'minute' or 'hour'")
+    return since, granularity
+
+@admin_bp.route('/latency-trend', methods=['GET'])
+def get_latency_trend():
+    try:
+        path = request.args.get('path')
+        if not path:
+            return jsonify({"error": "path is required (route rule, e.g. /students/performance/<int:student_id>)"}), 400
+        since, granularity = _rollup_range()
+
+        db = get_db()
+        from utils.log_rollups import run_rollups, latency_trend
+        run_rollups(db)
+        trend = latency_trend(db, path, since, granularity=granularity, method=request.args.get('method'))
+        return jsonify({
+            "path": path,
+            "since": since.isoformat(),
+            "granularity": granularity,
+            "buckets": trend
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+@admin_bp.route('/slow-paths', methods=['GET'])
+def get_slow_paths():
+    try:
+        since, granularity = _rollup_range()
+        limit = min(request.args.get('limit', default=10, type=int), 100)
+        order_by = request.args.get('order_by', 'p95_ms')
+        if order_by not in ('p50_ms', 'p95_ms', 'p99_ms', 'avg_ms', 'max_ms', 'total_ms', 'count'):
+            return jsonify({"error": f"Cannot order by {order_by}"}), 400
+
+        db = get_db()
+        from utils.log_rollups import run_rollups, top_slow_paths
+        run_rollups(db)
+        paths = top_slow_paths(db, since, granularity=granularity, limit=limit, order_by=order_by)
+        return jsonify({
+            "since": since.isoformat(),
+            "granularity": granularity,
+            "order_by": order_by,
+            "paths": paths
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+@admin_bp.route('/admission', methods=['GET'])
+def get_admission():
+    from utils.admission import admission, COST_CLASSES, ENDPOINT_LIMITS
+
+    return jsonify({
+        "enabled": admission.enabled,
+        "cost_classes": COST_CLASSES,
+        "endpoint_limits": ENDPOINT_LIMITS,
+        "limiters": admission.status()
+    })
+
+@admin_bp.route('/analytics-snapshot', methods=['GET'])
+def get_analytics_snapshot():
+    from utils.analytics_snapshot import analytics
+
+    return jsonify(analytics.status())
@@ -0,0 +1,61 @@
+from flask import Blueprint, current_app, jsonify, request
+from db.mongodb import get_db
+
+analytics_bp = Blueprint('analytics_bp', __name__)
+
+# Dimensions whose query-string values are integers
+INTEGER_DIMENSIONS = {"year_level", "semester_id"}
+
+def _dimension_filters(dimensions):
+    """{dimension: [values]} from comma-separated query-string filters"""
+    filters = {}
+    for dimension in dimensions:
+        raw = request.args.get(dimension)
+        if not raw:
+            continue
+        values = [value.strip() for value in raw.split(",") if value.strip()]
+        if dimension in INTEGER_DIMENSIONS:
+            values = [int(value) for value in values]
+        filters[dimension] = values
+    return filters
+
+@analytics_bp.route('/cube', methods=['GET'])
+def get_cube():
+    """Average, spread, passing and at-risk rates grouped by any of the cube's dimensions"""
+    from utils.grade_cube import DIMENSIONS, cube_refresher, cube_watermark, query_cube
+
+    try:
+        group_by = [dimension.strip() for dimension in request.args.get('group_by', '').split(",") if dimension.strip()]
+        unknown = [dimension for dimension in group_by if dimension not in DIMENSIONS]
+        if unknown:
+            return jsonify({"error": f"Unknown dimension(s): {', '.join(unknown)}", "dimensions": list(DIMENSIONS)}), 400
+        filters = _dimension_filters(DIMENSIONS)
+        year = request.args.get('year', type=int)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {str(e)}"}), 400
+
+    try:
+        db = get_db()
+
+        if year:
+            # School year -> its semesters, intersected with any semester_id filter
+            semester_ids = [s["_id"] for s in db.semesters.find({"SchoolYear": year}, {"_id": 1})]
+            if "semester_id" in filters:
+                semester_ids = [semester_id for semester_id in semester_ids if semester_id in filters["semester_id"]]
+            filters["semester_id"] = semester_ids
+
+        # Served as it is; newer grade changes are applied in the background
+        cube_refresher.schedule(current_app._get_current_object())
+        watermark = cube_watermark(db)
+        if watermark is None:
+            return jsonify({"error": "Grade cube is being built, try again shortly"}), 503
+
+        return jsonify({
+            "group_by": group_by,
+            "filters": {**filters, **({"year": year} if year else {})},
+            "watermark": watermark,
+            "rows": query_cube(db, filters, group_by)
+        })
+
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
@@ -0,0 +1,104 @@
+from flask import Blueprint, jsonify, request
+from db.mongodb import get_db
+from routes.students.at_risk import build_at_risk_pipeline
+from routes.subjects.analytics import build_analytics_filter, build_analytics_pipeline
+from utils.stream_export import export_response, EXPORT_FORMATS, EXPORT_BATCH_SIZE
+
+export_bp = Blueprint('export_bp', __name__)
+
+AT_RISK_FIELDS = ["student_id", "name", "course", "semester_id", "semester", "school_year", "subject_codes", "grades"]
+STUDENT_GPA_FIELDS = ["student_id", "semester_id", "weighted_average", "gpa", "academic_standing"]
+CLASS_AVERAGE_FIELDS = ["subject_code", "subject_description", "semester_id", "average_grade", "passing_rate", "at_risk_rate", "top_grade"]
+
+def get_export_format():
+    fmt = request.args.get('format', 'ndjson').lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+def invalid_format_response():
+    return jsonify({
+        "error": "Invalid format",
+        "message": f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+    }), 400
+
+@export_bp.route('/at_risk', methods=['GET'])
+def export_at_risk_students():
+    fmt = get_export_format()
+    if not fmt:
+        return invalid_format_response()
+
+    try:
+        db = get_db()
+        semester_id = request.args.get('semester_id')
+        search_term = request.args.get('search', '').strip()
+
+        # Same filters as /students/at_risk, flattened to one row per grades document
+        pipeline = build_at_risk_pipeline(semester_id, search_term) + [
+            {"$project": {
+                "_id": 0,
+                "student_id": "$StudentID",
+                "name": "$student.Name",
+                "course": "$student.Course",
+                "semester_id": "$SemesterID",
+                "semester": "$semester.Semester",
+                "school_year": "$semester.SchoolYear",
+                "subject_codes": "$SubjectCodes",
+                "grades": "$Grades"
+            }}
+        ]
+
+        cursor = db.grades.aggregate(pipeline, batchSize=EXPORT_BATCH_SIZE, allowDiskUse=True)
+        return export_response(cursor, fmt, "at_risk_students", AT_RISK_FIELDS)
+
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid input: {str(ve)}"}), 400
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+@export_bp.route('/student_gpas', methods=['GET'])
+def export_student_gpas():
+    fmt = get_export_format()
+    if not fmt:
+        return invalid_format_response()
+
+    try:
+        db = get_db()
+        semester_id = request.args.get('semester_id', type=int)
+
+        query = {}
+        if semester_id:
+            query["semester_id"] = semester_id
+
+        projection = {field: 1 for field in STUDENT_GPA_FIELDS}
+        projection["_id"] = 0
+
+        cursor = db.student_gpas.find(query, projection).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+        return export_response(cursor, fmt, "student_gpas", STUDENT_GPA_FIELDS)
+
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+@export_bp.route('/class_averages', methods=['GET'])
+def export_class_averages():
+    fmt = get_export_format()
+    if not fmt:
+        return invalid_format_response()
+
+    try:
+        db = get_db()
+        year = request.args.get('year', type=int)
+        semester_id = request.args.get('semester_id', type=int)
+
+        # Same filters as /subjects/analytics
+        match_filter = build_analytics_filter(db, year, semester_id)
+        if match_filter is None:
+            match_filter = {"semester_id": {"$in": []}}
+
+        cursor = db.class_averages.aggregate(
+            build_analytics_pipeline(match_filter),
+            batchSize=EXPORT_BATCH_SIZE,
+            allowDiskUse=True
+        )
+        return export_response(cursor, fmt, "class_averages", CLASS_AVERAGE_FIELDS)
+
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
@@ -0,0 +1,43 @@
+import time
+from flask import Blueprint, jsonify, Response
+from db.mongodb import get_db
+from utils.metrics import registry, render_text
+
+monitoring_bp = Blueprint('monitoring_bp', __name__)
+
+# Seconds a health probe may spend selecting a server and pinging it
+HEALTH_TIMEOUT = 2
+
+@monitoring_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_text(registry.collect()), mimetype='text/plain; version=0.0.4')
+
+@monitoring_bp.route('/health', methods=['GET'])
+def health():
+    import pymongo
+
+    db = get_db()
+    client = db.client
+
+    try:
+        start = time.perf_counter()
+        # Bounds server selection too, so a dead database fails fast
+        with pymongo.timeout(HEALTH_TIMEOUT):
+            db.command('ping')
+        latency_ms = round((time.perf_counter() - start) * 1000, 2)
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "database": {"ok": False, "error": str(e)}
+        }), 503
+
+    pool_options = client.options.pool_options
+    return jsonify({
+        "status": "ok",
+        "database": {"ok": True, "ping_ms": latency_ms},
+        "pool": {
+            "readable_server": client.topology_description.has_readable_server(),
+            "max_pool_size": pool_options.max_pool_size,
+            "min_pool_size": pool_options.min_pool_size
+        }
+    })
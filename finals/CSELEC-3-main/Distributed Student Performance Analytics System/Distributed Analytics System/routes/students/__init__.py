@@ -4,4 +4,4 @@ from flask import Blueprint
 student_bp = Blueprint('student_bp', __name__)
 
 # Import routes after blueprint creation
-from . import performance, subjects, at_risk
\ No newline at end of file
+from . import performance, subjects, at_risk, timeline, rankings, search
\ No newline at end of file
@@ -3,6 +3,67 @@ from db.mongodb import get_db
 from . import student_bp
 from cache_config import cache
 
+def build_at_risk_pipeline(semester_id=None, search_term=''):
+    """Build the at-risk aggregation shared by the paged and export endpoints"""
+    # Base match condition for at-risk students (any grade < 80)
+    match_conditions = {
+        "Grades": {"$elemMatch": {"$lt": 80}}
+    }
+
+    # Filter by semester if provided
+    if semester_id:
+        match_conditions["SemesterID"] = int(semester_id)
+
+    # MongoDB aggregation pipeline
+    pipeline = [
+        {"$match": match_conditions},
+        {"$lookup": {
+            "from": "students",
+            "localField": "StudentID",
+            "foreignField": "_id",
+            "as": "student"
+        }},
+        {"$unwind": "$student"},
+        {"$lookup": {
+            "from": "semesters",
+            "localField": "SemesterID",
+            "foreignField": "_id",
+            "as": "semester"
+        }},
+        {"$unwind": "$semester"},
+    ]
+
+    # Add search filter if search term exists
+    if search_term:
+        pipeline.append({
+            "$match": {
+                "$or": [
+                    {"student.Name": {"$regex": search_term, "$options": "i"}},
+                    {"student.Course": {"$regex": search_term, "$options": "i"}}
+                ]
+            }
+        })
+
+    return pipeline
+
+def build_risk_score_pipeline(semester_id=None, search_term='', min_score=None):
+    """At-risk students ranked by the batch risk score (utils/risk_scores.py), highest first"""
+    match_conditions = {}
+    if semester_id:
+        match_conditions["semester_id"] = int(semester_id)
+    if min_score is not None:
+        match_conditions["score"] = {"$gte": min_score}
+    if search_term:
+        match_conditions["$or"] = [
+            {"name": {"$regex": search_term, "$options": "i"}},
+            {"course": {"$regex": search_term, "$options": "i"}}
+        ]
+
+    return [
+        {"$match": match_conditions},
+        {"$sort": {"score": -1, "student_id": 1}}
+    ]
+
 @student_bp.route('/at_risk', methods=['GET'])
 @cache.cached(timeout=300, query_string=True)
 def get_at_risk_students():
@@ -19,53 +80,34 @@ def get_at_risk_students():
         per_page = min(per_page, 100)
         skip = (page - 1) * per_page
 
-        # Base match condition for at-risk students (any grade < 80)
-        match_conditions = {
-            "Grades": {"$elemMatch": {"$lt": 80}}
-        }
-
-        # Filter by semester if provided
-        if semester_id:
-            match_conditions["SemesterID"] = int(semester_id)
-
-        # MongoDB aggregation pipeline
-        pipeline = [
-            {"$match": match_conditions},
-            {"$lookup": {
-                "from": "students",
-                "localField": "StudentID",
-                "foreignField": "_id",
-                "as": "student"
-            }},
-            {"$unwind": "$student"},
-            {"$lookup": {
-                "from": "semesters",
-                "localField": "SemesterID",
-                "foreignField": "_id",
-                "as": "semester"
-            }},
-            {"$unwind": "$semester"},
-        ]
+        min_score = request.args.get('min_score', type=float)
+
+        if request.args.get('sort') == 'score' or min_score is not None:
+            # Ranked by the stored risk scores; only the page is joined to semesters
+            pipeline = build_risk_score_pipeline(semester_id, search_term, min_score) + [
+                {"$skip": skip},
+                {"$limit": per_page},
+                {"$lookup": {
+                    "from": "semesters",
+                    "localField": "semester_id",
+                    "foreignField": "_id",
+                    "as": "semester"
+                }},
+                {"$unwind": {"path": "$semester", "preserveNullAndEmptyArrays": True}},
+                {"$project": {"_id": 0}}
+            ]
+            results = list(db.risk_scores.aggregate(pipeline))
+        else:
+            pipeline = build_at_risk_pipeline(semester_id, search_term)
+
+            # Pagination
+            pipeline.extend([
+                {"$skip": skip},
+                {"$limit": per_page}
+            ])
 
-        # Add search filter if search term exists
-        if search_term:
-            pipeline.append({
-                "$match": {
-                    "$or": [
-                        {"student.Name": {"$regex": search_term, "$options": "i"}},
-                        {"student.Course": {"$regex": search_term, "$options": "i"}}
-                    ]
-                }
-            })
-
-        # Pagination
-        pipeline.extend([
-            {"$skip": skip},
-            {"$limit": per_page}
-        ])
-
-        # Run the pipeline
-        results = list(db.grades.aggregate(pipeline))
+            # Run the pipeline
+            results = list(db.grades.aggregate(pipeline))
 
         # Fetch all semesters for dropdown
         semesters = list(db.semesters.find({}, {"_id": 1, "Semester": 1, "SchoolYear": 1}))
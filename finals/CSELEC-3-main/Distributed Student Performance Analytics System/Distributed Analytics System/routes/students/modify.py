@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from db.mongodb import get_db
 from utils.gpa_calculator import convert_grade_to_gpa, calculate_weighted_average
 from datetime import datetime
@@ -9,18 +9,29 @@ from utils.class_average_updater import update_class_average_for_subject_semeste
 from routes.students.at_risk import get_at_risk_students
 from routes.students.subjects import get_subjects
 from routes.sy_comprep import school_year_summary
-from utils.email_sender import send_grade_notification
+from utils import entity_cache
+from utils.grade_changes import record_grade_changes
+from utils.analytics_snapshot import analytics
 
 modify_bp = Blueprint('modify', __name__)
 
-def clear_related_caches(student_id, semester_id, subject_code):
-    """Clear all existing caches"""
+def clear_all_caches():
+    """Clear every cached response, then re-warm the most requested pages in the background"""
+    from utils.cache_warmer import cache_warmer
+
     try:
-        # Clear all caches
+        # Other workers' pages: they key by the response version
+        entity_cache.bump_responses(get_db())
         cache.clear()
         print("All caches cleared successfully")
     except Exception as e:
         print(f"Error clearing caches: {e}")
+        return
+    cache_warmer.schedule(current_app._get_current_object())
+
+def clear_related_caches(student_id, semester_id, subject_code):
+    """Clear all existing caches"""
+    clear_all_caches()
 
 @modify_bp.route('/debug/subjects', methods=['GET'])
 def debug_subjects():
@@ -188,6 +199,12 @@ def update_grade():
         if result.modified_count == 0:
             return jsonify({"error": "Failed to update grade"}), 500
 
+        try:
+            record_grade_changes(db, [(student_id, semester_id, subject_code, new_grade)])
+        finally:
+            # The grade is written; a failure below must not leave the old version cached
+            entity_cache.bump_students(db, [(student_id, semester_id)])
+
         # Calculate weighted average using the subject information from the grades data
         total_units = 0
         total_weighted_grade = 0
@@ -211,11 +228,13 @@ def update_grade():
         # Update student averages
         db.student_averages.update_one(
             {
-                "student_id": student_id
+                "student_id": student_id,
+                "semester_id": semester_id
             },
             {
                 "$set": {
                     "weighted_average": weighted_avg,
+                    "total_units": total_units,
                     "updated_at": datetime.now()
                 }
             },
@@ -228,12 +247,14 @@ def update_grade():
         # Update student GPA
         db.student_gpas.update_one(
             {
-                "student_id": student_id
+                "student_id": student_id,
+                "semester_id": semester_id
             },
             {
                 "$set": {
                     "weighted_average": weighted_avg,
                     "gpa": gpa,
+                    "total_units": total_units,
                     "updated_at": datetime.now()
                 }
             },
@@ -243,12 +264,15 @@ def update_grade():
         # Update class averages for the modified subject
         update_class_average_for_subject_semester(subject_code, semester_id)
 
+        analytics.refresh(db)
+
         # Clear all related caches
         clear_related_caches(student_id, semester_id, subject_code)
 
         # After successful grade update, send email if provided
         email_status = None
         if email:
+            from utils.email_sender import send_grade_notification
             success, message = send_grade_notification(email, subject_code, new_grade)
             email_status = {
                 "sent": success,
@@ -302,6 +326,9 @@ def batch_update_grades():
         db = get_db()
         results = []
         errors = []
+        changes = []
+        # Groups whose grades write was sent, whether or not the rest of the group succeeded
+        touched = set()
 
         # Group updates by student and semester for efficient processing
         updates_by_student_semester = {}
@@ -351,6 +378,7 @@ def batch_update_grades():
                         continue
 
                 # Update the grades document
+                touched.add((student_id, semester_id))
                 result = db.grades.update_one(
                     {
                         "StudentID": student_id,
@@ -365,6 +393,10 @@ def batch_update_grades():
                 )
 
                 if result.modified_count > 0:
+                    changes.extend(
+                        (student_id, semester_id, code, grade) for code, grade in subject_updates.items()
+                    )
+
                     # Get subjects information for weighted average calculation
                     subjects = list(db.subjects.find(
                         {"_id": {"$in": grades_doc['SubjectCodes']}},
@@ -386,10 +418,11 @@ def batch_update_grades():
 
                     # Update student averages and GPA
                     db.student_averages.update_one(
-                        {"student_id": student_id},
+                        {"student_id": student_id, "semester_id": semester_id},
                         {
                             "$set": {
                                 "weighted_average": weighted_avg,
+                                "total_units": total_units,
                                 "updated_at": datetime.now()
                             }
                         },
@@ -397,11 +430,12 @@ def batch_update_grades():
                     )
 
                     db.student_gpas.update_one(
-                        {"student_id": student_id},
+                        {"student_id": student_id, "semester_id": semester_id},
                         {
                             "$set": {
                                 "weighted_average": weighted_avg,
                                 "gpa": gpa,
+                                "total_units": total_units,
                                 "updated_at": datetime.now()
                             }
                         },
@@ -414,6 +448,7 @@ def batch_update_grades():
 
                     # Send email notifications
                     email_statuses = {}
+                    from utils.email_sender import send_grade_notification
                     for subject_code, email in email_updates.items():
                         if email:
                             success, message = send_grade_notification(email, subject_code, subject_updates[subject_code])
@@ -438,12 +473,15 @@ def batch_update_grades():
                     "error": str(e)
                 })
 
-        # Clear all caches after batch update
         try:
-            cache.clear()
-            print("All caches cleared successfully")
-        except Exception as e:
-            print(f"Error clearing caches: {e}")
+            record_grade_changes(db, changes)
+        finally:
+            # A group that failed after its write still changed the grades
+            entity_cache.bump_students(db, touched)
+        analytics.refresh(db)
+
+        # Clear all caches after batch update
+        clear_all_caches()
 
         return jsonify({
             "message": "Batch update completed",
@@ -454,3 +492,35 @@ def batch_update_grades():
     except Exception as e:
         print(f"Batch update error: {str(e)}")
         return jsonify({"error": str(e)}), 500
+
+@modify_bp.route('/import/<kind>', methods=['POST'])
+def bulk_import(kind):
+    try:
+        # Loaded on demand so the numpy-backed importer stays off the startup path
+        from utils.bulk_importer import import_upload, IMPORTERS, DEFAULT_CHUNK_SIZE
+
+        if kind not in IMPORTERS:
+            return jsonify({"error": f"Unknown import kind: {kind}"}), 404
+
+        upload = request.files.get('file')
+        if not upload:
+            return jsonify({"error": "Expected a CSV or Parquet file in the 'file' field"}), 400
+
+        chunk_size = request.args.get('chunk_size', default=DEFAULT_CHUNK_SIZE, type=int)
+        defer_indexes = request.args.get('defer_indexes', '').lower() in ('1', 'true', 'yes')
+
+        db = get_db()
+        # The importer bumps the global entity version; the route caches are cleared here
+        stats = import_upload(db, kind, upload, max(chunk_size, 1), defer_indexes)
+        clear_all_caches()
+
+        return jsonify({
+            "message": "Import completed",
+            **stats
+        })
+
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid input: {str(ve)}"}), 400
+    except Exception as e:
+        print(f"Bulk import error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
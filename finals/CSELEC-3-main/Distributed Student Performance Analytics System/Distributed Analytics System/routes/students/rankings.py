@@ -0,0 +1,98 @@
+from flask import jsonify, request
+from db.mongodb import get_db
+from utils.semesters import fetch_all_semesters
+from utils.rankings import rankings
+from utils.grading_scales import get_scale
+
+from . import student_bp
+
+MAX_LEADERBOARD = 100
+
+def _semester_id():
+    """semester_id from the query string, defaulting like /performance/<id>"""
+    semester_id = request.args.get("semester_id", type=int)
+    if semester_id is None:
+        semesters = fetch_all_semesters()
+        semester_id = semesters[0]["id"] if semesters else None
+    return semester_id
+
+@student_bp.route('/<int:student_id>/rank')
+def get_student_rank(student_id):
+    try:
+        scale = get_scale(request.args.get("scale", "ph"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        db = get_db()
+        semester_id = _semester_id()
+        if semester_id is None:
+            return jsonify({"error": "No semester data found"}), 404
+
+        student = db.students.find_one({"_id": student_id}, {"Name": 1, "Course": 1})
+        if not student:
+            return jsonify({"error": "Student not found"}), 404
+
+        position = rankings.student_position(db, student_id, semester_id, student["Course"])
+        if position is None:
+            return jsonify({"error": "No GPA found for this student and semester"}), 404
+
+        return jsonify({
+            "student_id": student_id,
+            "name": student["Name"],
+            "course": student["Course"],
+            "semester_id": semester_id,
+            "gpa": scale.convert_one(position["weighted_average"]),
+            **position
+        })
+
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+@student_bp.route('/leaderboard')
+def get_leaderboard():
+    try:
+        scale = get_scale(request.args.get("scale", "ph"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        course = request.args.get("course", "").strip()
+        if not course:
+            return jsonify({"error": "course is required"}), 400
+        limit = min(max(request.args.get("limit", default=10, type=int), 1), MAX_LEADERBOARD)
+        offset = max(request.args.get("offset", default=0, type=int), 0)
+
+        db = get_db()
+        semester_id = _semester_id()
+        if semester_id is None:
+            return jsonify({"error": "No semester data found"}), 404
+
+        top, cohort_size = rankings.leaderboard(db, semester_id, course, limit, offset)
+        names = {
+            s["_id"]: s["Name"]
+            for s in db.students.find({"_id": {"$in": [student_id for _, student_id, _ in top]}}, {"Name": 1})
+        } if top else {}
+        # The page's GPAs in one vectorized conversion
+        gpas = scale.convert([value for _, _, value in top]).tolist() if top else []
+
+        return jsonify({
+            "course": course,
+            "semester_id": semester_id,
+            "cohort_size": cohort_size,
+            "offset": offset,
+            "limit": limit,
+            "students": [
+                {
+                    "rank": rank,
+                    "student_id": student_id,
+                    "name": names.get(student_id),
+                    "weighted_average": round(value, 2),
+                    "gpa": gpa
+                }
+                for (rank, student_id, value), gpa in zip(top, gpas)
+            ]
+        })
+
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
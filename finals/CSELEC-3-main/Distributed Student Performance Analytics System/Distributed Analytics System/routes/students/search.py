@@ -0,0 +1,26 @@
+from flask import jsonify, request
+from db.mongodb import get_db
+from utils.student_search import student_search
+
+from . import student_bp
+
+MAX_RESULTS = 50
+
+@student_bp.route('/search')
+def search_students():
+    """Autocomplete by name, any later word of the name, or student id prefix"""
+    try:
+        prefix = request.args.get("prefix", "").strip()
+        if not prefix:
+            return jsonify({"error": "prefix is required"}), 400
+        limit = min(max(request.args.get("limit", default=10, type=int), 1), MAX_RESULTS)
+
+        students = student_search.search(get_db(), prefix, limit)
+        return jsonify({
+            "prefix": prefix,
+            "count": len(students),
+            "students": students
+        })
+
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
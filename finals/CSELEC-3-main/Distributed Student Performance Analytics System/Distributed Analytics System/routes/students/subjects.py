@@ -5,6 +5,69 @@ from cache_config import cache
 
 from . import student_bp
 
+def build_subjects_pipeline(student_id):
+    """Build the per-subject grade vs class average aggregation for a student"""
+    return [
+        {"$match": {"StudentID": student_id}},
+        {"$unwind": {"path": "$SubjectCodes", "includeArrayIndex": "idx"}},
+        {"$unwind": {"path": "$Grades", "includeArrayIndex": "gidx"}},
+        {"$match": {"$expr": {"$eq": ["$idx", "$gidx"]}}},
+        {"$lookup": {
+            "from": "subjects",
+            "localField": "SubjectCodes",
+            "foreignField": "_id",
+            "as": "subject"
+        }},
+        {"$unwind": "$subject"},
+        {"$group": {
+            "_id": "$SubjectCodes",
+            "student_grade": {"$avg": "$Grades"},
+            "description": {"$first": "$subject.Description"},
+            "units": {"$first": "$subject.Units"}
+        }},
+        {"$lookup": {
+            "from": "class_averages",
+            "let": {"subject_code": "$_id"},
+            "pipeline": [
+                {"$match": {
+                    "$expr": {"$eq": ["$subject_code", "$$subject_code"]}
+                }},
+                {"$group": {
+                    "_id": None,
+                    "class_avg": {"$avg": "$average_grade"}
+                }}
+            ],
+            "as": "class_avg_data"
+        }},
+        {"$project": {
+            "subject_code": "$_id",
+            "description": 1,
+            "units": 1,
+            "student_grade": {"$round": ["$student_grade", 2]},
+            "class_avg": {
+                "$round": [
+                    {"$ifNull": [
+                        {"$arrayElemAt": ["$class_avg_data.class_avg", 0]},
+                        0
+                    ]},
+                    2
+                ]
+            },
+            "difference": {
+                "$round": [
+                    {"$subtract": [
+                        "$student_grade",
+                        {"$ifNull": [
+                            {"$arrayElemAt": ["$class_avg_data.class_avg", 0]},
+                            0
+                        ]}
+                    ]},
+                    2
+                ]
+            }
+        }}
+    ]
+
 @student_bp.route('/subjects/<int:student_id>')
 @cache.cached(timeout=300, query_string=True)
 def get_subjects(student_id):
@@ -12,67 +75,7 @@ def get_subjects(student_id):
         db = get_db()
         
         # Optimized pipeline to get all required data in a single query
-        pipeline = [
-            {"$match": {"StudentID": student_id}},
-            {"$unwind": {"path": "$SubjectCodes", "includeArrayIndex": "idx"}},
-            {"$unwind": {"path": "$Grades", "includeArrayIndex": "gidx"}},
-            {"$match": {"$expr": {"$eq": ["$idx", "$gidx"]}}},
-            {"$lookup": {
-                "from": "subjects",
-                "localField": "SubjectCodes",
-                "foreignField": "_id",
-                "as": "subject"
-            }},
-            {"$unwind": "$subject"},
-            {"$group": {
-                "_id": "$SubjectCodes",
-                "student_grade": {"$avg": "$Grades"},
-                "description": {"$first": "$subject.Description"},
-                "units": {"$first": "$subject.Units"}
-            }},
-            {"$lookup": {
-                "from": "class_averages",
-                "let": {"subject_code": "$_id"},
-                "pipeline": [
-                    {"$match": {
-                        "$expr": {"$eq": ["$subject_code", "$$subject_code"]}
-                    }},
-                    {"$group": {
-                        "_id": None,
-                        "class_avg": {"$avg": "$average_grade"}
-                    }}
-                ],
-                "as": "class_avg_data"
-            }},
-            {"$project": {
-                "subject_code": "$_id",
-                "description": 1,
-                "units": 1,
-                "student_grade": {"$round": ["$student_grade", 2]},
-                "class_avg": {
-                    "$round": [
-                        {"$ifNull": [
-                            {"$arrayElemAt": ["$class_avg_data.class_avg", 0]},
-                            0
-                        ]},
-                        2
-                    ]
-                },
-                "difference": {
-                    "$round": [
-                        {"$subtract": [
-                            "$student_grade",
-                            {"$ifNull": [
-                                {"$arrayElemAt": ["$class_avg_data.class_avg", 0]},
-                                0
-                            ]}
-                        ]},
-                        2
-                    ]
-                }
-            }}
-        ]
-        
+        pipeline = build_subjects_pipeline(student_id)
         results = list(db.grades.aggregate(pipeline))
         return format_response(data=results)
         
@@ -0,0 +1,110 @@
+from flask import jsonify
+from db.mongodb import get_db
+from utils import entity_cache
+from utils.grading_scales import PH_SCALE
+import traceback
+
+from . import student_bp
+
+def build_timeline_pipeline(student_id):
+    """Per-semester weighted average and GPA with running cumulative values, oldest semester first"""
+    running = {"documents": ["unbounded", "current"]}
+    return [
+        {"$match": {"StudentID": student_id}},
+        # Pair each subject code with its grade
+        {"$project": {
+            "SemesterID": 1,
+            "pairs": {"$zip": {"inputs": ["$SubjectCodes", "$Grades"]}}
+        }},
+        {"$unwind": "$pairs"},
+        {"$project": {
+            "SemesterID": 1,
+            "subject_code": {"$arrayElemAt": ["$pairs", 0]},
+            "grade": {"$arrayElemAt": ["$pairs", 1]}
+        }},
+        {"$lookup": {
+            "from": "subjects",
+            "localField": "subject_code",
+            "foreignField": "_id",
+            "as": "subject"
+        }},
+        {"$unwind": "$subject"},
+        {"$group": {
+            "_id": "$SemesterID",
+            "weighted_sum": {"$sum": {"$multiply": ["$grade", "$subject.Units"]}},
+            "total_units": {"$sum": "$subject.Units"},
+            "subjects": {"$sum": 1}
+        }},
+        {"$lookup": {
+            "from": "semesters",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "semester"
+        }},
+        {"$unwind": {"path": "$semester", "preserveNullAndEmptyArrays": True}},
+        {"$set": {
+            "weighted_average": {"$cond": [
+                {"$gt": ["$total_units", 0]},
+                {"$divide": ["$weighted_sum", "$total_units"]},
+                0
+            ]}
+        }},
+        {"$set": {"gpa": PH_SCALE.switch("$weighted_average")}},
+        {"$setWindowFields": {
+            "sortBy": {"semester.SchoolYear": 1, "_id": 1},
+            "output": {
+                "cumulative_weighted_sum": {"$sum": "$weighted_sum", "window": running},
+                "cumulative_units": {"$sum": "$total_units", "window": running},
+                "cumulative_gpa_points": {"$sum": {"$multiply": ["$gpa", "$total_units"]}, "window": running}
+            }
+        }},
+        {"$project": {
+            "_id": 0,
+            "semester_id": "$_id",
+            "semester_name": "$semester.Semester",
+            "school_year": "$semester.SchoolYear",
+            "subjects": 1,
+            "total_units": 1,
+            "weighted_average": {"$round": ["$weighted_average", 2]},
+            "gpa": 1,
+            "cumulative_units": 1,
+            "cumulative_weighted_average": {"$cond": [
+                {"$gt": ["$cumulative_units", 0]},
+                {"$round": [{"$divide": ["$cumulative_weighted_sum", "$cumulative_units"]}, 2]},
+                0
+            ]},
+            # Term GPAs weighted by the units behind them
+            "cumulative_gpa": {"$cond": [
+                {"$gt": ["$cumulative_units", 0]},
+                {"$round": [{"$divide": ["$cumulative_gpa_points", "$cumulative_units"]}, 2]},
+                0
+            ]}
+        }},
+        {"$sort": {"school_year": 1, "semester_id": 1}}
+    ]
+
+@student_bp.route('/<int:student_id>/timeline')
+def get_timeline(student_id):
+    try:
+        db = get_db()
+
+        # Computed in one aggregation and cached until the student's grades change
+        timeline = entity_cache.get_timeline(db, student_id)
+        if not timeline["student"]:
+            return jsonify({"error": "Student not found"}), 404
+
+        semesters = timeline["semesters"]
+        return jsonify({
+            "student_id": student_id,
+            "name": timeline["student"]["name"],
+            "course": timeline["student"]["course"],
+            "semesters": semesters,
+            "cumulative_units": semesters[-1]["cumulative_units"] if semesters else 0,
+            "cumulative_weighted_average": semesters[-1]["cumulative_weighted_average"] if semesters else None,
+            "cumulative_gpa": semesters[-1]["cumulative_gpa"] if semesters else None
+        })
+
+    except Exception as e:
+        print(f"Error in get_timeline: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
@@ -4,4 +4,4 @@ from flask import Blueprint
 subject_bp = Blueprint('subject_bp', __name__)  # Changed name for clarity
 
 # These imports MUST come after blueprint creation
-from . import analytics
\ No newline at end of file
+from . import analytics, distribution
\ No newline at end of file
@@ -1,8 +1,84 @@
 from flask import Blueprint, jsonify, request
 from db.mongodb import get_db
 from cache_config import cache
+from utils.analytics_snapshot import analytics
 from . import subject_bp
 
+def build_analytics_filter(db, year=None, semester_id=None):
+    """Build the class_averages filter for a semester or school year.
+
+    Returns None when the school year has no semesters.
+    """
+    match_filter = {}
+
+    # Optimize semester filtering
+    if semester_id:
+        match_filter['semester_id'] = semester_id
+    elif year:
+        # Get semester IDs for the year in a single query
+        semester_ids = [s["_id"] for s in db.semesters.find(
+            {"SchoolYear": year},
+            {"_id": 1}
+        )]
+        if not semester_ids:
+            return None
+        match_filter['semester_id'] = {"$in": semester_ids}
+
+    return match_filter
+
+def build_analytics_pipeline(match_filter):
+    """Build the subject analytics aggregation (without pagination)"""
+    return [
+        {"$match": match_filter},
+        {"$lookup": {
+            "from": "subjects",
+            "localField": "subject_code",
+            "foreignField": "_id",
+            "as": "subject_info"
+        }},
+        {"$unwind": "$subject_info"},
+        {"$project": {
+            "_id": 0,
+            "subject_code": 1,
+            "subject_description": "$subject_info.Description",
+            "semester_id": 1,
+            "average_grade": {"$round": ["$average_grade", 2]},
+            "passing_rate": {"$round": ["$passing_rate", 2]},
+            "at_risk_rate": {"$round": ["$at_risk_rate", 2]},
+            "top_grade": 1
+        }},
+        {"$sort": {"subject_code": 1}}
+    ]
+
+def snapshot_analytics(snapshot, page, per_page, year=None, semester_id=None):
+    """The /subjects/analytics response computed from the in-memory grades snapshot"""
+    if semester_id:
+        codes = snapshot.semester_codes({semester_id})
+    else:
+        codes = snapshot.semester_codes(school_year=year)
+        if year and not codes:
+            return {"page": page, "per_page": per_page, "total_subjects": 0, "subjects": [], "semesters": []}
+
+    subjects = snapshot.class_stats(codes) if codes else []
+    skip = (page - 1) * per_page
+
+    # Semesters with a semesters document, newest school year first
+    known = [code for code in range(len(snapshot.semester_ids)) if snapshot.semester_names[code] is not None]
+    known.sort(key=lambda code: (-snapshot.school_years[code], snapshot.semester_names[code]))
+    return {
+        "page": page,
+        "per_page": per_page,
+        "total_subjects": len(subjects),
+        "subjects": subjects[skip:skip + per_page],
+        "semesters": [
+            {
+                "id": int(snapshot.semester_ids[code]),
+                "label": f"{snapshot.semester_names[code]} {snapshot.school_years[code]}"
+            }
+            for code in known
+        ]
+    }
+
 @subject_bp.route('/analytics', methods=['GET'])
 @cache.cached(timeout=300, query_string=True)
 def get_subject_analytics():
@@ -15,49 +91,22 @@ def get_subject_analytics():
         semester_id = request.args.get('semester_id', type=int)
 
         skip = (page - 1) * per_page
-        match_filter = {}
-
-        # Optimize semester filtering
-        if semester_id:
-            match_filter['semester_id'] = semester_id
-        elif year:
-            # Get semester IDs for the year in a single query
-            semester_ids = [s["_id"] for s in db.semesters.find(
-                {"SchoolYear": year},
-                {"_id": 1}
-            )]
-            if semester_ids:
-                match_filter['semester_id'] = {"$in": semester_ids}
-            else:
-                return jsonify({
-                    "page": page,
-                    "per_page": per_page,
-                    "total_subjects": 0,
-                    "subjects": [],
-                    "semesters": []
-                })
-
-        # Optimized pipeline for subject analytics
-        pipeline = [
-            {"$match": match_filter},
-            {"$lookup": {
-                "from": "subjects",
-                "localField": "subject_code",
-                "foreignField": "_id",
-                "as": "subject_info"
-            }},
-            {"$unwind": "$subject_info"},
-            {"$project": {
-                "_id": 0,
-                "subject_code": 1,
-                "subject_description": "$subject_info.Description",
-                "semester_id": 1,
-                "average_grade": {"$round": ["$average_grade", 2]},
-                "passing_rate": {"$round": ["$passing_rate", 2]},
-                "at_risk_rate": {"$round": ["$at_risk_rate", 2]},
-                "top_grade": 1
-            }},
-            {"$sort": {"subject_code": 1}},
+
+        snapshot = analytics.get(db)
+        if snapshot is not None:
+            return jsonify(snapshot_analytics(snapshot, page, per_page, year, semester_id))
+
+        match_filter = build_analytics_filter(db, year, semester_id)
+        if match_filter is None:
+            return jsonify({
+                "page": page,
+                "per_page": per_page,
+                "total_subjects": 0,
+                "subjects": [],
+                "semesters": []
+            })
+
+        pipeline = build_analytics_pipeline(match_filter) + [
             {"$skip": skip},
             {"$limit": per_page}
         ]
@@ -0,0 +1,54 @@
+from flask import jsonify, request
+from db.mongodb import get_db
+from cache_config import cache
+from utils.analytics_snapshot import analytics
+from utils.grade_distribution import bin_edges, bin_labels, build_distribution_pipeline
+from .analytics import build_analytics_filter
+from . import subject_bp
+
+@subject_bp.route('/distribution', methods=['GET'])
+@cache.cached(timeout=300, query_string=True)
+def get_grade_distribution():
+    """Grade histograms of every subject in a semester or school year, in one response"""
+    try:
+        edges = bin_edges(request.args.get('bins'))
+    except ValueError as e:
+        return jsonify({"error": "Invalid bins", "message": str(e)}), 400
+
+    try:
+        db = get_db()
+        year = request.args.get('year', type=int)
+        semester_id = request.args.get('semester_id', type=int)
+        response = {"bins": bin_labels(edges), "subjects": []}
+
+        snapshot = analytics.get(db)
+        if snapshot is not None:
+            codes = snapshot.semester_codes({semester_id}) if semester_id else snapshot.semester_codes(school_year=year)
+            if codes:
+                response["subjects"] = snapshot.distributions(codes, edges)
+            return jsonify(response)
+
+        match_filter = build_analytics_filter(db, year, semester_id)
+        if match_filter is None:
+            return jsonify(response)
+
+        if edges == bin_edges():
+            # Stored with the class averages
+            response["subjects"] = list(db.class_averages.find(
+                match_filter,
+                {"_id": 0, "subject_code": 1, "semester_id": 1, "subject_description": 1, "grade_distribution": 1}
+            ).sort([("subject_code", 1), ("semester_id", 1)]))
+        else:
+            # Other bins are counted from the grades in one aggregation
+            semester_ids = match_filter.get("semester_id")
+            if isinstance(semester_ids, dict):
+                semester_ids = semester_ids["$in"]
+            elif semester_ids is not None:
+                semester_ids = [semester_ids]
+            response["subjects"] = list(db.grades.aggregate(
+                build_distribution_pipeline(edges, semester_ids, into=None), allowDiskUse=True))
+
+        return jsonify(response)
+
+    except Exception as e:
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from db.mongodb import get_db
 from cache_config import cache
+from utils.analytics_snapshot import analytics
 
 genrep_bp = Blueprint('genrep_bp', __name__)
 
@@ -29,14 +30,18 @@ def school_year_summary():
         if not selected_semester_ids:
             return jsonify({"error": "No semesters found for that school year.", "school_years": all_school_years}), 404
 
-        # Get all metrics for selected semesters in one query
-        metrics_data = {
-            m['semester_id']: m 
-            for m in db.semester_metrics.find(
-                {"semester_id": {"$in": selected_semester_ids}},
-                {"_id": 0, "semester_id": 1, "average_grade": 1, "passing_rate": 1, "top_grade": 1, "at_risk_rate": 1}
-            )
-        }
+        # Computed in memory when the analytics snapshot is current, else one query
+        snapshot = analytics.get(db)
+        if snapshot is not None:
+            metrics_data = snapshot.semester_stats(snapshot.semester_codes(set(selected_semester_ids)))
+        else:
+            metrics_data = {
+                m['semester_id']: m
+                for m in db.semester_metrics.find(
+                    {"semester_id": {"$in": selected_semester_ids}},
+                    {"_id": 0, "semester_id": 1, "average_grade": 1, "passing_rate": 1, "top_grade": 1, "at_risk_rate": 1}
+                )
+            }
 
         semester_metrics_list = []
         for sem in semesters:
@@ -0,0 +1,35 @@
+"""Time a cold start of the app, phase by phase, without touching MongoDB.
+
+    python startup_report.py
+
+Kept outside the utils package: importing anything from utils loads Flask,
+which would hide the cost of importing it.
+"""
+import sys
+import time
+
+# Modules that should only load on first use, not at startup
+LAZY_MODULES = ("pymongo", "numpy", "multiprocessing", "smtplib")
+
+def main():
+    imports = []
+    for module in ("flask", "flask_cors", "flask_caching", "dotenv", "app_factory"):
+        started = time.perf_counter()
+        __import__(module)
+        imports.append((f"import {module}", (time.perf_counter() - started) * 1000))
+
+    from utils.startup import StartupReport
+    import app_factory
+
+    report = StartupReport()
+    report.phases.extend(imports)
+    app = app_factory.create_app()
+    report.extend(app.extensions["startup_report"], prefix="create_app: ")
+
+    print(report.format())
+    loaded = [name for name in LAZY_MODULES if name in sys.modules]
+    print(f"Loaded at startup: {', '.join(loaded) if loaded else 'none of ' + ', '.join(LAZY_MODULES)}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+# utils/admission.py
+"""Admission control: per-endpoint and per-cost-class concurrency limits.
+
+Every routed request is given a cost class. Heavy requests (at-risk
+search, the performance listing, exports, imports and batch updates) may
+only run ADMISSION_HEAVY_LIMIT at a time per worker; standard requests
+share a larger limit, and some endpoints have a tighter limit of their
+own. A request over a limit waits in a bounded queue until its deadline,
+and is answered 503 with Retry-After when the queue is full or the
+deadline passes, so a spike of expensive requests is shed instead of
+starving the cheap ones. Requests whose response is already cached skip
+admission entirely: serving them costs next to nothing.
+"""
+import math
+import os
+import threading
+import time
+from flask import current_app, jsonify, request
+from utils.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_WAIT, ADMISSION_REJECTED, ADMISSION_BYPASSED
+
+# Never limited: probes and scrapes must answer when the worker is busy
+EXEMPT_ENDPOINTS = {"/health", "/metrics", "/", "/admin/admission"}
+
+# Cost class of each route rule; anything else is "standard"
+HEAVY_ENDPOINTS = {
+    "/students/performance/all",
+    "/export/at_risk",
+    "/export/student_gpas",
+    "/export/class_averages",
+    "/students/modify/batch-update-grades",
+    "/students/modify/import/<kind>",
+    "/admin/slow-ops",
+    "/admin/latency-trend",
+    "/admin/slow-paths"
+}
+
+# Tighter limits for single endpoints, on top of their class limit
+ENDPOINT_LIMITS = {
+    "/students/modify/import/<kind>": 1,
+    "/export/at_risk": 2,
+    "/export/student_gpas": 2,
+    "/export/class_averages": 2
+}
+
+COST_CLASSES = {
+    "heavy": {
+        "limit": int(os.getenv('ADMISSION_HEAVY_LIMIT', 2)),
+        "queue": int(os.getenv('ADMISSION_HEAVY_QUEUE', 8)),
+        "timeout": float(os.getenv('ADMISSION_HEAVY_TIMEOUT', 5))
+    },
+    "standard": {
+        "limit": int(os.getenv('ADMISSION_STANDARD_LIMIT', 16)),
+        "queue": int(os.getenv('ADMISSION_STANDARD_QUEUE', 64)),
+        "timeout": float(os.getenv('ADMISSION_STANDARD_TIMEOUT', 10))
+    }
+}
+
+MAX_RETRY_AFTER = 30
+
+def cost_class(rule, args):
+    if rule in HEAVY_ENDPOINTS:
+        return "heavy"
+    # A search term defeats the per-page cache and scans every at-risk row
+    if rule == "/students/at_risk" and args.get('search', '').strip():
+        return "heavy"
+    return "standard"
+
+class Limiter:
+    """Counting semaphore with a bounded wait queue and a service-time estimate"""
+
+    def __init__(self, name, limit, queue_size):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        # Moving average of seconds a request holds a slot, for Retry-After
+        self.service_time = 0.5
+
+    def acquire(self, deadline):
+        """True once a slot is held; a reason string if the request is shed"""
+        with self.condition:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue_size:
+                return "queue_full"
+            self.waiting += 1
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return "timeout"
+                    self.condition.wait(remaining)
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, held_seconds=None):
+        """Free a slot; pass how long it was held to update the service-time estimate"""
+        with self.condition:
+            self.active -= 1
+            if held_seconds is not None:
+                self.service_time = 0.8 * self.service_time + 0.2 * held_seconds
+            self.condition.notify()
+
+    def retry_after(self):
+        """Seconds until the queue ahead of a new request should have drained"""
+        estimate = (self.waiting + 1) * self.service_time / max(self.limit, 1)
+        return min(max(math.ceil(estimate), 1), MAX_RETRY_AFTER)
+
+class AdmissionController:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.limiters = {}
+        self.enabled = os.getenv('ADMISSION_CONTROL', '1') != '0'
+
+    def after_fork(self):
+        self.lock = threading.Lock()
+        self.limiters = {}
+
+    def _limiter(self, name, limit, queue_size):
+        with self.lock:
+            limiter = self.limiters.get(name)
+            if limiter is None:
+                limiter = self.limiters[name] = Limiter(name, limit, queue_size)
+            return limiter
+
+    def _is_cached(self):
+        """True if the response cache already holds this request's response"""
+        from cache_config import cache
+
+        view = current_app.view_functions.get(request.endpoint)
+        make_cache_key = getattr(view, 'make_cache_key', None)
+        if make_cache_key is None:
+            return False
+        try:
+            return cache.cache.has(make_cache_key(**(request.view_args or {})))
+        except Exception:
+            return False
+
+    def admit(self):
+        """Hold slots for the current request; returns a 503 response if it is shed"""
+        rule = request.url_rule.rule if request.url_rule else None
+        if not self.enabled or rule is None or rule in EXEMPT_ENDPOINTS:
+            return None
+        cls = cost_class(rule, request.args)
+        if self._is_cached():
+            ADMISSION_BYPASSED.inc(cost_class=cls)
+            return None
+
+        settings = COST_CLASSES[cls]
+        limiters = []
+        if rule in ENDPOINT_LIMITS:
+            limiters.append(self._limiter(rule, ENDPOINT_LIMITS[rule], settings["queue"]))
+        limiters.append(self._limiter(cls, settings["limit"], settings["queue"]))
+
+        started = time.monotonic()
+        deadline = started + settings["timeout"]
+        held = []
+        ADMISSION_QUEUED.inc(cost_class=cls)
+        try:
+            for limiter in limiters:
+                result = limiter.acquire(deadline)
+                if result is not True:
+                    for acquired in held:
+                        acquired.release()
+                    ADMISSION_REJECTED.inc(cost_class=cls, reason=result)
+                    return self._shed(limiter)
+                held.append(limiter)
+        finally:
+            ADMISSION_QUEUED.dec(cost_class=cls)
+
+        ADMISSION_WAIT.observe(time.monotonic() - started, cost_class=cls)
+        ADMISSION_ACTIVE.inc(cost_class=cls)
+        request.environ['admission'] = (cls, held, time.monotonic())
+        return None
+
+    def release(self):
+        admitted = request.environ.pop('admission', None)
+        if admitted is None:
+            return
+        cls, held, admitted_at = admitted
+        held_seconds = time.monotonic() - admitted_at
+        for limiter in held:
+            limiter.release(held_seconds)
+        ADMISSION_ACTIVE.dec(cost_class=cls)
+
+    def _shed(self, limiter):
+        retry_after = limiter.retry_after()
+        response = jsonify({
+            "error": "Server busy",
+            "message": f"Too many concurrent {limiter.name} requests; retry in {retry_after}s",
+            "retry_after": retry_after
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    def status(self):
+        with self.lock:
+            limiters = list(self.limiters.values())
+        return {
+            limiter.name: {
+                "limit": limiter.limit,
+                "active": limiter.active,
+                "waiting": limiter.waiting,
+                "queue_size": limiter.queue_size,
+                "service_time_ms": round(limiter.service_time * 1000, 1)
+            }
+            for limiter in limiters
+        }
+
+admission = AdmissionController()
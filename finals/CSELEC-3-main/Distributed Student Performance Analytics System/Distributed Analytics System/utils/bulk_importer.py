@@ -0,0 +1,356 @@
+# utils/bulk_importer.py
+"""Chunked bulk import of students, subjects and grades from CSV or Parquet.
+
+Run from the application directory:
+
+    python -m utils.bulk_importer grades enrollments.csv --defer-indexes
+"""
+import argparse
+import csv
+import io
+import os
+import time
+from itertools import islice
+
+import numpy as np
+from pymongo import UpdateOne, IndexModel
+from db.schema import COLLECTIONS
+from utils.entity_cache import bump_all
+from utils.grade_changes import record_reload
+
+DEFAULT_CHUNK_SIZE = 10000
+MAX_REPORTED_REJECTS = 100
+
+# Filters each kind upserts on; the matching index is kept during a deferred load
+UPSERT_KEYS = {
+    "students": [("_id", 1)],
+    "subjects": [("_id", 1)],
+    "grades": [("StudentID", 1), ("SemesterID", 1)]
+}
+
+def _schema_rule(collection, field):
+    """Look up a property rule from the validators in db/schema.py"""
+    return COLLECTIONS[collection]["validator"]["$jsonSchema"]["properties"][field]
+
+GRADE_RULE = _schema_rule("grades", "grades")["items"]
+UNITS_RULE = _schema_rule("subjects", "units")
+NAME_RULE = _schema_rule("students", "name")
+COURSE_RULE = _schema_rule("students", "course")
+DESCRIPTION_RULE = _schema_rule("subjects", "description")
+
+def read_csv_chunks(stream, chunk_size):
+    """Yield lists of row dicts from a CSV text stream"""
+    reader = csv.DictReader(stream)
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        yield rows
+
+def read_parquet_chunks(path, chunk_size):
+    """Yield lists of row dicts from a Parquet file"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet import requires the pyarrow package")
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+def _column(rows, *names):
+    """Return the first present column among names as a list"""
+    for name in names:
+        if name in rows[0]:
+            return [row.get(name) for row in rows]
+    return [None] * len(rows)
+
+def _to_numbers(values):
+    """Parse a column to float64, using NaN for unparseable cells"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        parsed = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                parsed[i] = float(value)
+            except (ValueError, TypeError):
+                parsed[i] = np.nan
+        return parsed
+
+def _integer_mask(numbers, minimum=None, maximum=None):
+    """Vectorized check that values are whole numbers within bounds"""
+    # isfinite: an "inf" cell would pass a NaN check and overflow int()
+    valid = np.isfinite(numbers)
+    valid &= np.floor(np.where(valid, numbers, 0)) == np.where(valid, numbers, 0)
+    if minimum is not None:
+        valid &= np.where(valid, numbers, minimum) >= minimum
+    if maximum is not None:
+        valid &= np.where(valid, numbers, maximum) <= maximum
+    return valid
+
+def _string_mask(values, rule):
+    """Vectorized minLength check for a string column"""
+    stripped = np.char.strip(np.asarray([v if v is not None else "" for v in values], dtype=str))
+    return np.char.str_len(stripped) >= rule.get("minLength", 0), stripped
+
+def _collect_rejects(start_row, checks):
+    """Build per-row reject reasons from (mask, message) pairs"""
+    valid = np.logical_and.reduce([mask for mask, _ in checks])
+    rejects = []
+    for i in np.flatnonzero(~valid):
+        rejects.append({
+            "row": start_row + int(i),
+            "errors": [message for mask, message in checks if not mask[i]]
+        })
+    return valid, rejects
+
+def prepare_students(rows, start_row):
+    """Validate a chunk of student rows and build upserts"""
+    ids = _to_numbers(_column(rows, "StudentID", "student_id", "id"))
+    names = _column(rows, "Name", "name")
+    if names[0] is None and "FirstName" in rows[0]:
+        # synthetic_student_data.csv shape
+        names = [f"{row.get('FirstName', '')} {row.get('LastName', '')}" for row in rows]
+    name_ok, names = _string_mask(names, NAME_RULE)
+    course_ok, courses = _string_mask(_column(rows, "Course", "course", "Department"), COURSE_RULE)
+
+    valid, rejects = _collect_rejects(start_row, [
+        (_integer_mask(ids), "StudentID must be an integer"),
+        (name_ok, "Name is required"),
+        (course_ok, "Course is required")
+    ])
+
+    year_levels = _to_numbers(_column(rows, "YearLevel", "year_level"))
+    operations = []
+    for i in np.flatnonzero(valid):
+        fields = {"Name": str(names[i]), "Course": str(courses[i])}
+        if np.isfinite(year_levels[i]):
+            fields["YearLevel"] = int(year_levels[i])
+        operations.append(UpdateOne({"_id": int(ids[i])}, {"$set": fields}, upsert=True))
+    return operations, rejects
+
+def prepare_subjects(rows, start_row):
+    """Validate a chunk of subject rows and build upserts"""
+    codes = _column(rows, "SubjectCode", "subject_code", "id")
+    code_ok, codes = _string_mask(codes, {"minLength": 1})
+    description_ok, descriptions = _string_mask(_column(rows, "Description", "description"), DESCRIPTION_RULE)
+    units = _to_numbers(_column(rows, "Units", "units"))
+
+    valid, rejects = _collect_rejects(start_row, [
+        (code_ok, "SubjectCode is required"),
+        (description_ok, "Description is required"),
+        (_integer_mask(units, UNITS_RULE.get("minimum"), UNITS_RULE.get("maximum")),
+         f"Units must be an integer between {UNITS_RULE.get('minimum')} and {UNITS_RULE.get('maximum')}")
+    ])
+
+    operations = [
+        UpdateOne(
+            {"_id": str(codes[i])},
+            {"$set": {"Description": str(descriptions[i]), "Units": int(units[i])}},
+            upsert=True
+        )
+        for i in np.flatnonzero(valid)
+    ]
+    return operations, rejects
+
+# Constant stages of the grades merge; only the incoming values differ per document
+_EXISTING_CODES = {"$ifNull": ["$SubjectCodes", []]}
+_MERGE_GRADES_STAGES = [
+    {"$set": {
+        "_keep": {"$filter": {
+            "input": {"$range": [0, {"$size": _EXISTING_CODES}]},
+            "as": "i",
+            "cond": {"$not": [{"$in": [{"$arrayElemAt": [_EXISTING_CODES, "$$i"]}, "$_in.codes"]}]}
+        }}
+    }},
+    {"$set": {
+        "SubjectCodes": {"$concatArrays": [
+            {"$map": {"input": "$_keep", "as": "i", "in": {"$arrayElemAt": ["$SubjectCodes", "$$i"]}}},
+            "$_in.codes"
+        ]},
+        "Grades": {"$concatArrays": [
+            {"$map": {"input": "$_keep", "as": "i", "in": {"$arrayElemAt": ["$Grades", "$$i"]}}},
+            "$_in.grades"
+        ]}
+    }},
+    {"$unset": ["_keep", "_in"]}
+]
+
+def _merge_grades_update(subject_codes, grades):
+    """Pipeline update that replaces or appends grades in the parallel arrays"""
+    incoming = {"$set": {"_in": {"$literal": {"codes": subject_codes, "grades": grades}}}}
+    return [incoming] + _MERGE_GRADES_STAGES
+
+def prepare_grades(rows, start_row):
+    """Validate a chunk of enrollment rows and build one upsert per student-semester"""
+    student_ids = _to_numbers(_column(rows, "StudentID", "student_id"))
+    semester_ids = _to_numbers(_column(rows, "SemesterID", "semester_id"))
+    code_ok, codes = _string_mask(_column(rows, "SubjectCode", "subject_code"), {"minLength": 1})
+    grades = _to_numbers(_column(rows, "Grade", "grade"))
+
+    valid, rejects = _collect_rejects(start_row, [
+        (_integer_mask(student_ids), "StudentID must be an integer"),
+        (_integer_mask(semester_ids), "SemesterID must be an integer"),
+        (code_ok, "SubjectCode is required"),
+        (_integer_mask(grades, GRADE_RULE.get("minimum"), GRADE_RULE.get("maximum")),
+         f"Grade must be an integer between {GRADE_RULE.get('minimum')} and {GRADE_RULE.get('maximum')}")
+    ])
+
+    # Group enrollments into one grades document per student and semester
+    grouped = {}
+    for i in np.flatnonzero(valid):
+        key = (int(student_ids[i]), int(semester_ids[i]))
+        grouped.setdefault(key, {})[str(codes[i])] = int(grades[i])
+
+    operations = [
+        UpdateOne(
+            {"StudentID": student_id, "SemesterID": semester_id},
+            _merge_grades_update(list(subjects.keys()), list(subjects.values())),
+            upsert=True
+        )
+        for (student_id, semester_id), subjects in grouped.items()
+    ]
+    return operations, rejects
+
+IMPORTERS = {
+    "students": prepare_students,
+    "subjects": prepare_subjects,
+    "grades": prepare_grades
+}
+
+def suspend_indexes(collection, kind):
+    """Drop secondary indexes for the load, keeping the one upserts rely on"""
+    upsert_keys = UPSERT_KEYS[kind]
+    saved = []
+    has_upsert_index = upsert_keys == [("_id", 1)]
+
+    for name, info in collection.index_information().items():
+        keys = list(info["key"])
+        if name == "_id_":
+            continue
+        if keys[:len(upsert_keys)] == upsert_keys and not has_upsert_index:
+            has_upsert_index = True
+            continue
+        options = {k: v for k, v in info.items() if k not in ("v", "key", "ns")}
+        saved.append(IndexModel(keys, name=name, **options))
+        collection.drop_index(name)
+
+    if not has_upsert_index:
+        collection.create_index(upsert_keys)
+
+    return saved
+
+def restore_indexes(collection, saved):
+    """Rebuild indexes dropped by suspend_indexes"""
+    if saved:
+        collection.create_indexes(saved)
+
+def import_chunks(db, kind, chunks, defer_indexes=False, progress=None):
+    """Validate and upsert row chunks into MongoDB, returning load statistics"""
+    if kind not in IMPORTERS:
+        raise ValueError(f"Unknown import kind: {kind}")
+
+    prepare = IMPORTERS[kind]
+    collection = db[kind]
+    stats = {
+        "kind": kind,
+        "rows": 0,
+        "rejected": 0,
+        "upserted": 0,
+        "modified": 0,
+        "rejects": []
+    }
+
+    started = time.perf_counter()
+    saved_indexes = suspend_indexes(collection, kind) if defer_indexes else []
+    failed = True
+    try:
+        # Row numbers count the CSV header as line 1
+        next_row = 2
+        for rows in chunks:
+            operations, rejects = prepare(rows, next_row)
+            next_row += len(rows)
+
+            if operations:
+                result = collection.bulk_write(operations, ordered=False)
+                stats["upserted"] += result.upserted_count
+                stats["modified"] += result.modified_count
+
+            stats["rows"] += len(rows)
+            stats["rejected"] += len(rejects)
+            room = MAX_REPORTED_REJECTS - len(stats["rejects"])
+            if room > 0:
+                stats["rejects"].extend(rejects[:room])
+
+            if progress:
+                progress(stats, time.perf_counter() - started)
+        failed = False
+    finally:
+        index_started = time.perf_counter()
+        try:
+            restore_indexes(collection, saved_indexes)
+        except Exception as e:
+            print(f"❌ Indexes on {kind} not restored: {e}; recreate them with python -m db.index_sync")
+            # An import error propagates instead of being masked by this one
+            if not failed:
+                raise
+        stats["index_seconds"] = round(time.perf_counter() - index_started, 3)
+
+    if stats["upserted"] or stats["modified"]:
+        # Too many rows to replay one by one; snapshots rebuild instead
+        record_reload(db, f"{kind} import")
+        # Every import path (route and CLI) invalidates the cached entities and the search index
+        bump_all(db)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+def import_file(db, kind, path, chunk_size=DEFAULT_CHUNK_SIZE, defer_indexes=False, progress=None):
+    """Import a CSV or Parquet file from disk"""
+    if path.lower().endswith(".parquet"):
+        return import_chunks(db, kind, read_parquet_chunks(path, chunk_size), defer_indexes, progress)
+
+    with open(path, newline="", encoding="utf-8") as f:
+        return import_chunks(db, kind, read_csv_chunks(f, chunk_size), defer_indexes, progress)
+
+def import_upload(db, kind, upload, chunk_size=DEFAULT_CHUNK_SIZE, defer_indexes=False):
+    """Import an uploaded CSV or Parquet file without reading it all into memory"""
+    if upload.filename and upload.filename.lower().endswith(".parquet"):
+        return import_chunks(db, kind, read_parquet_chunks(upload.stream, chunk_size), defer_indexes)
+
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8", newline="")
+    return import_chunks(db, kind, read_csv_chunks(stream, chunk_size), defer_indexes)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import students, subjects or grades")
+    parser.add_argument("kind", choices=sorted(IMPORTERS))
+    parser.add_argument("path", help="CSV or Parquet file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="drop secondary indexes during the load and rebuild them afterwards")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    def progress(stats, elapsed):
+        rate = stats["rows"] / elapsed if elapsed > 0 else 0
+        print(f"{stats['rows']} rows ({stats['rejected']} rejected) - {rate:,.0f} rows/s", flush=True)
+
+    stats = import_file(db, args.kind, args.path, args.chunk_size, args.defer_indexes, progress)
+
+    for reject in stats["rejects"]:
+        print(f"Row {reject['row']}: {'; '.join(reject['errors'])}")
+    print(f"✅ Imported {stats['rows'] - stats['rejected']} of {stats['rows']} {args.kind} rows "
+          f"in {stats['seconds']}s ({stats['rows_per_second']:,.0f} rows/s, "
+          f"{stats['upserted']} upserted, {stats['modified']} modified)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# utils/cache_warmer.py
+"""Re-fill the response cache with the most requested pages.
+
+The cached routes key their responses by path plus sorted query string,
+which is what request_logs records for every API call. The warmer ranks
+those keys by hits over the last CACHE_WARM_HOURS, tops the list up with
+the pages every dashboard opens first (at-risk page 1 per semester,
+analytics and the /home/ summary per school year, the first pages of
+/performance/all), and renders the top CACHE_WARM_TOP_N through the test
+client. At most CACHE_WARM_CONCURRENCY pages render at once, so live
+requests keep most of the worker's threads and connections.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from utils.warmup import WARMUP_HEADER, WARMUP_TIMEOUT
+
+# Route rules served from the response cache or composed from the entity cache
+CACHED_ENDPOINTS = (
+    "/students/at_risk",
+    "/subjects/analytics",
+    "/subjects/distribution",
+    "/home/",
+    "/students/performance/all",
+    "/students/performance/<int:student_id>",
+    "/students/subjects/<int:student_id>",
+    "/students/<int:student_id>/timeline"
+)
+
+WARM_TOP_N = int(os.getenv('CACHE_WARM_TOP_N', 30))
+WARM_CONCURRENCY = int(os.getenv('CACHE_WARM_CONCURRENCY', 2))
+POPULARITY_HOURS = float(os.getenv('CACHE_WARM_HOURS', 24))
+# Seconds to wait after an invalidation so a burst of writes triggers one warm-up
+WARM_DELAY = float(os.getenv('CACHE_WARM_DELAY', 1))
+PERFORMANCE_ALL_PAGES = 3
+
+def cache_url(path, params):
+    """URL with sorted query params, so equal cache keys give equal URLs"""
+    params = sorted((key, str(value)) for key, value in (params or {}).items())
+    return f"{path}?{urlencode(params)}" if params else path
+
+def popular_urls(db, since, limit):
+    """Cached-page URLs ranked by successful GETs logged since `since`"""
+    pipeline = [
+        {"$match": {
+            "timestamp": {"$gte": since},
+            "meta.endpoint": {"$in": list(CACHED_ENDPOINTS)},
+            "meta.method": "GET",
+            "status_code": 200
+        }},
+        {"$group": {"_id": {"path": "$path", "params": "$query_params"}, "hits": {"$sum": 1}}},
+        {"$sort": {"hits": -1}},
+        # Param order differs between clients; over-fetch before merging equal keys
+        {"$limit": limit * 4}
+    ]
+    hits = {}
+    for row in db.request_logs.aggregate(pipeline, allowDiskUse=True):
+        url = cache_url(row["_id"]["path"], row["_id"].get("params"))
+        hits[url] = hits.get(url, 0) + row["hits"]
+    return sorted(hits, key=hits.get, reverse=True)[:limit]
+
+def default_urls(db):
+    """Landing pages of each dashboard screen, newest semester and year first"""
+    semesters = list(db.semesters.find({}, {"_id": 1, "SchoolYear": 1}).sort("_id", -1))
+    school_years = sorted({s["SchoolYear"] for s in semesters}, reverse=True)
+
+    urls = []
+    for semester in semesters:
+        urls.append(cache_url("/students/at_risk", {"page": 1, "per_page": 10, "semester_id": semester["_id"]}))
+    for year in school_years:
+        urls.append(cache_url("/home/", {"sy": year}))
+        urls.append(cache_url("/subjects/analytics", {"page": 1, "per_page": 10, "year": year}))
+    for page in range(1, PERFORMANCE_ALL_PAGES + 1):
+        urls.append(cache_url("/students/performance/all", {"page": page}))
+    return urls
+
+def warm_urls(db, limit=WARM_TOP_N, hours=POPULARITY_HOURS):
+    """Most requested URLs first, then the default landing pages, `limit` in all"""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    urls = popular_urls(db, since, limit)
+    for url in default_urls(db):
+        if len(urls) >= limit:
+            break
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+def fetch_all(app, urls, concurrency=WARM_CONCURRENCY):
+    """Render `urls` through the test client, `concurrency` at a time; returns pages cached"""
+    import pymongo
+
+    def fetch(url):
+        try:
+            with pymongo.timeout(WARMUP_TIMEOUT), app.test_client() as client:
+                return client.get(url, headers={WARMUP_HEADER: "1"}).status_code == 200
+        except Exception as e:
+            print(f"Failed to warm {url}: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="cache-warmer") as pool:
+        return sum(pool.map(fetch, urls))
+
+class CacheWarmer:
+    """Runs warm-ups on one background thread, coalescing repeated requests"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pending = False
+        self.last_run = None
+
+    def after_fork(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pending = False
+
+    def schedule(self, app):
+        """Warm the cache in the background; called after the cache is cleared"""
+        with self.lock:
+            self.pending = True
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, args=(app,), name="cache-warmer", daemon=True)
+                self.thread.start()
+
+    def _run(self, app):
+        import pymongo
+        from db.mongodb import get_db
+
+        while True:
+            time.sleep(WARM_DELAY)
+            with self.lock:
+                if not self.pending:
+                    self.thread = None
+                    return
+                self.pending = False
+
+            started = time.perf_counter()
+            try:
+                with app.app_context(), pymongo.timeout(WARMUP_TIMEOUT):
+                    urls = warm_urls(get_db())
+                warmed = fetch_all(app, urls)
+                self.last_run = {
+                    "finished": datetime.utcnow(),
+                    "urls": len(urls),
+                    "warmed": warmed,
+                    "seconds": round(time.perf_counter() - started, 2)
+                }
+                print(f"✅ Cache warmed: {warmed}/{len(urls)} pages in {self.last_run['seconds']}s")
+            except Exception as e:
+                print(f"❌ Cache warm-up failed: {e}")
+
+cache_warmer = CacheWarmer()
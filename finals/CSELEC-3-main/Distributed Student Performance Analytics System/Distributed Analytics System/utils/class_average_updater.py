@@ -1,17 +1,39 @@
 # utils/class_average_updater.py
 
 from db.mongodb import get_db
+from utils.entity_cache import bump_all
+from utils.grade_distribution import (
+    bin_edges, histogram, distribution_accumulators, distribution_expression
+)
 
-def update_entire_class_average():
-    db = get_db()
-    pipeline = [
-        {"$unwind": "$Grades"},
+# Grades at or above this pass; below it counts toward the at-risk rate
+PASSING_GRADE = 75
+
+def build_class_average_pipeline(into="class_averages", edges=None):
+    """Per subject and semester averages, rates, top grade and grade histogram merged into `into`"""
+    edges = edges or bin_edges()
+    return [
+        # Pair each subject code with its grade before unwinding
+        {"$project": {
+            "SemesterID": 1,
+            "pairs": {"$zip": {"inputs": ["$SubjectCodes", "$Grades"]}}
+        }},
+        {"$unwind": "$pairs"},
+        {"$project": {
+            "SemesterID": 1,
+            "subject_code": {"$arrayElemAt": ["$pairs", 0]},
+            "grade": {"$arrayElemAt": ["$pairs", 1]}
+        }},
         {"$group": {
             "_id": {
-                "subject_code": {"$arrayElemAt": ["$SubjectCodes", 0]},
+                "subject_code": "$subject_code",
                 "semester_id": "$SemesterID"
             },
-            "average_grade": {"$avg": "$Grades"}
+            "average_grade": {"$avg": "$grade"},
+            "top_grade": {"$max": "$grade"},
+            "passing": {"$sum": {"$cond": [{"$gte": ["$grade", PASSING_GRADE]}, 1, 0]}},
+            "total_students": {"$sum": 1},
+            **distribution_accumulators("$grade", edges)
         }},
         {"$lookup": {
             "from": "subjects",
@@ -24,21 +46,60 @@ def update_entire_class_average():
             "semester_id": "$_id.semester_id",
             "subject_code": "$_id.subject_code",
             "average_grade": 1,
+            "top_grade": 1,
+            "total_students": 1,
+            "passing_rate": {"$multiply": [{"$divide": ["$passing", "$total_students"]}, 100]},
+            "at_risk_rate": {"$multiply": [
+                {"$divide": [{"$subtract": ["$total_students", "$passing"]}, "$total_students"]}, 100
+            ]},
+            "grade_distribution": distribution_expression(edges),
             "subject_description": "$subject_info.Description"
+        }},
+        {"$merge": {
+            "into": into,
+            "on": "_id",
+            "whenMatched": "merge",
+            "whenNotMatched": "insert"
         }}
     ]
 
-    result = db.grades.aggregate(pipeline)
+def update_entire_class_average(db=None):
+    db = db if db is not None else get_db()
+    db.grades.aggregate(build_class_average_pipeline(), allowDiskUse=True)
+    bump_all(db)
+
+def build_semester_metrics_pipeline(into="semester_metrics"):
+    """Per-semester summary read by /home, merged into `into`"""
+    return [
+        {"$unwind": "$Grades"},
+        {"$group": {
+            "_id": "$SemesterID",
+            "average_grade": {"$avg": "$Grades"},
+            "top_grade": {"$max": "$Grades"},
+            "passing": {"$sum": {"$cond": [{"$gte": ["$Grades", PASSING_GRADE]}, 1, 0]}},
+            "total": {"$sum": 1}
+        }},
+        {"$project": {
+            "semester_id": "$_id",
+            "average_grade": {"$round": ["$average_grade", 2]},
+            "top_grade": 1,
+            "passing_rate": {"$round": [{"$multiply": [{"$divide": ["$passing", "$total"]}, 100]}, 2]},
+            "at_risk_rate": {"$round": [
+                {"$multiply": [{"$divide": [{"$subtract": ["$total", "$passing"]}, "$total"]}, 100]}, 2
+            ]}
+        }},
+        {"$merge": {
+            "into": into,
+            "on": "_id",
+            "whenMatched": "merge",
+            "whenNotMatched": "insert"
+        }}
+    ]
 
-    for doc in result:
-        db.class_averages.update_one(
-            {"_id": {"subject_code": doc["subject_code"], "semester_id": doc["semester_id"]}},
-            {"$set": {
-                "average_grade": doc["average_grade"],
-                "subject_description": doc["subject_description"]
-            }},
-            upsert=True
-        )
+def update_semester_metrics(db=None):
+    """Rebuild the per-semester summary read by /home"""
+    db = db if db is not None else get_db()
+    db.grades.aggregate(build_semester_metrics_pipeline(), allowDiskUse=True)
 
 def update_class_average_for_subject_semester(subject_code, semester_id):
     db = get_db()
@@ -57,6 +118,7 @@ def update_class_average_for_subject_semester(subject_code, semester_id):
         return
 
     avg_grade = sum(grades) / len(grades)
+    passing = sum(1 for g in grades if g >= PASSING_GRADE)
 
     subject = db.subjects.find_one({"_id": subject_code})
     if not subject:
@@ -65,7 +127,14 @@ def update_class_average_for_subject_semester(subject_code, semester_id):
     db.class_averages.update_one(
         {"_id": {"subject_code": subject_code, "semester_id": semester_id}},
         {"$set": {
+            "subject_code": subject_code,
+            "semester_id": semester_id,
             "average_grade": avg_grade,
+            "top_grade": max(grades),
+            "total_students": len(grades),
+            "passing_rate": passing / len(grades) * 100,
+            "at_risk_rate": (len(grades) - passing) / len(grades) * 100,
+            "grade_distribution": histogram(grades, bin_edges()),
             "subject_description": subject["Description"]
         }},
         upsert=True
@@ -0,0 +1,188 @@
+# utils/entity_cache.py
+"""Versioned read-through cache of assembled student performance objects.
+
+The performance routes compose their responses from these entries:
+
+    perf:<student_id>:<semester_id>:<version>   subjects, grades, units, GPA
+    count:students:<version>                    total for /performance/all
+    count:gpas:<semester_id>:<version>          total for /performance/all by GPA
+    class_avg:<semester_id>:<version>           subject code -> class average
+    timeline:<student_id>:<version>             per-semester and cumulative GPA
+
+Keys embed version counters kept in the entity_versions collection (one
+per student, one per semester, and a global one), so a grade write bumps
+just that student and semester, and every worker sees the new version on
+its next read. Old versions are never deleted; they age out of the
+in-memory cache. Class averages live in their own per-semester entry
+because one student's grade change moves them for the whole class.
+
+The response cache (cache_config.MetricsSimpleCache) prefixes its keys
+with response_version(), the global version plus a "responses" counter
+bumped whenever a write clears the cached pages, so pages cached by
+other workers stop matching too.
+"""
+import os
+from cache_config import entity_cache
+from utils.gpa_calculator import calculate_weighted_average
+from utils.metrics import registry
+
+ENTITY_VERSIONS = "entity_versions"
+GLOBAL_VERSION = "all"
+RESPONSE_VERSION = "responses"
+
+# Seconds an entry is kept; version bumps, not expiry, keep it correct
+ENTITY_CACHE_TIMEOUT = int(os.getenv('ENTITY_CACHE_TIMEOUT', 3600))
+# Entries kept per worker before the oldest are evicted
+ENTITY_CACHE_SIZE = int(os.getenv('ENTITY_CACHE_SIZE', 20000))
+
+ENTITY_CACHE_REQUESTS = registry.counter(
+    "entity_cache_requests_total", "Entity cache lookups", ("kind", "result"))
+
+def _student_version_id(student_id):
+    return f"student:{student_id}"
+
+def _semester_version_id(semester_id):
+    return f"semester:{semester_id}"
+
+def get_versions(db, version_ids):
+    """Current version of each id (0 if never bumped), plus the global version"""
+    ids = [GLOBAL_VERSION] + list(version_ids)
+    versions = {doc["_id"]: doc["v"] for doc in db[ENTITY_VERSIONS].find({"_id": {"$in": ids}}, {"v": 1})}
+    return {version_id: versions.get(version_id, 0) for version_id in ids}
+
+def semester_version(db, semester_id):
+    """Version string that changes whenever a grade in the semester (or any data, on import) changes"""
+    semester_vid = _semester_version_id(semester_id)
+    versions = get_versions(db, [semester_vid])
+    return f"{versions[GLOBAL_VERSION]}.{versions[semester_vid]}"
+
+def bump_versions(db, version_ids):
+    from pymongo import UpdateOne
+
+    version_ids = list(version_ids)
+    if version_ids:
+        db[ENTITY_VERSIONS].bulk_write(
+            [UpdateOne({"_id": version_id}, {"$inc": {"v": 1}}, upsert=True) for version_id in version_ids],
+            ordered=False
+        )
+
+def bump_students(db, student_semesters):
+    """Invalidate the entities of the given (student_id, semester_id) pairs"""
+    ids = set()
+    for student_id, semester_id in student_semesters:
+        ids.add(_student_version_id(student_id))
+        # Class averages of the semester moved too
+        ids.add(_semester_version_id(semester_id))
+    bump_versions(db, sorted(ids))
+
+def bump_all(db):
+    """Invalidate every entity, e.g. after an import or a full recompute"""
+    bump_versions(db, [GLOBAL_VERSION])
+
+def response_version(db):
+    """Version of the cached responses; moves with every write that clears them and with bump_all"""
+    versions = get_versions(db, [RESPONSE_VERSION])
+    return f"{versions[GLOBAL_VERSION]}.{versions[RESPONSE_VERSION]}"
+
+def bump_responses(db):
+    """Invalidate the cached responses in every worker"""
+    bump_versions(db, [RESPONSE_VERSION])
+
+def _get_many(kind, keys):
+    values = entity_cache.get_many(*keys) if keys else []
+    hits = sum(value is not None for value in values)
+    ENTITY_CACHE_REQUESTS.inc(hits, kind=kind, result="hit")
+    ENTITY_CACHE_REQUESTS.inc(len(keys) - hits, kind=kind, result="miss")
+    return values
+
+def load_performance(db, student_id, semester_id):
+    """Build one student's semester performance object from the database"""
+    from routes.students.performance import build_grades_pipeline
+
+    student = db.students.find_one({"_id": student_id}, {"_id": 1, "Name": 1, "Course": 1})
+    if not student:
+        return {"student": None, "subjects": []}
+
+    grades_data = list(db.grades.aggregate(build_grades_pipeline(student_id, semester_id)))
+    subjects = grades_data[0].get("subjects", []) if grades_data else []
+
+    gpa_entry = db.student_gpas.find_one({"student_id": student_id}, {"gpa": 1, "weighted_average": 1, "_id": 0})
+    return {
+        "student": {"name": student["Name"], "course": student["Course"]},
+        "subjects": subjects,
+        "overall_gpa": round(gpa_entry.get("gpa", 0.0), 2) if gpa_entry else 0.0,
+        "weighted_average": round(calculate_weighted_average(
+            [s["grade"] for s in subjects], [s["Units"] for s in subjects]
+        ), 2)
+    }
+
+def load_timeline(db, student_id):
+    """Build one student's semester-by-semester GPA timeline from the database"""
+    from routes.students.timeline import build_timeline_pipeline
+
+    student = db.students.find_one({"_id": student_id}, {"_id": 1, "Name": 1, "Course": 1})
+    if not student:
+        return {"student": None, "semesters": []}
+    return {
+        "student": {"name": student["Name"], "course": student["Course"]},
+        "semesters": list(db.grades.aggregate(build_timeline_pipeline(student_id)))
+    }
+
+def load_class_averages(db, semester_id):
+    return {
+        ca["subject_code"]: ca["average_grade"]
+        for ca in db.class_averages.find({"semester_id": semester_id}, {"subject_code": 1, "average_grade": 1, "_id": 0})
+    }
+
+def get_performance(db, student_id, semester_id):
+    """Performance object with class averages attached, read through the cache"""
+    student_vid, semester_vid = _student_version_id(student_id), _semester_version_id(semester_id)
+    versions = get_versions(db, [student_vid, semester_vid])
+    generation = versions[GLOBAL_VERSION]
+    perf_key = f"perf:{student_id}:{semester_id}:{generation}.{versions[student_vid]}"
+    averages_key = f"class_avg:{semester_id}:{generation}.{versions[semester_vid]}"
+
+    entity, class_averages = _get_many("performance", [perf_key, averages_key])
+    if entity is None:
+        entity = load_performance(db, student_id, semester_id)
+        entity_cache.set(perf_key, entity, timeout=ENTITY_CACHE_TIMEOUT)
+    if class_averages is None:
+        class_averages = load_class_averages(db, semester_id)
+        entity_cache.set(averages_key, class_averages, timeout=ENTITY_CACHE_TIMEOUT)
+
+    return {
+        **entity,
+        "subjects": [
+            {**subject, "class_average": round(class_averages.get(subject["subject_code"], 0.0), 2)}
+            for subject in entity["subjects"]
+        ]
+    }
+
+def get_timeline(db, student_id):
+    """Timeline object read through the cache; any grade write for the student replaces it"""
+    student_vid = _student_version_id(student_id)
+    versions = get_versions(db, [student_vid])
+    key = f"timeline:{student_id}:{versions[GLOBAL_VERSION]}.{versions[student_vid]}"
+
+    timeline, = _get_many("timeline", [key])
+    if timeline is None:
+        timeline = load_timeline(db, student_id)
+        entity_cache.set(key, timeline, timeout=ENTITY_CACHE_TIMEOUT)
+    return timeline
+
+def get_listing_count(db, semester_id=None):
+    """Students listed by /performance/all: all of them, or those with a GPA row in the semester"""
+    if semester_id is None:
+        # Students are written by the bulk importer and the seeder, which both bump the global version
+        key = f"count:students:{get_versions(db, [])[GLOBAL_VERSION]}"
+    else:
+        key = f"count:gpas:{semester_id}:{semester_version(db, semester_id)}"
+
+    count, = _get_many("count", [key])
+    if count is None:
+        if semester_id is None:
+            count = db.students.count_documents({})
+        else:
+            count = db.student_gpas.count_documents({"semester_id": semester_id})
+        entity_cache.set(key, count, timeout=ENTITY_CACHE_TIMEOUT)
+    return count
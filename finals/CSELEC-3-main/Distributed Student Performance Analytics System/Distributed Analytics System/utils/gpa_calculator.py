@@ -1,15 +1,8 @@
+from utils.grading_scales import PH_SCALE
+
 def convert_grade_to_gpa(grade):
-    """Convert grade to GPA using Philippine scale"""       
-    if grade >= 96: return 1.00
-    elif grade >= 93: return 1.25
-    elif grade >= 90: return 1.50
-    elif grade >= 87: return 1.75
-    elif grade >= 84: return 2.00
-    elif grade >= 80: return 2.25
-    elif grade >= 78: return 2.50
-    elif grade >= 76: return 2.75
-    elif grade == 75: return 3.00
-    else: return 5.00
+    """Convert grade to GPA using Philippine scale"""
+    return PH_SCALE.convert_one(grade)
 
 def calculate_weighted_average(grades_list, units_list):
     """Calculate raw weighted average"""
@@ -0,0 +1,79 @@
+# utils/grade_changes.py
+"""Append-only log of grade writes, numbered by a global sequence.
+
+Every grade update is recorded as {seq, student_id, semester_id,
+subject_code, grade}. Readers that keep derived copies of the grades (the
+analytics snapshot) remember the last seq they applied and replay only
+the newer events. Writes that cannot be described row by row (imports)
+record a "reload" event, which tells readers to rebuild from scratch.
+Events expire after a week (see ROUTE_INDEXES); a reader that far behind
+rebuilds as well.
+
+A reader that meets a gap in the seqs waits for it: a concurrent writer
+has reserved the seq but not inserted it yet. If the seq is still missing
+after GAP_TIMEOUT seconds, its insert failed, the event will never appear,
+and the reader rebuilds.
+"""
+import os
+from datetime import datetime
+
+GRADE_CHANGES = "grade_changes"
+COUNTERS = "counters"
+SEQUENCE_ID = "grade_changes"
+# Seconds a missing seq is waited for before the reader rebuilds
+GAP_TIMEOUT = float(os.getenv('GRADE_CHANGES_GAP_SECONDS', 5))
+
+def _reserve_seqs(db, count):
+    """First of `count` consecutive sequence numbers"""
+    from pymongo import ReturnDocument
+
+    counter = db[COUNTERS].find_one_and_update(
+        {"_id": SEQUENCE_ID},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"] - count + 1
+
+def record_grade_changes(db, changes):
+    """Log (student_id, semester_id, subject_code, grade) writes; returns the last seq"""
+    changes = list(changes)
+    if not changes:
+        return None
+    first = _reserve_seqs(db, len(changes))
+    now = datetime.utcnow()
+    db[GRADE_CHANGES].insert_many([
+        {
+            "seq": first + i,
+            "kind": "grade",
+            "student_id": student_id,
+            "semester_id": semester_id,
+            "subject_code": subject_code,
+            "grade": grade,
+            "timestamp": now
+        }
+        for i, (student_id, semester_id, subject_code, grade) in enumerate(changes)
+    ], ordered=True)
+    return first + len(changes) - 1
+
+def record_reload(db, reason):
+    """Log a bulk change that readers must rebuild from; returns its seq"""
+    seq = _reserve_seqs(db, 1)
+    db[GRADE_CHANGES].insert_one({"seq": seq, "kind": "reload", "reason": reason, "timestamp": datetime.utcnow()})
+    return seq
+
+def latest_seq(db):
+    counter = db[COUNTERS].find_one({"_id": SEQUENCE_ID}, {"seq": 1})
+    return counter["seq"] if counter else 0
+
+def changes_since(db, seq, limit=None):
+    """Events after `seq`, oldest first"""
+    cursor = db[GRADE_CHANGES].find({"seq": {"$gt": seq}}, {"_id": 0}).sort("seq", 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    return list(cursor)
+
+def oldest_seq(db):
+    """Lowest seq still in the log (older events have expired), or None"""
+    oldest = db[GRADE_CHANGES].find_one({}, {"seq": 1}, sort=[("seq", 1)])
+    return oldest["seq"] if oldest else None
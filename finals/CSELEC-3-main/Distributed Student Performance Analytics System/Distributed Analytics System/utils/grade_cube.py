@@ -0,0 +1,314 @@
+# utils/grade_cube.py
+"""Pre-aggregated grade cube by course, year level, semester and subject.
+
+Each grade_cube document is one cell, keyed by (course, year_level,
+semester_id, subject_code), and holds mergeable measures:
+
+    count    grades in the cell
+    sum      sum of the grades
+    sumsq    sum of the squared grades
+    passing  grades at or above PASSING_GRADE
+
+Sums add across cells, so any coarser cut (per course and semester, per
+year level, ...) is the sum of its cells, and the average, standard
+deviation and rates are derived from the sums afterwards. As in
+class_averages and semester_metrics, the at-risk rate is the share of
+grades below PASSING_GRADE. The cube holds one cell per (course, year
+level, semester, subject), far fewer than the grades, so these queries
+take milliseconds.
+
+The cube is kept current from the grade_changes log (utils/grade_changes.py).
+A watermark records the last change applied. Each refresh recomputes only
+the (semester, subject) slices the newer changes touched, replacing their
+cells, so running it twice is harmless. A reload event, expired changes, a
+seq missing for over GRADE_CHANGES_GAP_SECONDS or a backlog over
+REPLAY_LIMIT rebuilds the whole cube instead.
+
+/analytics/cube answers from the cube as it is, with its watermark, and
+starts a refresh on a background thread at most every
+CUBE_REFRESH_SECONDS per worker. Refreshes and rebuilds hold a lock in
+rollup_state, so only one runs at a time across the workers and the CLI.
+To build the cube before the first query, or refresh it without traffic:
+
+    python -m utils.grade_cube              # catch up once
+    python -m utils.grade_cube --rebuild    # rebuild from grades
+    python -m utils.grade_cube --loop 60    # keep catching up every minute
+
+A student's year level is the one on the student document now, not the
+one at the time of the grade.
+"""
+import argparse
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from utils.class_average_updater import PASSING_GRADE
+from utils.grade_changes import GAP_TIMEOUT, latest_seq, changes_since, oldest_seq
+from utils.log_rollups import ROLLUP_STATE
+
+GRADE_CUBE = "grade_cube"
+STATE_ID = "grade_cube"
+LOCK_ID = "grade_cube_lock"
+
+DIMENSIONS = ("course", "year_level", "semester_id", "subject_code")
+MEASURES = ("count", "sum", "sumsq", "passing")
+
+# A cube further behind than this many changes is rebuilt instead of refreshed
+REPLAY_LIMIT = 10000
+# Seconds between background refreshes started by requests, per worker
+REFRESH_INTERVAL = float(os.getenv('CUBE_REFRESH_SECONDS', 10))
+# A lock held longer than this belongs to a refresh that died
+LOCK_TIMEOUT = timedelta(hours=1)
+
+def build_cube_pipeline(slices=None):
+    """Cells of every (semester_id, subject_code) slice, or of the whole cube when `slices` is None"""
+    pipeline = []
+    if slices is not None:
+        slice_filter = [{"SemesterID": semester_id, "SubjectCodes": subject_code} for semester_id, subject_code in slices]
+        pipeline.append({"$match": {"$or": slice_filter}})
+    pipeline += [
+        # One student lookup per grades document, before unwinding the subjects
+        {"$lookup": {
+            "from": "students",
+            "localField": "StudentID",
+            "foreignField": "_id",
+            "as": "student"
+        }},
+        {"$project": {
+            "SemesterID": 1,
+            # null, not missing, so students without one still group together
+            "course": {"$ifNull": [{"$arrayElemAt": ["$student.Course", 0]}, None]},
+            "year_level": {"$ifNull": [{"$arrayElemAt": ["$student.YearLevel", 0]}, None]},
+            "pairs": {"$zip": {"inputs": ["$SubjectCodes", "$Grades"]}}
+        }},
+        {"$unwind": "$pairs"},
+        {"$project": {
+            "SemesterID": 1,
+            "course": 1,
+            "year_level": 1,
+            "subject_code": {"$arrayElemAt": ["$pairs", 0]},
+            "grade": {"$arrayElemAt": ["$pairs", 1]}
+        }}
+    ]
+    if slices is not None:
+        # Other subjects of the matched documents
+        pipeline.append({"$match": {"$or": [
+            {"SemesterID": semester_id, "subject_code": subject_code} for semester_id, subject_code in slices
+        ]}})
+    pipeline += [
+        {"$group": {
+            "_id": {
+                "course": "$course",
+                "year_level": "$year_level",
+                "semester_id": "$SemesterID",
+                "subject_code": "$subject_code"
+            },
+            "count": {"$sum": 1},
+            "sum": {"$sum": "$grade"},
+            "sumsq": {"$sum": {"$multiply": ["$grade", "$grade"]}},
+            "passing": {"$sum": {"$cond": [{"$gte": ["$grade", PASSING_GRADE]}, 1, 0]}}
+        }},
+        {"$project": {
+            **{dimension: f"$_id.{dimension}" for dimension in DIMENSIONS},
+            **{measure: 1 for measure in MEASURES},
+            "updated_at": "$$NOW"
+        }}
+    ]
+    if slices is None:
+        return pipeline + [{"$out": GRADE_CUBE}]
+    return pipeline + [{"$merge": {"into": GRADE_CUBE, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}]
+
+def _set_watermark(db, watermark, gap=None):
+    # $max: a slower concurrent refresh never moves the watermark back
+    db[ROLLUP_STATE].update_one(
+        {"_id": STATE_ID},
+        {"$max": {"watermark": watermark}, "$set": {"updated_at": datetime.utcnow(), "gap": gap}},
+        upsert=True
+    )
+
+def rebuild_cube(db):
+    """Rebuild every cell from grades; returns the new watermark"""
+    # Taken before the scan: refreshing changes the scan already saw is harmless
+    watermark = latest_seq(db)
+    db.grades.aggregate(build_cube_pipeline(), allowDiskUse=True)
+    _set_watermark(db, watermark)
+    return watermark
+
+def refresh_cube(db):
+    """Apply grade changes after the watermark; returns what was done, or None if current"""
+    state = db[ROLLUP_STATE].find_one({"_id": STATE_ID})
+    if state is None:
+        return {"rebuilt": "no cube yet", "watermark": rebuild_cube(db)}
+
+    watermark = state["watermark"]
+    events = changes_since(db, watermark, limit=REPLAY_LIMIT)
+    if not events:
+        return None
+    if len(events) == REPLAY_LIMIT:
+        return {"rebuilt": f"more than {REPLAY_LIMIT} changes behind", "watermark": rebuild_cube(db)}
+
+    slices = set()
+    applied = watermark
+    gap = None
+    for event in events:
+        missing = applied + 1
+        if event["seq"] != missing:
+            oldest = oldest_seq(db)
+            if oldest is not None and oldest > missing:
+                return {"rebuilt": "grade changes expired before they were applied", "watermark": rebuild_cube(db)}
+            # A concurrent writer has reserved this seq but not inserted it yet,
+            # or its insert failed and the seq never arrives
+            gap = state.get("gap")
+            if gap is None or gap["seq"] != missing:
+                gap = {"seq": missing, "seen_at": datetime.utcnow()}
+            elif (datetime.utcnow() - gap["seen_at"]).total_seconds() > GAP_TIMEOUT:
+                return {"rebuilt": f"change {missing} missing for over {GAP_TIMEOUT:g}s", "watermark": rebuild_cube(db)}
+            break
+        if event.get("kind") != "grade":
+            return {"rebuilt": f"change {event['seq']} needs a rebuild", "watermark": rebuild_cube(db)}
+        slices.add((event["semester_id"], event["subject_code"]))
+        applied = event["seq"]
+
+    if slices:
+        db.grades.aggregate(build_cube_pipeline(sorted(slices)), allowDiskUse=True)
+    _set_watermark(db, applied, gap)
+    return {"slices": len(slices), "watermark": applied}
+
+@contextmanager
+def refresh_lock(db):
+    """Yields True if this caller got the cube's refresh lock, else False"""
+    from pymongo.errors import DuplicateKeyError
+
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    try:
+        # Matches only an expired lock; a held one makes the upsert collide on _id
+        db[ROLLUP_STATE].update_one(
+            {"_id": LOCK_ID, "expires_at": {"$lt": now}},
+            {"$set": {"token": token, "expires_at": now + LOCK_TIMEOUT}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        db[ROLLUP_STATE].delete_one({"_id": LOCK_ID, "token": token})
+
+class CubeRefresher:
+    """Refreshes the cube on one background thread per worker, started by requests"""
+
+    def __init__(self):
+        self.after_fork()
+
+    def after_fork(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.started_at = None
+        self.last_result = None
+
+    def schedule(self, app):
+        """Start a refresh unless one ran in the last REFRESH_INTERVAL seconds"""
+        if self.started_at is not None and time.monotonic() - self.started_at < REFRESH_INTERVAL:
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.started_at = time.monotonic()
+                self.thread = threading.Thread(target=self._run, args=(app,), name="grade-cube", daemon=True)
+                self.thread.start()
+
+    def _run(self, app):
+        from db.mongodb import get_db
+
+        started = time.perf_counter()
+        try:
+            with app.app_context():
+                db = get_db()
+                with refresh_lock(db) as held:
+                    if not held:
+                        return
+                    result = refresh_cube(db)
+            if result is not None:
+                self.last_result = {**result, "finished": datetime.utcnow(),
+                                    "seconds": round(time.perf_counter() - started, 2)}
+                print(f"✅ Grade cube refreshed to watermark {result['watermark']} in {self.last_result['seconds']}s")
+        except Exception as e:
+            print(f"❌ Grade cube refresh failed: {e}")
+
+cube_refresher = CubeRefresher()
+
+def cube_watermark(db):
+    state = db[ROLLUP_STATE].find_one({"_id": STATE_ID}, {"watermark": 1})
+    return state["watermark"] if state else None
+
+def build_cube_query_pipeline(filters, group_by):
+    """Sum the cells matching `filters` ({dimension: [values]}) per `group_by` dimensions"""
+    return [
+        {"$match": {dimension: {"$in": list(values)} for dimension, values in filters.items()}},
+        {"$group": {
+            "_id": {dimension: f"${dimension}" for dimension in group_by} if group_by else None,
+            **{measure: {"$sum": f"${measure}"} for measure in MEASURES}
+        }},
+        {"$sort": {f"_id.{dimension}": 1 for dimension in group_by} if group_by else {"_id": 1}}
+    ]
+
+def summarize_cell(cell):
+    """Average, standard deviation and rates of a summed cell"""
+    count = cell["count"]
+    average = cell["sum"] / count
+    # Population variance from the sums; clamp rounding error below zero
+    variance = max(cell["sumsq"] / count - average * average, 0)
+    return {
+        "total_students": count,
+        "average_grade": round(average, 2),
+        "std_dev": round(math.sqrt(variance), 2),
+        "passing_rate": round(cell["passing"] / count * 100, 2),
+        "at_risk_rate": round((count - cell["passing"]) / count * 100, 2)
+    }
+
+def query_cube(db, filters=None, group_by=()):
+    """One row per group of the dimension values in `group_by`"""
+    rows = []
+    for cell in db[GRADE_CUBE].aggregate(build_cube_query_pipeline(filters or {}, group_by)):
+        if cell["count"]:
+            rows.append({**(cell["_id"] or {}), **summarize_cell(cell)})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the grade cube current with the grade changes log")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild every cell from grades first")
+    parser.add_argument("--loop", type=float, help="keep running, catching up every N seconds")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    rebuild = args.rebuild
+    while True:
+        with refresh_lock(db) as held:
+            if not held:
+                print("Grade cube is being refreshed by another process")
+            elif rebuild:
+                started = time.perf_counter()
+                watermark = rebuild_cube(db)
+                rebuild = False
+                print(f"✅ Grade cube rebuilt at watermark {watermark} in {time.perf_counter() - started:.1f}s")
+            else:
+                result = refresh_cube(db)
+                if result is not None:
+                    print(f"✅ Grade cube refreshed to watermark {result['watermark']}: "
+                          f"{result.get('rebuilt') or str(result['slices']) + ' slices'}")
+        if not args.loop:
+            return 0 if held else 1
+        time.sleep(args.loop)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
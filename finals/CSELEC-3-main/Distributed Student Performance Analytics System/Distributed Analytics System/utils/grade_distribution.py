@@ -0,0 +1,137 @@
+# utils/grade_distribution.py
+"""Grade histograms per subject and semester, stored in class_averages.grade_distribution.
+
+Bins are given by their inner edges, e.g. "75,80,85,90,95" (the default,
+or GRADE_DISTRIBUTION_BINS) for 0-74, 75-79, 80-84, 85-89, 90-94 and
+95-100. The histogram is a fixed set of counters, one per bin, so every
+(subject, semester) is counted in the same $group pass that computes the
+class averages, and bins without grades are stored as 0:
+
+    {"0-74": 3, "75-79": 10, "80-84": 14, "85-89": 9, "90-94": 4, "95-100": 1}
+
+Recompute only the histograms (e.g. after changing the bins) with:
+
+    python -m utils.grade_distribution
+"""
+import os
+import time
+from bisect import bisect_right
+
+DEFAULT_EDGES = (75, 80, 85, 90, 95)
+MAX_GRADE = 100
+
+def bin_edges(value=None):
+    """Inner bin edges from a comma-separated string, defaulting to GRADE_DISTRIBUTION_BINS"""
+    value = value if value is not None else os.getenv('GRADE_DISTRIBUTION_BINS', '')
+    if not value.strip():
+        return DEFAULT_EDGES
+    edges = tuple(sorted({int(edge) for edge in value.split(",") if edge.strip()}))
+    if not edges or edges[0] <= 0 or edges[-1] > MAX_GRADE:
+        raise ValueError(f"bin edges must be between 1 and {MAX_GRADE}")
+    return edges
+
+def bin_labels(edges):
+    bounds = [0, *edges, MAX_GRADE + 1]
+    return [f"{low}-{high - 1}" for low, high in zip(bounds, bounds[1:])]
+
+def histogram(grades, edges=DEFAULT_EDGES):
+    """grade_distribution of a list of grades"""
+    counts = [0] * (len(edges) + 1)
+    for grade in grades:
+        counts[bisect_right(edges, grade)] += 1
+    return dict(zip(bin_labels(edges), counts))
+
+def distribution_accumulators(field, edges):
+    """$group accumulators counting `field` into bin_0 .. bin_<n>"""
+    bounds = [None, *edges, None]
+    accumulators = {}
+    for i, (low, high) in enumerate(zip(bounds, bounds[1:])):
+        conditions = []
+        if low is not None:
+            conditions.append({"$gte": [field, low]})
+        if high is not None:
+            conditions.append({"$lt": [field, high]})
+        accumulators[f"bin_{i}"] = {"$sum": {"$cond": [{"$and": conditions}, 1, 0]}}
+    return accumulators
+
+def distribution_expression(edges):
+    """grade_distribution built from the bin_<i> counters, in bin order"""
+    return {label: f"$bin_{i}" for i, label in enumerate(bin_labels(edges))}
+
+def build_distribution_pipeline(edges=None, semester_ids=None, into="class_averages"):
+    """Histograms of every (subject, semester) in one pass over grades.
+
+    Merged into existing `into` documents, or returned with the subject
+    description when `into` is None.
+    """
+    edges = edges or bin_edges()
+    pipeline = []
+    if semester_ids is not None:
+        pipeline.append({"$match": {"SemesterID": {"$in": list(semester_ids)}}})
+    pipeline += [
+        {"$project": {
+            "SemesterID": 1,
+            "pairs": {"$zip": {"inputs": ["$SubjectCodes", "$Grades"]}}
+        }},
+        {"$unwind": "$pairs"},
+        {"$project": {
+            "SemesterID": 1,
+            "subject_code": {"$arrayElemAt": ["$pairs", 0]},
+            "grade": {"$arrayElemAt": ["$pairs", 1]}
+        }},
+        {"$group": {
+            "_id": {
+                "subject_code": "$subject_code",
+                "semester_id": "$SemesterID"
+            },
+            **distribution_accumulators("$grade", edges)
+        }}
+    ]
+    if into is not None:
+        return pipeline + [
+            {"$project": {"grade_distribution": distribution_expression(edges)}},
+            # Only subjects that already have class averages
+            {"$merge": {
+                "into": into,
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard"
+            }}
+        ]
+    return pipeline + [
+        {"$lookup": {
+            "from": "subjects",
+            "localField": "_id.subject_code",
+            "foreignField": "_id",
+            "as": "subject_info"
+        }},
+        {"$unwind": "$subject_info"},
+        {"$project": {
+            "_id": 0,
+            "subject_code": "$_id.subject_code",
+            "semester_id": "$_id.semester_id",
+            "subject_description": "$subject_info.Description",
+            "grade_distribution": distribution_expression(edges)
+        }},
+        {"$sort": {"subject_code": 1, "semester_id": 1}}
+    ]
+
+def update_distributions(db, edges=None):
+    """Recompute grade_distribution on every class_averages document"""
+    db.grades.aggregate(build_distribution_pipeline(edges), allowDiskUse=True)
+
+def main():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    edges = bin_edges()
+    started = time.perf_counter()
+    update_distributions(db, edges)
+    print(f"✅ Grade distributions ({', '.join(bin_labels(edges))}) updated in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# utils/grading_scales.py
+"""Grade -> GPA scales defined once as threshold tables.
+
+A scale is a list of (minimum grade, GPA) steps plus the GPA below the
+lowest step. The same table drives every evaluator, so they cannot drift:
+
+    PH_SCALE.convert_one(88.5)           # one value (bisect, no NumPy)
+    PH_SCALE.convert(weighted_averages)  # whole arrays (NumPy searchsorted)
+    PH_SCALE.switch("$weighted_average") # MongoDB $switch expression
+
+Steps are inclusive lower bounds: a grade maps to the GPA of the highest
+step it reaches.
+"""
+import math
+from bisect import bisect_right
+
+class GradingScale:
+    def __init__(self, name, steps, default):
+        self.name = name
+        self.default = default
+        steps = sorted(steps)
+        self.thresholds = [float(threshold) for threshold, _ in steps]
+        # GPA for each bisect/searchsorted position: below the first step, then one per step
+        self.values = [default] + [gpa for _, gpa in steps]
+        self._np_thresholds = None
+
+    def convert_one(self, grade):
+        if grade is None or (isinstance(grade, float) and math.isnan(grade)):
+            return self.default
+        return self.values[bisect_right(self.thresholds, grade)]
+
+    def convert(self, grades):
+        """Convert an array-like of grades at once"""
+        import numpy as np
+
+        if self._np_thresholds is None:
+            self._np_thresholds = (np.array(self.thresholds), np.array(self.values))
+        thresholds, values = self._np_thresholds
+        grades = np.asarray(grades, dtype=np.float64)
+        result = values[np.searchsorted(thresholds, grades, side="right")]
+        # NaN sorts after every threshold; treat it as ungraded
+        return np.where(np.isnan(grades), self.default, result)
+
+    def switch(self, field):
+        """Equivalent MongoDB expression: highest step first, first match wins"""
+        return {
+            "$switch": {
+                "branches": [
+                    {"case": {"$gte": [field, threshold]}, "then": value}
+                    for threshold, value in reversed(list(zip(self.thresholds, self.values[1:])))
+                ],
+                "default": self.default
+            }
+        }
+
+# Philippine 1.00 (highest) to 5.00 (failed) scale. A grade of exactly 75
+# is a 3.00, but anything between 75 and 76 fails: the 5.00 step just
+# above 75 keeps that rule in the table.
+PH_SCALE = GradingScale("ph", [
+    (96, 1.00),
+    (93, 1.25),
+    (90, 1.50),
+    (87, 1.75),
+    (84, 2.00),
+    (80, 2.25),
+    (78, 2.50),
+    (76, 2.75),
+    (75, 3.00),
+    (math.nextafter(75.0, math.inf), 5.00)
+], default=5.00)
+
+# US-style 4.0 scale
+US4_SCALE = GradingScale("us4", [
+    (97, 4.0),
+    (94, 3.75),
+    (91, 3.5),
+    (88, 3.25),
+    (85, 3.0),
+    (82, 2.75),
+    (79, 2.5),
+    (76, 2.25),
+    (73, 2.0),
+    (70, 1.75),
+    (67, 1.5),
+    (64, 1.25),
+    (60, 1.0)
+], default=0.0)
+
+SCALES = {scale.name: scale for scale in (PH_SCALE, US4_SCALE)}
+
+def get_scale(name):
+    try:
+        return SCALES[name]
+    except KeyError:
+        raise ValueError(f"Unknown grading scale: {name} (expected one of {', '.join(SCALES)})")
@@ -0,0 +1,257 @@
+# utils/log_rollups.py
+"""Per-minute and per-hour rollups of request_logs.
+
+Each rollup document covers one (bucket start, path, method, status class)
+and holds the request count, total and max latency, response bytes and a
+latency histogram over fixed LATENCY_BUCKETS_MS bounds. Histograms with
+the same bounds add element-wise, so any range of buckets can be merged
+and percentiles estimated without reading raw logs.
+
+The job is incremental: a watermark records the last closed minute that
+was rolled up. Minutes are rebuilt from request_logs with $merge, then
+the hours they fall in are rebuilt from the minute rollups. Re-running a
+window replaces the same documents, so the job is safe to repeat.
+
+    python -m utils.log_rollups            # catch up once
+    python -m utils.log_rollups --loop 60  # keep catching up every minute
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from db.index_sync import sync_indexes
+from db.schema import ROUTE_INDEXES
+
+MINUTE_ROLLUPS = "request_rollups_minute"
+HOUR_ROLLUPS = "request_rollups_hour"
+ROLLUP_STATE = "rollup_state"
+STATE_ID = "request_logs"
+
+# Upper bounds of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+N_BUCKETS = len(LATENCY_BUCKETS_MS) + 1
+
+# Minutes younger than this may still receive log rows
+LATE_ARRIVAL_SECONDS = 60
+# Longest window a single refresh will roll up (the CLI backfills in steps)
+MAX_CATCHUP = timedelta(hours=6)
+
+def _bucket_index_expr(field):
+    """$switch giving the histogram bucket a latency falls into"""
+    return {"$switch": {
+        "branches": [
+            {"case": {"$lte": [field, bound]}, "then": i}
+            for i, bound in enumerate(LATENCY_BUCKETS_MS)
+        ],
+        "default": len(LATENCY_BUCKETS_MS)
+    }}
+
+def _histogram_group_fields(source):
+    """One $sum accumulator per bucket (h0..hN) from a per-row source expression"""
+    return {f"h{i}": {"$sum": source(i)} for i in range(N_BUCKETS)}
+
+def _histogram_array():
+    return [f"$h{i}" for i in range(N_BUCKETS)]
+
+def build_minute_rollup_pipeline(since, until):
+    return [
+        {"$match": {"timestamp": {"$gte": since, "$lt": until}}},
+        {"$project": {
+            "start": {"$dateTrunc": {"date": "$timestamp", "unit": "minute"}},
+            # Route rule when logged, so ids in the URL don't explode cardinality
+            "path": {"$ifNull": ["$meta.endpoint", "$endpoint", "$path"]},
+            "method": {"$ifNull": ["$meta.method", "$method"]},
+            "status_class": {"$concat": [
+                {"$toString": {"$toInt": {"$floor": {"$divide": ["$status_code", 100]}}}}, "xx"
+            ]},
+            "duration_ms": 1,
+            "bytes": {"$ifNull": ["$response_size", 0]},
+            "bucket": _bucket_index_expr("$duration_ms")
+        }},
+        {"$group": {
+            "_id": {"start": "$start", "path": "$path", "method": "$method", "status_class": "$status_class"},
+            "count": {"$sum": 1},
+            "sum_ms": {"$sum": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "bytes": {"$sum": "$bytes"},
+            **_histogram_group_fields(lambda i: {"$cond": [{"$eq": ["$bucket", i]}, 1, 0]})
+        }},
+        {"$project": {
+            "start": "$_id.start",
+            "path": "$_id.path",
+            "method": "$_id.method",
+            "status_class": "$_id.status_class",
+            "count": 1,
+            "sum_ms": 1,
+            "max_ms": 1,
+            "bytes": 1,
+            "histogram": _histogram_array()
+        }},
+        {"$merge": {"into": MINUTE_ROLLUPS, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+def build_hour_rollup_pipeline(since, until):
+    """Rebuild the hour buckets in [since, until) from minute rollups"""
+    return [
+        {"$match": {"start": {"$gte": since, "$lt": until}}},
+        {"$group": {
+            "_id": {
+                "start": {"$dateTrunc": {"date": "$start", "unit": "hour"}},
+                "path": "$path",
+                "method": "$method",
+                "status_class": "$status_class"
+            },
+            "count": {"$sum": "$count"},
+            "sum_ms": {"$sum": "$sum_ms"},
+            "max_ms": {"$max": "$max_ms"},
+            "bytes": {"$sum": "$bytes"},
+            **_histogram_group_fields(lambda i: {"$arrayElemAt": ["$histogram", i]})
+        }},
+        {"$project": {
+            "start": "$_id.start",
+            "path": "$_id.path",
+            "method": "$_id.method",
+            "status_class": "$_id.status_class",
+            "count": 1,
+            "sum_ms": 1,
+            "max_ms": 1,
+            "bytes": 1,
+            "histogram": _histogram_array()
+        }},
+        {"$merge": {"into": HOUR_ROLLUPS, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+def _truncate(value, unit):
+    if unit == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(second=0, microsecond=0)
+
+def ensure_rollup_indexes(db):
+    sync_indexes(db, {name: ROUTE_INDEXES[name] for name in (MINUTE_ROLLUPS, HOUR_ROLLUPS)})
+
+def run_rollups(db, now=None, max_catchup=MAX_CATCHUP):
+    """Roll up closed minutes since the watermark; returns the window processed"""
+    now = now or datetime.utcnow()
+    closed_until = _truncate(now - timedelta(seconds=LATE_ARRIVAL_SECONDS), "minute")
+
+    state = db[ROLLUP_STATE].find_one({"_id": STATE_ID})
+    if state:
+        since = state["watermark"]
+    else:
+        first = db.request_logs.find_one({}, {"timestamp": 1}, sort=[("timestamp", 1)])
+        if not first:
+            return None
+        since = _truncate(first["timestamp"], "minute")
+        ensure_rollup_indexes(db)
+
+    until = min(closed_until, since + max_catchup) if max_catchup else closed_until
+    if until <= since:
+        return None
+
+    db.request_logs.aggregate(build_minute_rollup_pipeline(since, until), allowDiskUse=True)
+    db[MINUTE_ROLLUPS].aggregate(
+        build_hour_rollup_pipeline(_truncate(since, "hour"), _truncate(until - timedelta(minutes=1), "hour") + timedelta(hours=1)),
+        allowDiskUse=True
+    )
+    db[ROLLUP_STATE].update_one({"_id": STATE_ID}, {"$set": {"watermark": until, "updated_at": now}}, upsert=True)
+    return {"since": since, "until": until}
+
+def merge_histograms(histograms):
+    merged = [0] * N_BUCKETS
+    for histogram in histograms:
+        for i, count in enumerate(histogram[:N_BUCKETS]):
+            merged[i] += count
+    return merged
+
+def histogram_percentile(histogram, q, max_ms=None):
+    """Estimate a percentile by interpolating within the bucket it falls in"""
+    total = sum(histogram)
+    if not total:
+        return None
+    target = q / 100 * total
+    cumulative = 0
+    for i, count in enumerate(histogram):
+        if count and cumulative + count >= target:
+            lower = LATENCY_BUCKETS_MS[i - 1] if i > 0 else 0
+            upper = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else (max_ms or lower)
+            if max_ms is not None:
+                upper = min(upper, max_ms)
+            return round(lower + (upper - lower) * (target - cumulative) / count, 2)
+        cumulative += count
+    return max_ms
+
+def _summarize(rows):
+    histogram = merge_histograms(row["histogram"] for row in rows)
+    count = sum(row["count"] for row in rows)
+    errors = sum(row["count"] for row in rows if row["status_class"] == "5xx")
+    max_ms = max((row["max_ms"] for row in rows), default=None)
+    return {
+        "count": count,
+        "avg_ms": round(sum(row["sum_ms"] for row in rows) / count, 2) if count else None,
+        "p50_ms": histogram_percentile(histogram, 50, max_ms),
+        "p95_ms": histogram_percentile(histogram, 95, max_ms),
+        "p99_ms": histogram_percentile(histogram, 99, max_ms),
+        "max_ms": max_ms,
+        "error_rate": round(errors / count, 4) if count else None,
+        "bytes": sum(row["bytes"] for row in rows)
+    }
+
+def _collection_for(granularity):
+    return MINUTE_ROLLUPS if granularity == "minute" else HOUR_ROLLUPS
+
+def latency_trend(db, path, since, until=None, granularity="hour", method=None):
+    """Latency summary per bucket for one path"""
+    query = {"path": path, "start": {"$gte": since}}
+    if until:
+        query["start"]["$lt"] = until
+    if method:
+        query["method"] = method
+
+    buckets = {}
+    for row in db[_collection_for(granularity)].find(query, {"_id": 0}).sort("start", 1):
+        buckets.setdefault(row["start"], []).append(row)
+    return [{"start": start, **_summarize(rows)} for start, rows in buckets.items()]
+
+def top_slow_paths(db, since, until=None, granularity="hour", limit=10, order_by="p95_ms"):
+    """Paths ranked by a latency percentile (or total time) over a range"""
+    query = {"start": {"$gte": since}}
+    if until:
+        query["start"]["$lt"] = until
+
+    paths = {}
+    for row in db[_collection_for(granularity)].find(query, {"_id": 0}):
+        paths.setdefault(row["path"], []).append(row)
+
+    report = []
+    for path, rows in paths.items():
+        summary = _summarize(rows)
+        summary["total_ms"] = round(sum(row["sum_ms"] for row in rows), 2)
+        report.append({"path": path, **summary})
+    report.sort(key=lambda item: item.get(order_by) or 0, reverse=True)
+    return report[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll request_logs up into minute and hour buckets")
+    parser.add_argument("--loop", type=float, help="keep running, catching up every N seconds")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    while True:
+        # Backfill in MAX_CATCHUP steps until the last closed minute
+        while True:
+            window = run_rollups(db)
+            if window is None:
+                break
+            print(f"✅ Rolled up request logs {window['since']} - {window['until']}")
+        if not args.loop:
+            return 0
+        time.sleep(args.loop)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
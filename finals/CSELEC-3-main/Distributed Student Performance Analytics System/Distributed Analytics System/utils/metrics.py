@@ -0,0 +1,252 @@
+# utils/metrics.py
+"""In-process metrics registry rendered in the Prometheus text format.
+
+Each worker keeps its own counters. When METRICS_DIR is set (gunicorn),
+workers also write snapshots there and /metrics merges every worker's
+snapshot, so totals cover the whole server rather than one process.
+"""
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Request and query latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds between snapshot writes in multi-worker mode
+FLUSH_INTERVAL = 1.0
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def snapshot(self):
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": [[list(key), value] for key, value in self.values.items()]
+        }
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.registry.lock:
+            self.values[key] = float(value)
+
+    def inc(self, amount=1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.registry.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                entry = self.values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+                    break
+            else:
+                entry["counts"][-1] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def snapshot(self):
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.last_flush = 0.0
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def reset(self):
+        """Forget all values, e.g. in a freshly forked worker"""
+        self.lock = threading.Lock()
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values = {}
+            self.last_flush = 0.0
+
+    def snapshot(self):
+        with self.lock:
+            return {name: json.loads(json.dumps(metric.snapshot())) for name, metric in self.metrics.items()}
+
+    def flush(self, force=False):
+        """Write this worker's snapshot to METRICS_DIR (at most once per FLUSH_INTERVAL)"""
+        directory = os.getenv("METRICS_DIR")
+        now = time.time()
+        if not directory or (not force and now - self.last_flush < FLUSH_INTERVAL):
+            return
+        self.last_flush = now
+
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"pid": os.getpid(), "metrics": self.snapshot()}, f)
+        os.replace(tmp_path, os.path.join(directory, f"metrics_{os.getpid()}.json"))
+
+    def collect(self):
+        """Snapshot merged across every worker that shares METRICS_DIR"""
+        directory = os.getenv("METRICS_DIR")
+        if not directory:
+            return self.snapshot()
+
+        self.flush(force=True)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return merge_snapshots(snapshots)
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def merge_snapshots(snapshots):
+    """Sum counters and histograms from all workers and gauges from live ones"""
+    merged = {}
+    for snapshot in snapshots:
+        alive = _pid_alive(snapshot["pid"])
+        for name, metric in snapshot["metrics"].items():
+            if metric["kind"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "values": []})
+            values = {tuple(key): value for key, value in target["values"]}
+            for key, value in metric["values"]:
+                key = tuple(key)
+                if metric["kind"] == "histogram":
+                    current = values.get(key)
+                    if current is None:
+                        values[key] = {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]}
+                    else:
+                        current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                        current["sum"] += value["sum"]
+                        current["count"] += value["count"]
+                else:
+                    values[key] = values.get(key, 0.0) + value
+            target["values"] = [[list(key), value] for key, value in values.items()]
+    return merged
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labelnames, key, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def render_text(snapshot):
+    """Render a snapshot in the Prometheus text exposition format"""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        labelnames = metric["labelnames"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        for key, value in sorted(metric["values"], key=lambda item: item[0]):
+            if metric["kind"] == "histogram":
+                cumulative = 0
+                bounds = list(metric["buckets"]) + [float("inf")]
+                for bound, count in zip(bounds, value["counts"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labelnames, key, ('le', _format_number(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labelnames, key)} {_format_number(value['sum'])}")
+                lines.append(f"{name}_count{_labels(labelnames, key)} {value['count']}")
+            else:
+                lines.append(f"{name}{_labels(labelnames, key)} {_format_number(value)}")
+    return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+REQUEST_COUNT = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status", ("method", "endpoint", "status"))
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "endpoint"))
+MONGO_COMMAND_LATENCY = registry.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("command", "collection"))
+MONGO_COMMAND_FAILURES = registry.counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ("command", "collection"))
+MONGO_POOL_WAIT = registry.histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection")
+MONGO_POOL_CHECKOUT_FAILURES = registry.counter(
+    "mongodb_pool_checkout_failures_total", "Connection checkouts that failed", ("reason",))
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "Response cache lookups", ("result",))
+ADMISSION_ACTIVE = registry.gauge(
+    "admission_active_requests", "Requests holding an admission slot", ("cost_class",))
+ADMISSION_QUEUED = registry.gauge(
+    "admission_queued_requests", "Requests waiting for an admission slot", ("cost_class",))
+ADMISSION_WAIT = registry.histogram(
+    "admission_wait_seconds", "Time admitted requests waited for a slot", ("cost_class",))
+ADMISSION_REJECTED = registry.counter(
+    "admission_rejected_total", "Requests shed with 503", ("cost_class", "reason"))
+ADMISSION_BYPASSED = registry.counter(
+    "admission_cached_bypass_total", "Requests admitted without a slot because their response was cached", ("cost_class",))
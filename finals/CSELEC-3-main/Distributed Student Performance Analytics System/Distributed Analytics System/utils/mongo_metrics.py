@@ -0,0 +1,91 @@
+# utils/mongo_metrics.py
+"""pymongo listeners feeding the MongoDB metrics in utils/metrics.py.
+
+Kept apart from the registry so importing utils.metrics does not pull in
+pymongo; the app registers these by name and they load with the first client.
+"""
+import threading
+import time
+from pymongo import monitoring
+from utils.metrics import MONGO_COMMAND_LATENCY, MONGO_COMMAND_FAILURES, MONGO_POOL_WAIT, MONGO_POOL_CHECKOUT_FAILURES
+
+def _command_collection(event_command, command_name):
+    if command_name == "getMore":
+        return event_command.get("collection", "")
+    target = event_command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Time every MongoDB command by command name and collection"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def started(self, event):
+        collection = _command_collection(event.command, event.command_name)
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event):
+        with self.lock:
+            return self.pending.pop((event.connection_id, event.request_id), "")
+
+    def after_fork(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        MONGO_COMMAND_LATENCY.observe(event.duration_micros / 1e6, command=event.command_name, collection=collection)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        MONGO_COMMAND_LATENCY.observe(event.duration_micros / 1e6, command=event.command_name, collection=collection)
+        MONGO_COMMAND_FAILURES.inc(command=event.command_name, collection=collection)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Measure how long requests wait to check out a pooled connection"""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self.local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self.local, "started", None)
+        if started is not None:
+            MONGO_POOL_WAIT.observe(time.perf_counter() - started)
+            self.local.started = None
+
+    def connection_check_out_failed(self, event):
+        self.local.started = None
+        MONGO_POOL_CHECKOUT_FAILURES.inc(reason=event.reason)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+command_listener = MongoCommandMetrics()
+pool_listener = MongoPoolMetrics()
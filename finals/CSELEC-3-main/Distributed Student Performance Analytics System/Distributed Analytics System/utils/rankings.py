@@ -0,0 +1,148 @@
+# utils/rankings.py
+"""Rank, percentile and leaderboards of weighted averages per (course, semester).
+
+Each cohort (students of one course in one semester) is held as sorted
+NumPy arrays of its student_gpas weighted averages, so a student's rank
+and percentile are two binary searches and the top N is a slice. A
+semester's cohorts are built together from one query and kept per
+worker until the semester's entity version (utils/entity_cache.py)
+moves: a grade write rebuilds only the semester it touched, and an
+import or full recompute rebuilds them all.
+
+Ranks are competition ranks (equal averages share a rank, the next rank
+skips). The percentile is the share of the cohort below the student,
+counting half of the ties.
+"""
+import threading
+from utils.entity_cache import semester_version
+
+# Semesters whose rankings a worker keeps
+MAX_SEMESTERS = 32
+
+def build_cohort_pipeline(semester_id):
+    """Weighted average and course of every student with a GPA row in the semester"""
+    return [
+        {"$match": {"semester_id": semester_id, "weighted_average": {"$ne": None}}},
+        {"$lookup": {
+            "from": "students",
+            "localField": "student_id",
+            "foreignField": "_id",
+            "as": "student"
+        }},
+        {"$unwind": "$student"},
+        {"$project": {
+            "_id": 0,
+            "student_id": 1,
+            "weighted_average": 1,
+            "course": "$student.Course"
+        }}
+    ]
+
+class CohortRanking:
+    def __init__(self, student_ids, values):
+        import numpy as np
+
+        student_ids = np.asarray(student_ids, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        # Best first, ties by student id
+        order = np.lexsort((student_ids, -values))
+        self.leader_ids = student_ids[order]
+        self.leader_values = values[order]
+        self.ascending = self.leader_values[::-1].copy()
+        by_id = np.argsort(student_ids)
+        self.ids = student_ids[by_id]
+        self.id_values = values[by_id]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def value_of(self, student_id):
+        import numpy as np
+
+        i = int(np.searchsorted(self.ids, student_id))
+        if i < len(self.ids) and self.ids[i] == student_id:
+            return float(self.id_values[i])
+        return None
+
+    def rank(self, value):
+        import numpy as np
+
+        return len(self) - np.searchsorted(self.ascending, value, side="right") + 1
+
+    def percentile(self, value):
+        import numpy as np
+
+        below = int(np.searchsorted(self.ascending, value, side="left"))
+        equal = int(np.searchsorted(self.ascending, value, side="right")) - below
+        return round((below + equal / 2) / len(self) * 100, 1)
+
+    def top(self, limit, offset=0):
+        """(rank, student_id, weighted_average) for positions offset .. offset + limit"""
+        ids = self.leader_ids[offset:offset + limit]
+        values = self.leader_values[offset:offset + limit]
+        ranks = self.rank(values)
+        return list(zip(ranks.tolist(), ids.tolist(), values.tolist()))
+
+class SemesterRanking:
+    def __init__(self, semester_id, version, cohorts):
+        self.semester_id = semester_id
+        self.version = version
+        self.cohorts = cohorts
+
+    @classmethod
+    def build(cls, db, semester_id, version):
+        grouped = {}
+        for row in db.student_gpas.aggregate(build_cohort_pipeline(semester_id)):
+            ids, values = grouped.setdefault(row["course"], ([], []))
+            ids.append(row["student_id"])
+            values.append(row["weighted_average"])
+        cohorts = {course: CohortRanking(ids, values) for course, (ids, values) in grouped.items()}
+        return cls(semester_id, version, cohorts)
+
+class RankingService:
+    def __init__(self):
+        self.after_fork()
+
+    def after_fork(self):
+        self.lock = threading.Lock()
+        self.semesters = {}
+
+    def get(self, db, semester_id):
+        """Rankings of every cohort in the semester, rebuilt if the semester changed"""
+        version = semester_version(db, semester_id)
+        ranking = self.semesters.get(semester_id)
+        if ranking is not None and ranking.version == version:
+            return ranking
+
+        with self.lock:
+            # Another thread may have rebuilt it while this one waited
+            ranking = self.semesters.get(semester_id)
+            if ranking is None or ranking.version != version:
+                ranking = SemesterRanking.build(db, semester_id, version)
+                self.semesters.pop(semester_id, None)
+                while len(self.semesters) >= MAX_SEMESTERS:
+                    self.semesters.pop(next(iter(self.semesters)))
+                self.semesters[semester_id] = ranking
+        return ranking
+
+    def student_position(self, db, student_id, semester_id, course):
+        """Rank, percentile and cohort size of one student, or None if unranked"""
+        cohort = self.get(db, semester_id).cohorts.get(course)
+        value = cohort.value_of(student_id) if cohort is not None else None
+        if value is None:
+            return None
+        return {
+            "weighted_average": round(value, 2),
+            "rank": int(cohort.rank(value)),
+            "cohort_size": len(cohort),
+            "percentile": cohort.percentile(value)
+        }
+
+    def leaderboard(self, db, semester_id, course, limit=10, offset=0):
+        """Top of a cohort as (rank, student_id, weighted_average), and the cohort size"""
+        cohort = self.get(db, semester_id).cohorts.get(course)
+        if cohort is None:
+            return [], 0
+        return cohort.top(limit, offset), len(cohort)
+
+rankings = RankingService()
@@ -0,0 +1,244 @@
+# utils/risk_scores.py
+"""Batch at-risk scoring of every student in every semester.
+
+The grades are read once into the columnar analytics snapshot
+(utils/analytics_snapshot.py), or mapped from disk when the saved snapshot
+is current. Every (student, semester) is then scored at once with NumPy
+from four factors:
+
+    failing_grades  grades below PASSING_GRADE in the semester
+    class_gap       mean grade minus the class average of each subject
+    trend           least-squares slope of the student's weighted average
+                    per semester, over the semesters so far
+    unit_load       units taken above the median load
+
+Each factor is scaled to 0..1 (FULL_RISK is where it counts fully) and
+weighted by FACTOR_WEIGHTS, so a score runs from 0 to 100. The points each
+factor contributed are stored with the score in risk_scores, which is
+written under a staging name and renamed into place so readers never see
+a partial run. /students/at_risk?sort=score and ?min_score= read it.
+
+    python -m utils.risk_scores             # score once
+    python -m utils.risk_scores --loop 3600 # rescore every hour
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from utils.class_average_updater import PASSING_GRADE
+from utils.grading_scales import PH_SCALE
+
+RISK_SCORES = "risk_scores"
+STAGING = "risk_scores_staging"
+
+# Points each factor adds to the score at full risk; they sum to 100
+FACTOR_WEIGHTS = {
+    "failing_grades": 40,
+    "class_gap": 25,
+    "trend": 20,
+    "unit_load": 15
+}
+# Raw value at which a factor counts fully: failing grades, points below the
+# class average, points lost per semester, and share of units above the median
+FULL_RISK = {
+    "failing_grades": 2,
+    "class_gap": 10,
+    "trend": 5,
+    "unit_load": 0.5
+}
+WRITE_BATCH_SIZE = 10000
+
+def load_grades(db):
+    """The grades as a GradeSnapshot: the saved one if nothing changed since, else a fresh scan"""
+    from utils.analytics_snapshot import GradeSnapshot
+    from utils.grade_changes import latest_seq
+    from utils.snapshot_store import load_snapshot
+
+    snapshot = load_snapshot()
+    if snapshot is not None and snapshot.watermark >= latest_seq(db):
+        return snapshot
+    return GradeSnapshot.build(db)
+
+def _running_sums(values, group_start):
+    """Cumulative sum of `values` restarting at each group"""
+    import numpy as np
+
+    total = np.cumsum(values)
+    return total - total[group_start] + values[group_start]
+
+def score_snapshot(snapshot):
+    """Factors and score of every (student, semester) in the snapshot, as NumPy arrays"""
+    import numpy as np
+
+    n_semesters = len(snapshot.semester_ids)
+    # Semesters in calendar order, as on the timeline
+    chronological = sorted(
+        range(n_semesters),
+        key=lambda code: (snapshot.school_years[code] or 0, int(snapshot.semester_ids[code]))
+    )
+    position = np.empty(n_semesters, dtype=np.int64)
+    position[chronological] = np.arange(n_semesters)
+
+    grade = snapshot.grade.astype(np.float64)
+    units = snapshot.units.astype(np.float64)
+    semester = snapshot.semester.astype(np.int64)
+
+    # One group per (student, semester), ordered by student then calendar
+    groups, row_group = np.unique(snapshot.student.astype(np.int64) * n_semesters + position[semester], return_inverse=True)
+    n = len(groups)
+    counts = np.bincount(row_group, minlength=n)
+    total_units = np.bincount(row_group, weights=units, minlength=n)
+    plain_average = np.bincount(row_group, weights=grade, minlength=n) / counts
+    weighted_average = np.divide(
+        np.bincount(row_group, weights=grade * units, minlength=n), total_units,
+        out=plain_average.copy(), where=total_units > 0)
+
+    failing = np.bincount(row_group, weights=grade < PASSING_GRADE, minlength=n)
+
+    # Class average of each (subject, semester), from the same rows
+    classes, row_class = np.unique(snapshot.subject.astype(np.int64) * n_semesters + semester, return_inverse=True)
+    class_average = np.bincount(row_class, weights=grade) / np.bincount(row_class)
+    class_gap = np.bincount(row_group, weights=grade - class_average[row_class], minlength=n) / counts
+
+    # Slope of the weighted average over each student's semesters so far
+    student = groups // n_semesters
+    starts = np.flatnonzero(np.r_[True, student[1:] != student[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+    t = (np.arange(n) - group_start).astype(np.float64)
+    k = t + 1
+    sum_t = _running_sums(t, group_start)
+    sum_y = _running_sums(weighted_average, group_start)
+    sum_ty = _running_sums(t * weighted_average, group_start)
+    sum_tt = _running_sums(t * t, group_start)
+    denominator = k * sum_tt - sum_t ** 2
+    trend = np.divide(k * sum_ty - sum_t * sum_y, denominator, out=np.zeros(n), where=denominator > 0)
+
+    loaded = total_units[total_units > 0]
+    median_load = float(np.median(loaded)) if len(loaded) else 0.0
+    unit_load = (total_units - median_load) / median_load if median_load else np.zeros(n)
+
+    # Larger is riskier for every scaled factor
+    scaled = {
+        "failing_grades": failing / FULL_RISK["failing_grades"],
+        "class_gap": -class_gap / FULL_RISK["class_gap"],
+        "trend": -trend / FULL_RISK["trend"],
+        "unit_load": unit_load / FULL_RISK["unit_load"]
+    }
+    points = {name: np.clip(value, 0, 1) * FACTOR_WEIGHTS[name] for name, value in scaled.items()}
+
+    return {
+        "student": student,
+        "semester": np.array(chronological, dtype=np.int64)[groups % n_semesters],
+        "score": sum(points.values()),
+        "weighted_average": weighted_average,
+        "total_units": total_units,
+        "values": {
+            "failing_grades": failing,
+            "class_gap": class_gap,
+            "trend": trend,
+            "unit_load": total_units
+        },
+        "points": points
+    }
+
+def score_documents(snapshot, scores, scored_at):
+    """risk_scores documents, one per (student, semester)"""
+    import numpy as np
+
+    names = list(FACTOR_WEIGHTS)
+    # Rounded and converted column-wise; adding 0.0 turns -0.0 into 0.0
+    values = {name: (np.round(scores["values"][name], 2) + 0.0).tolist() for name in names}
+    points = {name: (np.round(scores["points"][name], 1) + 0.0).tolist() for name in names}
+    student = scores["student"]
+    course = np.asarray(snapshot.student_course)[student]
+    courses = list(snapshot.courses) + [None]  # course code -1: student missing from students
+    columns = zip(
+        student.tolist(),
+        np.asarray(snapshot.student_ids)[student].tolist(),
+        np.asarray(snapshot.semester_ids)[scores["semester"]].tolist(),
+        course.tolist(),
+        (np.round(scores["score"], 1) + 0.0).tolist(),
+        np.round(scores["weighted_average"], 2).tolist(),
+        # Every GPA in one searchsorted over the scale's table
+        PH_SCALE.convert(scores["weighted_average"]).tolist(),
+        scores["total_units"].astype(np.int64).tolist()
+    )
+    for i, (code, student_id, semester_id, course_code, score, weighted_average, gpa, total_units) in enumerate(columns):
+        factors = {name: points[name][i] for name in names}
+        yield {
+            "student_id": student_id,
+            "semester_id": semester_id,
+            "name": snapshot.student_names[code],
+            "course": courses[course_code],
+            "score": score,
+            "weighted_average": weighted_average,
+            "gpa": gpa,
+            "total_units": total_units,
+            # Points per factor, and the raw values they were scaled from
+            "factors": factors,
+            "factor_values": {name: values[name][i] for name in names},
+            # Contributing factors, largest first
+            "top_factors": sorted((name for name in names if factors[name] > 0), key=factors.get, reverse=True),
+            "scored_at": scored_at
+        }
+
+def write_scores(db, documents):
+    """Replace risk_scores with `documents`; returns the number written"""
+    from db.index_sync import sync_indexes
+    from db.schema import ROUTE_INDEXES
+
+    db[STAGING].drop()
+    written, batch = 0, []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == WRITE_BATCH_SIZE:
+            db[STAGING].insert_many(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        db[STAGING].insert_many(batch, ordered=False)
+        written += len(batch)
+
+    # Indexes are built once over the full collection and kept by the rename
+    sync_indexes(db, {STAGING: ROUTE_INDEXES[RISK_SCORES]})
+    db[STAGING].rename(RISK_SCORES, dropTarget=True)
+    return written
+
+def run_risk_scoring(db):
+    """Score every student and publish the results; returns timings"""
+    started = time.perf_counter()
+    snapshot = load_grades(db)
+    loaded = time.perf_counter()
+    scores = score_snapshot(snapshot)
+    scored = time.perf_counter()
+    written = write_scores(db, score_documents(snapshot, scores, datetime.utcnow()))
+    return {
+        "scored": written,
+        "source": snapshot.source,
+        "load_seconds": round(loaded - started, 2),
+        "score_seconds": round(scored - loaded, 2),
+        "write_seconds": round(time.perf_counter() - scored, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every student's at-risk level into risk_scores")
+    parser.add_argument("--loop", type=float, help="keep running, rescoring every N seconds")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    while True:
+        result = run_risk_scoring(db)
+        print(f"✅ Scored {result['scored']} student semesters from {result['source']}: "
+              f"load {result['load_seconds']}s, score {result['score_seconds']}s, write {result['write_seconds']}s")
+        if not args.loop:
+            return 0
+        time.sleep(args.loop)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,10 @@
-from student_gpa_aggregator import update_student_gpa_collection
+import os
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from utils.student_gpa_aggregator import update_student_gpa_collection
 
-if __name__ == "main": update_student_gpa_collection()
\ No newline at end of file
+# Run from the app directory: python -m utils.run_gpa_update
+if __name__ == "__main__":
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    update_student_gpa_collection(client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')])
@@ -0,0 +1,262 @@
+# utils/slow_ops.py
+"""Record MongoDB commands slower than a threshold into a capped collection.
+
+Commands are grouped by shape (the command with literal values replaced
+by "?"), so the admin report can rank query shapes by total time. A
+sample of slow commands is re-run as explain("executionStats") to
+capture docs examined and the winning plan. All writes happen on a
+background thread so request threads never wait on the recorder.
+"""
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+from datetime import datetime
+from pymongo import monitoring
+from db.query_audit import EXPLAINABLE_COMMANDS, COMMAND_META_FIELDS, explain_command, summarize_explain
+
+SLOW_OPS_COLLECTION = "slow_ops"
+SLOW_OPS_CAPPED_BYTES = 64 * 1024 * 1024
+QUEUE_SIZE = 1000
+
+# Parts of each command that determine its shape
+SHAPE_FIELDS = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",)
+}
+
+# Stage options that name collections or fields rather than hold values
+STRUCTURAL_KEYS = {"from", "localField", "foreignField", "as", "path", "includeArrayIndex", "into", "on", "key"}
+
+def normalize_shape(value):
+    """Strip literal values from a query, keeping operators and field paths"""
+    if isinstance(value, dict):
+        return {
+            key: item if key in STRUCTURAL_KEYS and isinstance(item, str) else normalize_shape(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            # $in lists and similar: one placeholder whatever the length
+            return ["?"] if value else []
+        return [normalize_shape(item) for item in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+def command_shape(command_name, command):
+    shape = {"command": command_name, "collection": command.get(command_name)}
+    for field in SHAPE_FIELDS.get(command_name, ()):
+        if field in command:
+            value = command[field]
+            if field == "key":
+                shape[field] = value
+                continue
+            if field == "updates":
+                value = [{"q": u.get("q"), "u": u.get("u")} for u in value]
+            elif field == "deletes":
+                value = [{"q": d.get("q")} for d in value]
+            shape[field] = normalize_shape(value)
+    return shape
+
+def shape_hash(shape):
+    return hashlib.md5(json.dumps(shape, sort_keys=True, default=str).encode()).hexdigest()
+
+class SlowOpRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.threshold_ms = float(os.getenv('SLOW_OP_THRESHOLD_MS', 100))
+        self.explain_rate = float(os.getenv('SLOW_OP_EXPLAIN_SAMPLE_RATE', 0.1))
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self.app = None
+        self.thread = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def after_fork(self):
+        """Start clean in a forked worker: the parent's thread did not survive the fork"""
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self.thread = None
+
+    def started(self, event):
+        if event.command_name not in EXPLAINABLE_COMMANDS:
+            return
+        if event.command.get(event.command_name) == SLOW_OPS_COLLECTION:
+            return
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def _pop(self, event):
+        with self.lock:
+            return self.pending.pop((event.connection_id, event.request_id), None)
+
+    def succeeded(self, event):
+        started = self._pop(event)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        database_name, command = started
+        try:
+            self.queue.put_nowait((database_name, event.command_name, command, duration_ms, datetime.utcnow()))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_thread()
+
+    def failed(self, event):
+        self._pop(event)
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            with self.lock:
+                if self.thread is None or not self.thread.is_alive():
+                    self.thread = threading.Thread(target=self._run, name="slow-op-recorder", daemon=True)
+                    self.thread.start()
+
+    def _run(self):
+        from db.mongodb import get_db
+
+        with self.app.app_context():
+            client = get_db().client
+            ensured = set()
+            while True:
+                item = self.queue.get()
+                try:
+                    self._record(client, ensured, *item)
+                except Exception as e:
+                    print(f"Failed to record slow operation: {e}")
+                finally:
+                    self.queue.task_done()
+
+    def _record(self, client, ensured, database_name, command_name, command, duration_ms, timestamp):
+        db = client[database_name]
+        if database_name not in ensured:
+            ensure_slow_ops_collection(db)
+            ensured.add(database_name)
+
+        command = {k: v for k, v in command.items() if k not in COMMAND_META_FIELDS}
+        shape = command_shape(command_name, command)
+        doc = {
+            "timestamp": timestamp,
+            "shape_hash": shape_hash(shape),
+            # Stored as JSON: shapes and plans are full of $-prefixed keys
+            "shape": json.dumps(shape, sort_keys=True, default=str),
+            "command": command_name,
+            "collection": shape["collection"],
+            "duration_ms": round(duration_ms, 2),
+            "docs_examined": None,
+            "keys_examined": None,
+            "returned": None,
+            "explain": None,
+            "explain_error": None
+        }
+
+        if random.random() < self.explain_rate:
+            try:
+                explain = explain_command(db, command)
+            except Exception as e:
+                # The slow op is still worth recording without its plan
+                doc["explain_error"] = str(e)
+            else:
+                summary = summarize_explain(explain)
+                doc.update({
+                    "docs_examined": summary["docs_examined"],
+                    "keys_examined": summary["keys_examined"],
+                    "returned": summary["returned"],
+                    "explain": json.dumps(explain, default=str)
+                })
+
+        db[SLOW_OPS_COLLECTION].insert_one(doc)
+
+    def drain(self, timeout=5.0):
+        """Wait up to timeout seconds for queued records to be written"""
+        if self.thread is None or not self.thread.is_alive():
+            return
+        done = threading.Event()
+
+        def wait():
+            self.queue.join()
+            done.set()
+
+        threading.Thread(target=wait, daemon=True).start()
+        done.wait(timeout)
+
+def ensure_slow_ops_collection(db):
+    if SLOW_OPS_COLLECTION not in db.list_collection_names():
+        db.create_collection(SLOW_OPS_COLLECTION, capped=True, size=SLOW_OPS_CAPPED_BYTES)
+        db[SLOW_OPS_COLLECTION].create_index([("timestamp", -1)])
+        db[SLOW_OPS_COLLECTION].create_index([("shape_hash", 1), ("timestamp", -1)])
+
+def slow_op_report(db, since=None, limit=20):
+    """Rank recorded command shapes by total time spent"""
+    match = {"timestamp": {"$gte": since}} if since else {}
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"timestamp": -1}},
+        {"$group": {
+            "_id": "$shape_hash",
+            "shape": {"$first": "$shape"},
+            "command": {"$first": "$command"},
+            "collection": {"$first": "$collection"},
+            "count": {"$sum": 1},
+            "total_ms": {"$sum": "$duration_ms"},
+            "avg_ms": {"$avg": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "avg_docs_examined": {"$avg": "$docs_examined"},
+            "avg_returned": {"$avg": "$returned"},
+            "last_seen": {"$first": "$timestamp"}
+        }},
+        {"$sort": {"total_ms": -1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "shape_hash": "$_id",
+            "shape": 1,
+            "command": 1,
+            "collection": 1,
+            "count": 1,
+            "total_ms": {"$round": ["$total_ms", 2]},
+            "avg_ms": {"$round": ["$avg_ms", 2]},
+            "max_ms": 1,
+            "avg_docs_examined": 1,
+            "avg_returned": 1,
+            "last_seen": 1
+        }}
+    ]
+
+    results = list(db[SLOW_OPS_COLLECTION].aggregate(pipeline, allowDiskUse=True))
+    for row in results:
+        row["shape"] = json.loads(row["shape"])
+        # Most recent sampled plan for the shape
+        sampled = db[SLOW_OPS_COLLECTION].find_one(
+            {"shape_hash": row["shape_hash"], "explain": {"$ne": None}},
+            {"explain": 1},
+            sort=[("timestamp", -1)]
+        )
+        row["explain"] = json.loads(sampled["explain"]) if sampled else None
+        if sampled is None:
+            failed = db[SLOW_OPS_COLLECTION].find_one(
+                {"shape_hash": row["shape_hash"], "explain_error": {"$ne": None}},
+                {"explain_error": 1},
+                sort=[("timestamp", -1)]
+            )
+            row["explain_error"] = failed["explain_error"] if failed else None
+    return results
+
+slow_op_recorder = SlowOpRecorder()
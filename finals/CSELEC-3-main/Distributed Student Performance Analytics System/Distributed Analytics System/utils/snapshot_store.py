@@ -0,0 +1,188 @@
+# utils/snapshot_store.py
+"""On-disk format of the analytics snapshot, memory-mapped by every worker.
+
+A snapshot is a directory of NumPy .npy files, one per column or id
+array, plus meta.json with the format version, the grade_changes
+watermark and the small string dictionaries. Student names, the only
+large string field, are stored as one UTF-8 blob with an offsets array.
+
+    <ANALYTICS_SNAPSHOT_DIR>/
+        CURRENT                  name of the newest complete snapshot
+        build.lock               held by the one worker building
+        snapshot-<watermark>-<timestamp>/
+            meta.json  student.npy  grade.npy  ...
+
+A snapshot is written under a temporary name and renamed into place, and
+CURRENT is replaced last, so readers only ever see complete snapshots.
+Loading maps the files instead of reading them: workers on one node share
+the same physical pages, and a new worker is ready in milliseconds. The
+grade column is mapped copy-on-write, so replaying changes copies only the
+pages it touches into the worker. Build one ahead of a deploy with:
+
+    python -m utils.snapshot_store
+"""
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+FORMAT_VERSION = 1
+# Complete snapshots kept; older ones may still be mapped by a running worker
+KEEP_SNAPSHOTS = 2
+# Loads retried when the snapshot CURRENT named is pruned while being mapped
+LOAD_ATTEMPTS = 3
+
+ROW_COLUMNS = ("student", "semester", "subject", "grade", "units", "row_keys")
+ID_ARRAYS = ("student_ids", "student_course", "semester_ids", "subject_units", "subject_known")
+DICTIONARIES = ("courses", "semester_names", "school_years", "subject_codes", "subject_descriptions")
+
+def snapshot_dir():
+    default = os.path.join(tempfile.gettempdir(), f"cselec3_analytics_{os.getenv('MONGO_DBNAME', 'CSELEC3DB')}")
+    return os.getenv('ANALYTICS_SNAPSHOT_DIR', default)
+
+class Utf8Column:
+    """Read-only list of strings backed by one UTF-8 blob and an offsets array"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def encode(cls, values):
+        import numpy as np
+
+        encoded = [(value or "").encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+@contextmanager
+def build_lock(directory=None):
+    """Exclusive lock across the processes sharing `directory`"""
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "build.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def save_snapshot(snapshot, directory=None):
+    """Write `snapshot` atomically and make it CURRENT; returns its path"""
+    import numpy as np
+
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f"snapshot-{snapshot.watermark}-{time.time_ns()}"
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=directory)
+    try:
+        for column in ROW_COLUMNS + ID_ARRAYS:
+            np.save(os.path.join(staging, f"{column}.npy"), np.asarray(getattr(snapshot, column)))
+        blob, offsets = Utf8Column.encode(snapshot.student_names[i] for i in range(len(snapshot.student_names)))
+        np.save(os.path.join(staging, "student_names.npy"), blob)
+        np.save(os.path.join(staging, "student_name_offsets.npy"), offsets)
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "watermark": snapshot.watermark,
+                "built_at": snapshot.built_at.isoformat(),
+                "rows": snapshot.rows,
+                **{field: list(getattr(snapshot, field)) for field in DICTIONARIES}
+            }, f)
+        os.rename(staging, os.path.join(directory, name))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(directory, f".CURRENT-{os.getpid()}")
+    with open(pointer, "w") as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(directory, "CURRENT"))
+    prune(directory)
+    return os.path.join(directory, name)
+
+def prune(directory, keep=KEEP_SNAPSHOTS):
+    """Delete all but the newest `keep` snapshots (mapped files stay readable until unmapped)"""
+    snapshots = sorted(
+        (entry for entry in os.listdir(directory) if entry.startswith("snapshot-")),
+        key=lambda entry: int(entry.rsplit("-", 1)[1])
+    )
+    for entry in snapshots[:-keep]:
+        shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+def load_snapshot(directory=None):
+    """Map the CURRENT snapshot, or None if there is none in this format"""
+    directory = directory or snapshot_dir()
+    for _ in range(LOAD_ATTEMPTS):
+        try:
+            return _load(directory)
+        except FileNotFoundError:
+            # A newer save pruned the snapshot between reading CURRENT and
+            # mapping its files; CURRENT names a newer one by now
+            continue
+        except (OSError, ValueError):
+            return None
+    return None
+
+def _load(directory):
+    import numpy as np
+    from utils.analytics_snapshot import GradeSnapshot
+
+    try:
+        with open(os.path.join(directory, "CURRENT")) as f:
+            path = os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        # No snapshot saved yet: nothing to retry
+        return None
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get("format_version") != FORMAT_VERSION:
+        return None
+
+    def mapped(name, mode="r"):
+        try:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+        except ValueError:
+            # Empty arrays cannot be mapped
+            return np.load(os.path.join(path, f"{name}.npy"))
+
+    # Replayed grade changes are private to the worker; every other page stays shared
+    columns = {column: mapped(column, "c" if column == "grade" else "r") for column in ROW_COLUMNS}
+    row_keys = columns.pop("row_keys")
+    dictionaries = {name: mapped(name) for name in ID_ARRAYS}
+    dictionaries["student_names"] = Utf8Column(mapped("student_names"), mapped("student_name_offsets"))
+    dictionaries.update({field: meta[field] for field in DICTIONARIES})
+    return GradeSnapshot(
+        columns, dictionaries, meta["watermark"], datetime.fromisoformat(meta["built_at"]),
+        row_keys=row_keys, source=f"disk:{os.path.basename(path)}"
+    )
+
+def main():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    from utils.analytics_snapshot import GradeSnapshot
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[os.getenv('MONGO_DBNAME', 'CSELEC3DB')]
+
+    started = time.perf_counter()
+    with build_lock():
+        snapshot = GradeSnapshot.build(db)
+        path = save_snapshot(snapshot)
+    print(f"✅ Analytics snapshot of {snapshot.rows} rows at watermark {snapshot.watermark} "
+          f"written to {path} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
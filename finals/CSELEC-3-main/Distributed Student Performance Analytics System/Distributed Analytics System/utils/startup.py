@@ -0,0 +1,41 @@
+# utils/startup.py
+"""Startup-time report for the application factory.
+
+create_app() times each of its phases into app.extensions["startup_report"]
+and prints the table when STARTUP_REPORT=1. For the full picture, including
+the imports that happen before create_app() runs, time a fresh start with:
+
+    python startup_report.py
+"""
+import time
+from contextlib import contextmanager
+
+class StartupReport:
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - started) * 1000))
+
+    def extend(self, other, prefix=""):
+        self.phases.extend((prefix + name, ms) for name, ms in other.phases)
+
+    @property
+    def total_ms(self):
+        return sum(ms for _, ms in self.phases)
+
+    def as_dict(self):
+        return {
+            "phases": [{"name": name, "ms": round(ms, 2)} for name, ms in self.phases],
+            "total_ms": round(self.total_ms, 2)
+        }
+
+    def format(self):
+        lines = [f"{name:36} {ms:8.1f} ms" for name, ms in self.phases]
+        lines.append(f"{'total':36} {self.total_ms:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,70 @@
+# utils/stream_export.py
+import csv
+import io
+import json
+from flask import Response, stream_with_context
+
+# Documents fetched from MongoDB per getMore round-trip
+EXPORT_BATCH_SIZE = 1000
+
+# Rows buffered before a chunk is written to the client
+ROWS_PER_CHUNK = 500
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+def _csv_value(value):
+    """Flatten a value into a single CSV cell"""
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(v) for v in value)
+    if value is None:
+        return ""
+    return value
+
+def generate_ndjson(cursor):
+    """Yield NDJSON chunks straight from a MongoDB cursor"""
+    try:
+        lines = []
+        for doc in cursor:
+            lines.append(json.dumps(doc, default=str))
+            if len(lines) >= ROWS_PER_CHUNK:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    finally:
+        cursor.close()
+
+def generate_csv(cursor, fields):
+    """Yield CSV chunks straight from a MongoDB cursor"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    try:
+        writer.writerow(fields)
+        rows = 0
+        for doc in cursor:
+            writer.writerow([_csv_value(doc.get(field)) for field in fields])
+            rows += 1
+            if rows >= ROWS_PER_CHUNK:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                rows = 0
+        yield buffer.getvalue()
+    finally:
+        cursor.close()
+
+def export_response(cursor, fmt, filename, fields):
+    """Wrap a cursor in a streamed NDJSON or CSV download response"""
+    if fmt == "csv":
+        body = generate_csv(cursor, fields)
+    else:
+        body = generate_ndjson(cursor)
+
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"}
+    )
@@ -0,0 +1,122 @@
+# utils/student_search.py
+"""In-process prefix index over student names and ids for autocomplete.
+
+Names are normalized (accents removed, case folded, spaces collapsed) and
+kept in sorted lists, so the students matching a prefix are one binary
+search followed by a walk of at most `limit` entries:
+
+    names   full names           "juan dela cruz"   ranked first
+    words   every later word     "dela cruz", "cruz"
+    ids     student ids as text  "20231042"         when the prefix is a number
+
+Results come in that order, alphabetical within each list, capped at
+`limit`. A lookup never touches MongoDB. Students are written by the
+bulk importer (route and CLI) and the synthetic seeder, which all bump
+the global entity version (utils/entity_cache.py), so each worker checks
+that version at most every SEARCH_REFRESH_SECONDS and reloads the index
+when it moves.
+"""
+import os
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from utils.entity_cache import get_versions, GLOBAL_VERSION
+
+REFRESH_INTERVAL = float(os.getenv('SEARCH_REFRESH_SECONDS', 5))
+LOAD_BATCH_SIZE = 5000
+
+def normalize(text):
+    """Lower-case, accent-free, single-spaced form used for matching"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+class StudentIndex:
+    def __init__(self, students, version=None):
+        """`students` is an iterable of (student_id, name, course)"""
+        self.version = version
+        self.students = {}
+        names, words, ids = [], [], []
+        for student_id, name, course in students:
+            self.students[student_id] = (name, course)
+            normalized = normalize(name)
+            names.append((normalized, student_id))
+            # Suffixes starting at each later word, so "cruz" and "dela cruz" both match
+            parts = normalized.split(" ")
+            for i in range(1, len(parts)):
+                words.append((" ".join(parts[i:]), student_id))
+            ids.append((str(student_id), student_id))
+        self.names = sorted(names)
+        self.words = sorted(words)
+        self.ids = sorted(ids)
+
+    def __len__(self):
+        return len(self.students)
+
+    @classmethod
+    def load(cls, db, version=None):
+        cursor = db.students.find({}, {"_id": 1, "Name": 1, "Course": 1}).batch_size(LOAD_BATCH_SIZE)
+        return cls(((s["_id"], s.get("Name"), s.get("Course")) for s in cursor), version)
+
+    @staticmethod
+    def _walk(entries, prefix):
+        """Student ids of the entries starting with `prefix`, in order"""
+        i = bisect_left(entries, (prefix,))
+        while i < len(entries) and entries[i][0].startswith(prefix):
+            yield entries[i][1]
+            i += 1
+
+    def search(self, prefix, limit=10):
+        """Up to `limit` students as dicts, full-name matches first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        sources = [("name", self.names), ("word", self.words)]
+        if prefix.isdigit():
+            sources.insert(0, ("id", self.ids))
+
+        results, seen = [], set()
+        for matched, entries in sources:
+            for student_id in self._walk(entries, prefix):
+                if student_id in seen:
+                    continue
+                seen.add(student_id)
+                name, course = self.students[student_id]
+                results.append({"student_id": student_id, "name": name, "course": course, "matched": matched})
+                if len(results) == limit:
+                    return results
+        return results
+
+class StudentSearch:
+    def __init__(self):
+        self.after_fork()
+        self.index = None
+
+    def after_fork(self):
+        # An index inherited from the preloading parent stays valid
+        self.lock = threading.Lock()
+        self.checked_at = 0.0
+
+    def get(self, db):
+        """The current index, reloaded if the students changed"""
+        index = self.index
+        if index is not None and time.monotonic() - self.checked_at < REFRESH_INTERVAL:
+            return index
+
+        version = get_versions(db, [])[GLOBAL_VERSION]
+        with self.lock:
+            if self.index is None or self.index.version != version:
+                started = time.perf_counter()
+                self.index = StudentIndex.load(db, version)
+                print(f"✅ Student search index: {len(self.index)} students in {time.perf_counter() - started:.2f}s")
+            self.checked_at = time.monotonic()
+            return self.index
+
+    def search(self, db, prefix, limit=10):
+        return self.get(db).search(prefix, limit)
+
+    def warm_start(self, db):
+        return {"students": len(self.get(db))}
+
+student_search = StudentSearch()
@@ -0,0 +1,102 @@
+# utils/warmup.py
+"""Warm a worker before it accepts traffic.
+
+Opens the connections the worker's threads will need, loads the small
+reference collections, maps the analytics snapshot (when enabled), loads
+the student search index, and renders the most requested pages (see
+utils/cache_warmer.py) through the test client so they are already in
+this worker's response cache.
+"""
+import os
+import threading
+import time
+
+# Requests carrying this header are not written to request_logs
+WARMUP_HEADER = "X-Cache-Warmup"
+
+# Seconds any single warm-up step may take before it is abandoned
+WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', 10))
+
+# Pages cached when request_logs and semesters give nothing better
+WARMUP_PATHS = [
+    "/home/",
+    "/students/at_risk",
+    "/subjects/analytics",
+    "/students/performance/all"
+]
+
+def prime_connection_pool(db, connections):
+    """Check out `connections` pooled sockets at once so none are opened on first use"""
+    import pymongo
+
+    barrier = threading.Barrier(connections)
+    errors = []
+
+    def ping():
+        try:
+            with pymongo.timeout(WARMUP_TIMEOUT):
+                # Ping all at once so each thread needs its own connection
+                barrier.wait(WARMUP_TIMEOUT)
+                db.command('ping')
+        except Exception as e:
+            errors.append(e)
+            barrier.abort()
+
+    threads = [threading.Thread(target=ping) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def load_reference_data(db):
+    """Pull the small lookup collections into the server's cache"""
+    import pymongo
+
+    with pymongo.timeout(WARMUP_TIMEOUT):
+        return {
+            "semesters": len(list(db.semesters.find({}, {"_id": 1, "Semester": 1, "SchoolYear": 1}))),
+            "subjects": len(list(db.subjects.find({}, {"_id": 1, "Description": 1, "Units": 1})))
+        }
+
+def warm_cache(app, db, concurrency):
+    """Render the most requested pages through the test client so their responses are cached"""
+    import pymongo
+    from utils.cache_warmer import warm_urls, fetch_all
+
+    with pymongo.timeout(WARMUP_TIMEOUT):
+        paths = warm_urls(db) or WARMUP_PATHS
+    # No live traffic yet, so every thread can help
+    return fetch_all(app, paths, concurrency)
+
+def warm_up(app, connections=4):
+    """Run the warm-up steps, reporting failures without stopping the worker"""
+    from db.mongodb import get_db
+    from utils.analytics_snapshot import analytics
+    from utils.student_search import student_search
+
+    started = time.perf_counter()
+    report = {}
+    with app.app_context():
+        db = get_db()
+        try:
+            prime_connection_pool(db, connections)
+            report["connections"] = connections
+        except Exception as e:
+            # No point loading data from a database we cannot reach
+            report["connections"] = f"failed: {e}"
+        else:
+            steps = (
+                ("reference", lambda: load_reference_data(db)),
+                ("analytics_snapshot", lambda: analytics.warm_start(app)),
+                ("student_search", lambda: student_search.warm_start(db)),
+                ("cached_pages", lambda: warm_cache(app, db, connections))
+            )
+            for name, step in steps:
+                try:
+                    report[name] = step()
+                except Exception as e:
+                    report[name] = f"failed: {e}"
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report
@@ -0,0 +1,241 @@
+"""Pipelines under benchmark and alternative implementations of each.
+
+Every case names the collection it runs against, a function that picks
+its parameters from the seeded database, and one or more variants.
+"current" always builds the pipeline the app runs today (from the route
+or job module); other variants are candidates to compare against it.
+Pipelines ending in $merge write to the scratch collection passed as
+`into`, never to the real derived collections.
+"""
+from routes.students.at_risk import build_at_risk_pipeline
+from routes.students.subjects import build_subjects_pipeline
+from routes.students.performance import build_grades_pipeline, build_performance_list_pipeline
+from routes.students.timeline import build_timeline_pipeline
+from routes.subjects.analytics import build_analytics_pipeline
+from utils.student_gpa_aggregator import build_semester_gpa_pipeline
+from utils.grading_scales import PH_SCALE
+from utils.class_average_updater import build_class_average_pipeline, build_semester_metrics_pipeline, PASSING_GRADE
+
+PAGE_SIZE = 10
+SEARCH_TERM = "San"
+
+def pick_params(db):
+    """A typical student and semester taken from the middle of the data"""
+    total = db.grades.estimated_document_count()
+    doc = next(db.grades.find({}, {"StudentID": 1, "SemesterID": 1}).sort([("StudentID", 1), ("SemesterID", 1)])
+               .skip(total // 2).limit(1), None)
+    if doc is None:
+        raise ValueError("grades collection is empty; seed it with python -m db.seed_synthetic")
+    latest = db.semesters.find_one(sort=[("_id", -1)])
+    return {
+        "student_id": doc["StudentID"],
+        "student_semester_id": doc["SemesterID"],
+        "semester_id": latest["_id"]
+    }
+
+def _page(pipeline):
+    return pipeline + [{"$skip": 0}, {"$limit": PAGE_SIZE}]
+
+# --- at_risk -------------------------------------------------------------
+
+def at_risk_page_before_lookup(params, into):
+    """Page the grade documents first so only one page is joined"""
+    pipeline = build_at_risk_pipeline(params["semester_id"])
+    return pipeline[:1] + [{"$skip": 0}, {"$limit": PAGE_SIZE}] + pipeline[1:]
+
+def at_risk_min_expr(params, into):
+    """Test the lowest grade with $expr instead of $elemMatch"""
+    pipeline = build_at_risk_pipeline(params["semester_id"])
+    pipeline[0] = {"$match": {
+        "SemesterID": params["semester_id"],
+        "$expr": {"$lt": [{"$min": "$Grades"}, 80]}
+    }}
+    return _page(pipeline)
+
+# --- subject analytics ---------------------------------------------------
+
+def analytics_page_before_lookup(params, into):
+    """Sort and page class_averages before joining subjects"""
+    pipeline = build_analytics_pipeline({"semester_id": params["semester_id"]})
+    match, lookup, unwind, project, sort = pipeline
+    return [match, sort, {"$skip": 0}, {"$limit": PAGE_SIZE}, lookup, unwind, project]
+
+# --- student subjects ----------------------------------------------------
+
+def subjects_zip(params, into):
+    """Pair codes with grades via $zip instead of a double $unwind"""
+    pipeline = build_subjects_pipeline(params["student_id"])
+    return pipeline[:1] + [
+        {"$project": {"pairs": {"$zip": {"inputs": ["$SubjectCodes", "$Grades"]}}}},
+        {"$unwind": "$pairs"},
+        {"$project": {
+            "SubjectCodes": {"$arrayElemAt": ["$pairs", 0]},
+            "Grades": {"$arrayElemAt": ["$pairs", 1]}
+        }}
+    ] + pipeline[4:]
+
+# --- derived collections -------------------------------------------------
+
+def semester_gpas_double_unwind(params, into):
+    """The original index-matched double $unwind pairing"""
+    pipeline = build_semester_gpa_pipeline(into)
+    return [
+        {"$unwind": {"path": "$SubjectCodes", "includeArrayIndex": "idx"}},
+        {"$unwind": {"path": "$Grades", "includeArrayIndex": "gidx"}},
+        {"$match": {"$expr": {"$eq": ["$idx", "$gidx"]}}},
+        {"$project": {"StudentID": 1, "SemesterID": 1, "subject_code": "$SubjectCodes", "grade": "$Grades"}}
+    ] + pipeline[3:]
+
+def semester_gpas_lookup_once(params, into):
+    """Join subjects once per grade document instead of once per grade"""
+    return [
+        {"$lookup": {
+            "from": "subjects",
+            "localField": "SubjectCodes",
+            "foreignField": "_id",
+            "as": "subjects"
+        }},
+        {"$project": {
+            "StudentID": 1,
+            "SemesterID": 1,
+            "units": {"$map": {
+                "input": "$SubjectCodes",
+                "as": "code",
+                "in": {"$arrayElemAt": [
+                    "$subjects.Units", {"$indexOfArray": ["$subjects._id", "$$code"]}
+                ]}
+            }},
+            "Grades": 1
+        }},
+        {"$project": {
+            "_id": 0,
+            "student_id": "$StudentID",
+            "semester_id": "$SemesterID",
+            "total_units": {"$sum": "$units"},
+            "weighted_sum": {"$sum": {"$map": {
+                "input": {"$zip": {"inputs": ["$Grades", "$units"]}},
+                "as": "pair",
+                "in": {"$multiply": [{"$arrayElemAt": ["$$pair", 0]}, {"$arrayElemAt": ["$$pair", 1]}]}
+            }}}
+        }},
+        {"$project": {
+            "student_id": 1,
+            "semester_id": 1,
+            "total_units": 1,
+            "weighted_average": {"$cond": [
+                {"$gt": ["$total_units", 0]},
+                {"$divide": ["$weighted_sum", "$total_units"]},
+                0
+            ]}
+        }},
+        {"$addFields": {"gpa": PH_SCALE.switch("$weighted_average")}},
+        build_semester_gpa_pipeline(into)[-1]
+    ]
+
+def class_averages_double_unwind(params, into):
+    """The original index-matched double $unwind pairing"""
+    pipeline = build_class_average_pipeline(into)
+    return [
+        {"$unwind": {"path": "$SubjectCodes", "includeArrayIndex": "idx"}},
+        {"$unwind": {"path": "$Grades", "includeArrayIndex": "gidx"}},
+        {"$match": {"$expr": {"$eq": ["$idx", "$gidx"]}}},
+        {"$project": {"SemesterID": 1, "subject_code": "$SubjectCodes", "grade": "$Grades"}}
+    ] + pipeline[3:]
+
+def semester_metrics_reduce(params, into):
+    """Summarise each document's grade array before grouping"""
+    pipeline = build_semester_metrics_pipeline(into)
+    return [
+        {"$project": {
+            "SemesterID": 1,
+            "sum": {"$sum": "$Grades"},
+            "top": {"$max": "$Grades"},
+            "count": {"$size": "$Grades"},
+            "passing": {"$size": {"$filter": {"input": "$Grades", "cond": {"$gte": ["$$this", PASSING_GRADE]}}}}
+        }},
+        {"$group": {
+            "_id": "$SemesterID",
+            "sum": {"$sum": "$sum"},
+            "top_grade": {"$max": "$top"},
+            "passing": {"$sum": "$passing"},
+            "total": {"$sum": "$count"}
+        }},
+        {"$addFields": {"average_grade": {"$divide": ["$sum", "$total"]}}}
+    ] + pipeline[2:]
+
+CASES = {
+    "at_risk": {
+        "collection": "grades",
+        "variants": {
+            "current": lambda p, into: _page(build_at_risk_pipeline(p["semester_id"])),
+            "page_before_lookup": at_risk_page_before_lookup,
+            "min_expr": at_risk_min_expr
+        }
+    },
+    "at_risk_search": {
+        "collection": "grades",
+        "variants": {
+            "current": lambda p, into: _page(build_at_risk_pipeline(p["semester_id"], SEARCH_TERM))
+        }
+    },
+    "subject_analytics": {
+        "collection": "class_averages",
+        "variants": {
+            "current": lambda p, into: _page(build_analytics_pipeline({"semester_id": p["semester_id"]})),
+            "page_before_lookup": analytics_page_before_lookup
+        }
+    },
+    "student_subjects": {
+        "collection": "grades",
+        "variants": {
+            "current": lambda p, into: build_subjects_pipeline(p["student_id"]),
+            "zip": subjects_zip
+        }
+    },
+    "student_performance": {
+        "collection": "grades",
+        "variants": {
+            "current": lambda p, into: build_grades_pipeline(p["student_id"], p["student_semester_id"])
+        }
+    },
+    "performance_list": {
+        "collection": "students",
+        "variants": {
+            "current": lambda p, into: build_performance_list_pipeline("student_id", 1, 0, 200, p["semester_id"])
+        }
+    },
+    "performance_by_gpa": {
+        "collection": "student_gpas",
+        "variants": {
+            "current": lambda p, into: build_performance_list_pipeline("gpa", 1, 0, 200, p["semester_id"])
+        }
+    },
+    "student_timeline": {
+        "collection": "grades",
+        "variants": {
+            "current": lambda p, into: build_timeline_pipeline(p["student_id"])
+        }
+    },
+    "semester_gpas": {
+        "collection": "grades",
+        "variants": {
+            "current": lambda p, into: build_semester_gpa_pipeline(into),
+            "double_unwind": semester_gpas_double_unwind,
+            "lookup_once": semester_gpas_lookup_once
+        }
+    },
+    "class_averages": {
+        "collection": "grades",
+        "variants": {
+            "current": lambda p, into: build_class_average_pipeline(into),
+            "double_unwind": class_averages_double_unwind
+        }
+    },
+    "semester_metrics": {
+        "collection": "grades",
+        "variants": {
+            "current": lambda p, into: build_semester_metrics_pipeline(into),
+            "reduce_first": semester_metrics_reduce
+        }
+    }
+}
@@ -0,0 +1,237 @@
+"""Run each aggregation pipeline in isolation at several dataset scales.
+
+Each scale gets its own seeded database (CSELEC3DB_bench_<students>),
+generated with db.seed_synthetic on first use and reused afterwards.
+For every case and variant the runner records the median wall time over
+--repeat runs, docs/keys examined and server-side accumulator memory from
+explain("executionStats"), and the client-side peak memory used to read
+the results. Results are compared with the JSON baseline and any metric
+worse than the baseline by more than --tolerance is flagged:
+
+    python benchmarks/run_benchmarks.py --scales 1000 10000 --update-baseline
+    python benchmarks/run_benchmarks.py --scales 1000 10000
+    python benchmarks/run_benchmarks.py --cases semester_gpas --variants current lookup_once
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pymongo import MongoClient
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(
+    os.path.dirname(BENCH_DIR),
+    "Distributed Student Performance Analytics System",
+    "Distributed Analytics System"
+)
+sys.path.insert(0, APP_DIR)
+
+from cases import CASES, pick_params
+from db.query_audit import explain_command, summarize_explain, _walk
+from db.seed_synthetic import seed_database
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_SCALES = [1000, 10000]
+DEFAULT_TOLERANCE = 0.25
+# Wall times under this many ms are too noisy to flag
+MIN_FLAGGED_MS = 5.0
+# Lower is better for every tracked metric
+TRACKED_METRICS = ["median_ms", "docs_examined", "keys_examined", "server_memory_bytes", "client_peak_bytes"]
+
+def bench_dbname(scale):
+    return f"CSELEC3DB_bench_{scale}"
+
+def ensure_dataset(client, uri, scale, reseed=False):
+    db = client[bench_dbname(scale)]
+    if reseed or db.students.estimated_document_count() != scale:
+        print(f"Seeding {scale} students into {db.name}...")
+        seed_database(uri, db.name, students=scale, drop=True)
+    return db
+
+def _prepare_output(db, pipeline):
+    """Empty the scratch collection a $merge stage writes to"""
+    last = pipeline[-1] if pipeline else {}
+    if "$merge" not in last:
+        return
+    merge = last["$merge"]
+    db[merge["into"]].drop()
+    on = merge.get("on", "_id")
+    on = [on] if isinstance(on, str) else on
+    if on != ["_id"]:
+        db[merge["into"]].create_index([(field, 1) for field in on], unique=True)
+
+def memory_stats(explain):
+    """Largest accumulator memory reported by any stage, and whether it spilled to disk"""
+    stats = {"server_memory_bytes": 0, "used_disk": False}
+
+    def visit(node, context):
+        usage = node.get("maxAccumulatorMemoryUsageBytes")
+        if isinstance(usage, dict):
+            total = sum(v for v in usage.values() if isinstance(v, (int, float)))
+            stats["server_memory_bytes"] = max(stats["server_memory_bytes"], total)
+        peak = node.get("peakTrackedMemBytes")
+        if isinstance(peak, (int, float)):
+            stats["server_memory_bytes"] = max(stats["server_memory_bytes"], peak)
+        if node.get("usedDisk") or node.get("spills"):
+            stats["used_disk"] = True
+
+    _walk(explain, visit)
+    return stats
+
+def run_variant(db, collection, pipeline, repeat):
+    # Warm-up run so the working set is in cache
+    _prepare_output(db, pipeline)
+    list(db[collection].aggregate(pipeline, allowDiskUse=True))
+
+    timings = []
+    for _ in range(repeat):
+        _prepare_output(db, pipeline)
+        started = time.perf_counter()
+        list(db[collection].aggregate(pipeline, allowDiskUse=True))
+        timings.append((time.perf_counter() - started) * 1000)
+
+    _prepare_output(db, pipeline)
+    tracemalloc.start()
+    rows = list(db[collection].aggregate(pipeline, allowDiskUse=True))
+    client_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # explain cannot run $merge in executionStats mode; the reads are the same without it
+    read_pipeline = [stage for stage in pipeline if "$merge" not in stage and "$out" not in stage]
+    explain = explain_command(db, {"aggregate": collection, "pipeline": read_pipeline, "cursor": {}})
+    summary = summarize_explain(explain)
+
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "returned": len(rows),
+        "docs_examined": summary["docs_examined"],
+        "keys_examined": summary["keys_examined"],
+        "collscans": summary["collscans"],
+        "client_peak_bytes": client_peak,
+        **memory_stats(explain)
+    }
+
+def run_scale(db, case_names, variant_names, repeat):
+    params = pick_params(db)
+    results = {}
+    for case_name in case_names:
+        case = CASES[case_name]
+        results[case_name] = {}
+        for variant_name, build in case["variants"].items():
+            if variant_names and variant_name not in variant_names:
+                continue
+            pipeline = build(params, f"bench_{case_name}")
+            try:
+                results[case_name][variant_name] = run_variant(db, case["collection"], pipeline, repeat)
+            except Exception as e:
+                results[case_name][variant_name] = {"error": str(e)}
+        db[f"bench_{case_name}"].drop()
+    return {"params": params, "cases": results}
+
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for scale, scale_results in results["scales"].items():
+        for case_name, variants in scale_results["cases"].items():
+            for variant_name, metrics in variants.items():
+                previous = baseline.get("scales", {}).get(scale, {}).get("cases", {}).get(case_name, {}).get(variant_name)
+                if not previous or "error" in previous or "error" in metrics:
+                    continue
+                for metric in TRACKED_METRICS:
+                    old, new = previous.get(metric), metrics.get(metric)
+                    if not old or new is None:
+                        continue
+                    if metric == "median_ms" and new < MIN_FLAGGED_MS:
+                        continue
+                    if new > old * (1 + tolerance):
+                        regressions.append({
+                            "scale": scale,
+                            "case": case_name,
+                            "variant": variant_name,
+                            "metric": metric,
+                            "baseline": old,
+                            "current": new,
+                            "change": round((new - old) / old * 100, 1)
+                        })
+    return regressions
+
+def print_table(results, baseline):
+    for scale, scale_results in results["scales"].items():
+        print(f"\n== {scale} students ==")
+        print(f"{'case':22} {'variant':20} {'median ms':>10} {'baseline':>10} {'docs exam':>10} {'returned':>9} {'mem KB':>9}")
+        for case_name, variants in scale_results["cases"].items():
+            for variant_name, metrics in variants.items():
+                if "error" in metrics:
+                    print(f"{case_name:22} {variant_name:20} ERROR {metrics['error']}")
+                    continue
+                previous = baseline.get("scales", {}).get(scale, {}).get("cases", {}).get(case_name, {}).get(variant_name, {})
+                print(f"{case_name:22} {variant_name:20} {metrics['median_ms']:>10} {str(previous.get('median_ms', '-')):>10} "
+                      f"{metrics['docs_examined']:>10} {metrics['returned']:>9} "
+                      f"{metrics['server_memory_bytes'] // 1024:>9}{' (disk)' if metrics['used_disk'] else ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's aggregation pipelines at several scales")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="students per seeded dataset")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), help="only run these cases")
+    parser.add_argument("--variants", nargs="+", help="only run these variants (e.g. current)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per variant")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown as a fraction")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="save this run as the new baseline")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--reseed", action="store_true", help="regenerate the datasets")
+    args = parser.parse_args()
+
+    uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+    client = MongoClient(uri)
+    case_names = args.cases or list(CASES)
+
+    results = {"timestamp": datetime.utcnow().isoformat(), "repeat": args.repeat, "scales": {}}
+    for scale in args.scales:
+        db = ensure_dataset(client, uri, scale, args.reseed)
+        print(f"Running {len(case_names)} cases against {db.name}...")
+        results["scales"][str(scale)] = run_scale(db, case_names, args.variants, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        # Keep baseline entries for scales and cases not run this time
+        for scale, scale_results in results["scales"].items():
+            target = baseline.setdefault("scales", {}).setdefault(scale, {"cases": {}})
+            target["params"] = scale_results["params"]
+            for case_name, variants in scale_results["cases"].items():
+                target["cases"].setdefault(case_name, {}).update(variants)
+        baseline["timestamp"] = results["timestamp"]
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if not baseline:
+        print("\nNo baseline yet; run with --update-baseline to record one")
+        return 0
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%}:")
+        for r in regressions:
+            print(f"  {r['scale']} {r['case']}/{r['variant']} {r['metric']}: {r['baseline']} -> {r['current']} (+{r['change']}%)")
+        return 1
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,257 @@
+"""Concurrent load test that replays the Flutter client's traffic mix.
+
+Runs a warm-up phase (results discarded) followed by a steady-state phase
+and writes throughput, latency percentiles, error rate and cache hit ratio
+per endpoint to a JSON file, so runs can be compared:
+
+    python load_harness.py --concurrency 16 --duration 60 --output run.json
+    python load_harness.py --compare baseline.json --output run.json
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime
+import requests
+
+# Relative weights of each request type, modelled on the Flutter screens
+DEFAULT_MIX = {
+    "at_risk": 25,          # StudentAtRisk.dart paging by semester
+    "at_risk_search": 10,   # StudentAtRisk.dart search box
+    "analytics": 15,        # SubjectAnalytics.dart paging by semester
+    "analytics_year": 5,
+    "home": 15,             # main.dart school-year summary
+    "performance": 15,      # SubjectPerformance.dart / ModifyData.dart student detail
+    "performance_all": 10,  # SubjectPerformance.dart student list
+    "batch_update": 5       # ModifyData.dart grade submission
+}
+
+class Sample:
+    """Ids and names discovered from the running API"""
+
+    def __init__(self, base_url):
+        at_risk = requests.get(f"{base_url}/students/at_risk", params={"per_page": 100}, timeout=60).json()
+        home = requests.get(f"{base_url}/home/", timeout=60).json()
+
+        self.semesters = [s["semester_id"] for s in at_risk.get("semesters", [])]
+        self.school_years = home.get("school_years", [])
+        self.grade_docs = [
+            {
+                "student_id": doc["StudentID"],
+                "semester_id": doc["SemesterID"],
+                "subject_codes": doc["SubjectCodes"],
+                "grades": doc["Grades"]
+            }
+            for doc in at_risk.get("data", [])
+        ]
+        self.search_terms = sorted({
+            doc["student"]["Name"].split()[0][:4]
+            for doc in at_risk.get("data", [])
+            if doc.get("student", {}).get("Name")
+        })
+
+        if not self.semesters or not self.grade_docs:
+            raise SystemExit("Could not discover semesters and students from /students/at_risk; is the database seeded?")
+
+def build_request(kind, sample, rng):
+    """Return (method, path, params, json_body) for one request of the given kind"""
+    semester_id = rng.choice(sample.semesters)
+    page = rng.choice([1, 1, 1, 2, 3])
+
+    if kind == "at_risk":
+        return "GET", "/students/at_risk", {"page": page, "per_page": 10, "semester_id": semester_id}, None
+    if kind == "at_risk_search":
+        term = rng.choice(sample.search_terms or ["a"])
+        return "GET", "/students/at_risk", {"page": 1, "per_page": 10, "semester_id": semester_id, "search": term}, None
+    if kind == "analytics":
+        return "GET", "/subjects/analytics", {"page": page, "per_page": 10, "semester_id": semester_id}, None
+    if kind == "analytics_year":
+        return "GET", "/subjects/analytics", {"page": 1, "per_page": 10, "year": rng.choice(sample.school_years)}, None
+    if kind == "home":
+        return "GET", "/home/", {"sy": rng.choice(sample.school_years)}, None
+    if kind == "performance":
+        doc = rng.choice(sample.grade_docs)
+        return "GET", f"/students/performance/{doc['student_id']}", {"semester_id": doc["semester_id"]}, None
+    if kind == "performance_all":
+        return "GET", "/students/performance/all", {"page": page}, None
+    if kind == "batch_update":
+        # Re-submits current grades so repeated runs leave the data unchanged
+        doc = rng.choice(sample.grade_docs)
+        updates = [
+            {
+                "student_id": doc["student_id"],
+                "subject_code": code,
+                "semester_id": doc["semester_id"],
+                "new_grade": grade
+            }
+            for code, grade in list(zip(doc["subject_codes"], doc["grades"]))[:2]
+        ]
+        return "POST", "/students/modify/batch-update-grades", None, updates
+    raise ValueError(f"Unknown request kind: {kind}")
+
+def scrape_cache_counters(base_url):
+    """Read cache hit/miss totals from /metrics (None if unavailable)"""
+    try:
+        text = requests.get(f"{base_url}/metrics", timeout=10).text
+    except requests.exceptions.RequestException:
+        return None
+    counters = {"hit": 0.0, "miss": 0.0}
+    for line in text.splitlines():
+        if line.startswith("cache_requests_total{"):
+            labels, value = line.rsplit(" ", 1)
+            for result in counters:
+                if f'result="{result}"' in labels:
+                    counters[result] += float(value)
+    return counters
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def run_phase(base_url, sample, mix, concurrency, seconds, seed):
+    """Drive the mix from concurrent threads for a number of seconds"""
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    results = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        local = []
+        try:
+            while time.perf_counter() < deadline:
+                kind = rng.choices(kinds, weights)[0]
+                method, path, params, body = build_request(kind, sample, rng)
+                start = time.perf_counter()
+                try:
+                    response = session.request(method, f"{base_url}{path}", params=params, json=body, timeout=60)
+                    status = response.status_code
+                except requests.exceptions.RequestException:
+                    status = None
+                local.append((kind, time.perf_counter() - start, status))
+        except Exception as e:
+            print(f"❌ Load worker {index} stopped early: {e}")
+        finally:
+            # Requests made before a failure still count
+            with lock:
+                results.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def summarize(results, seconds):
+    def stats(rows):
+        latencies = sorted(latency * 1000 for _, latency, _ in rows)
+        # Connection failures and every 4xx/5xx; a rejected request is not a served one
+        errors = sum(1 for _, _, status in rows if status is None or status >= 400)
+        return {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / seconds, 2),
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 2) if rows else None,
+            "p95_ms": round(percentile(latencies, 95), 2) if rows else None,
+            "p99_ms": round(percentile(latencies, 99), 2) if rows else None,
+            "max_ms": round(latencies[-1], 2) if rows else None
+        }
+
+    by_kind = {}
+    for row in results:
+        by_kind.setdefault(row[0], []).append(row)
+
+    return {
+        "overall": stats(results),
+        "endpoints": {kind: stats(rows) for kind, rows in sorted(by_kind.items())}
+    }
+
+def compare(report, baseline):
+    """Print p95 and throughput changes against a previous run"""
+    print(f"\n{'endpoint':18} {'p95 ms':>20} {'throughput rps':>24}")
+    rows = [("overall", report["overall"], baseline.get("overall", {}))]
+    rows += [
+        (kind, stats, baseline.get("endpoints", {}).get(kind, {}))
+        for kind, stats in report["endpoints"].items()
+    ]
+    for kind, now, then in rows:
+        def change(key):
+            if now.get(key) is None or not then.get(key):
+                return f"{now.get(key)}"
+            return f"{then[key]} -> {now[key]} ({(now[key] - then[key]) / then[key] * 100:+.1f}%)"
+        print(f"{kind:18} {change('p95_ms'):>20} {change('throughput_rps'):>24}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the Flutter client traffic mix against the API")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=float, default=10, help="warm-up seconds (not reported)")
+    parser.add_argument("--duration", type=float, default=30, help="steady-state seconds")
+    parser.add_argument("--mix", help="JSON file of request kind -> weight overriding the default mix")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    mix = dict(DEFAULT_MIX)
+    if args.mix:
+        with open(args.mix) as f:
+            mix = {kind: weight for kind, weight in json.load(f).items() if weight > 0}
+
+    print(f"Discovering sample data from {args.base_url}...")
+    sample = Sample(args.base_url)
+
+    print(f"Warm-up: {args.warmup}s with {args.concurrency} clients")
+    run_phase(args.base_url, sample, mix, args.concurrency, args.warmup, args.seed)
+
+    before = scrape_cache_counters(args.base_url)
+    print(f"Steady state: {args.duration}s with {args.concurrency} clients")
+    started = time.perf_counter()
+    results = run_phase(args.base_url, sample, mix, args.concurrency, args.duration, args.seed + 1)
+    elapsed = time.perf_counter() - started
+    after = scrape_cache_counters(args.base_url)
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "config": {
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "warmup_seconds": args.warmup,
+            "duration_seconds": args.duration,
+            "seed": args.seed,
+            "mix": mix
+        },
+        **summarize(results, elapsed),
+        "cache_hit_ratio": None
+    }
+    if before and after:
+        hits = after["hit"] - before["hit"]
+        lookups = hits + after["miss"] - before["miss"]
+        report["cache_hit_ratio"] = round(hits / lookups, 4) if lookups else None
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    overall = report["overall"]
+    print(f"\n{overall['requests']} requests, {overall['throughput_rps']} req/s, "
+          f"p50 {overall['p50_ms']}ms, p95 {overall['p95_ms']}ms, p99 {overall['p99_ms']}ms, "
+          f"errors {overall['error_rate'] * 100:.2f}%, cache hit ratio {report['cache_hit_ratio']}")
+    for kind, stats in report["endpoints"].items():
+        print(f"  {kind:18} {stats['requests']:6} req  p50 {stats['p50_ms']:>8}ms  p95 {stats['p95_ms']:>8}ms  "
+              f"p99 {stats['p99_ms']:>8}ms  errors {stats['error_rate'] * 100:.2f}%")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
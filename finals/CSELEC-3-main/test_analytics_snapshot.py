@@ -0,0 +1,150 @@
+import os
+import sys
+import numpy as np
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "Distributed Student Performance Analytics System",
+    "Distributed Analytics System"
+)
+sys.path.insert(0, APP_DIR)
+
+from utils.analytics_snapshot import GradeSnapshot
+from utils.snapshot_store import load_snapshot, save_snapshot
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def sort(self, field, direction=1):
+        return FakeCursor(sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+class FakeCollection:
+    """Just the find/find_one GradeSnapshot.build uses; filters and projections are ignored"""
+
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def find(self, *args, **kwargs):
+        return FakeCursor(self.docs)
+
+    def find_one(self, *args, **kwargs):
+        return self.docs[0] if self.docs else None
+
+class FakeDb:
+    def __init__(self, **collections):
+        self.collections = {name: FakeCollection(docs) for name, docs in collections.items()}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def __getattr__(self, name):
+        return self[name]
+
+def fake_db():
+    return FakeDb(
+        counters=[{"_id": "grade_changes", "seq": 7}],
+        semesters=[
+            {"_id": 2, "Semester": "SECOND", "SchoolYear": "2023-2024"},
+            {"_id": 1, "Semester": "FIRST", "SchoolYear": "2023-2024"}
+        ],
+        subjects=[
+            {"_id": "MATH1", "Description": "Calculus", "Units": 5},
+            {"_id": "CS101", "Description": "Programming"}
+        ],
+        students=[
+            {"_id": 7, "Name": "Cy", "Course": "BSCS"},
+            {"_id": 3, "Name": "Ana", "Course": "BSCS"},
+            {"_id": 1, "Name": "Ben", "Course": "BSIT"}
+        ],
+        # Out of order on purpose; student 5 and PE1 are only known from grades
+        grades=[
+            {"StudentID": 3, "SemesterID": 2, "SubjectCodes": ["MATH1", "CS101"], "Grades": [88, 72]},
+            {"StudentID": 1, "SemesterID": 1, "SubjectCodes": ["CS101"], "Grades": [90]},
+            {"StudentID": 5, "SemesterID": 1, "SubjectCodes": ["PE1", "CS101"], "Grades": [95, 60]},
+            {"StudentID": 3, "SemesterID": 1, "SubjectCodes": ["CS101"], "Grades": [81]}
+        ]
+    )
+
+# (student_id, semester_id, subject_code, grade) in row order
+ROWS = [
+    (1, 1, "CS101", 90),
+    (3, 1, "CS101", 81),
+    (3, 2, "CS101", 72),
+    (3, 2, "MATH1", 88),
+    (5, 1, "CS101", 60),
+    (5, 1, "PE1", 95)
+]
+
+def rows(snapshot):
+    return [
+        (int(snapshot.student_ids[student]), int(snapshot.semester_ids[semester]), snapshot.subject_codes[subject], int(grade))
+        for student, semester, subject, grade in zip(snapshot.student, snapshot.semester, snapshot.subject, snapshot.grade)
+    ]
+
+def grade_event(student_id, semester_id, subject_code, grade, seq=8):
+    return {"kind": "grade", "student_id": student_id, "semester_id": semester_id,
+            "subject_code": subject_code, "grade": grade, "seq": seq}
+
+def test_build_orders_rows_and_keys():
+    snapshot = GradeSnapshot.build(fake_db())
+
+    assert rows(snapshot) == ROWS
+    assert snapshot.watermark == 7
+    assert snapshot.student_ids.tolist() == [1, 3, 5, 7]
+    assert snapshot.student_names == ["Ben", "Ana", None, "Cy"]
+    assert [snapshot.courses[c] if c >= 0 else None for c in snapshot.student_course.tolist()] == ["BSIT", "BSCS", None, "BSCS"]
+    assert snapshot.semester_ids.tolist() == [1, 2]
+    assert snapshot.subject_codes == ["CS101", "MATH1", "PE1"]
+    assert snapshot.subject_known.tolist() == [True, True, False]
+    assert snapshot.units.tolist() == [3, 3, 3, 5, 3, 0]
+
+    assert np.all(np.diff(snapshot.row_keys) > 0)
+    for row, (student_id, semester_id, subject_code, _) in enumerate(ROWS):
+        key = snapshot._row_key(
+            snapshot.student_code(student_id), snapshot.semester_index[semester_id], snapshot.subject_index[subject_code])
+        assert snapshot.row_keys[row] == key
+
+def test_apply_updates_the_matching_row():
+    snapshot = GradeSnapshot.build(fake_db())
+
+    assert snapshot.apply(grade_event(3, 2, "CS101", 77))
+    assert rows(snapshot) == ROWS[:2] + [(3, 2, "CS101", 77)] + ROWS[3:]
+    assert snapshot.watermark == 8
+
+def test_apply_needs_a_rebuild_for_new_rows():
+    snapshot = GradeSnapshot.build(fake_db())
+
+    # Known student, semester and subject, but no such enrollment
+    assert not snapshot.apply(grade_event(1, 2, "CS101", 85))
+    assert not snapshot.apply(grade_event(9, 1, "CS101", 85))
+    assert not snapshot.apply({"kind": "reload", "seq": 8})
+    assert rows(snapshot) == ROWS
+    assert snapshot.watermark == 7
+
+def test_save_and_load_round_trip(tmp_path):
+    snapshot = GradeSnapshot.build(fake_db())
+    save_snapshot(snapshot, str(tmp_path))
+
+    loaded = load_snapshot(str(tmp_path))
+    assert loaded.source.startswith("disk:snapshot-7-")
+    assert loaded.watermark == 7
+    assert rows(loaded) == ROWS
+    assert loaded.row_keys.tolist() == snapshot.row_keys.tolist()
+    assert loaded.units.tolist() == snapshot.units.tolist()
+    assert loaded.student_course.tolist() == snapshot.student_course.tolist()
+    assert loaded.subject_known.tolist() == snapshot.subject_known.tolist()
+    assert [loaded.student_names[i] for i in range(len(loaded.student_names))] == ["Ben", "Ana", "", "Cy"]
+    assert loaded.subject_descriptions == ["Programming", "Calculus", None]
+
+    # The grade column is copy-on-write: applied changes stay in this process
+    assert loaded.grade.mode == "c"
+    assert loaded.apply(grade_event(3, 2, "CS101", 77))
+    assert rows(loaded)[2] == (3, 2, "CS101", 77)
+    assert rows(load_snapshot(str(tmp_path))) == ROWS
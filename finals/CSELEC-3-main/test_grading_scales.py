@@ -0,0 +1,44 @@
+import math
+import os
+import sys
+import numpy as np
+import pytest
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "Distributed Student Performance Analytics System",
+    "Distributed Analytics System"
+)
+sys.path.insert(0, APP_DIR)
+
+from utils.grading_scales import PH_SCALE, SCALES
+
+def eval_switch(expression, value):
+    """Evaluate a generated $switch the way MongoDB does: first matching branch wins"""
+    switch = expression["$switch"]
+    for branch in switch["branches"]:
+        threshold = branch["case"]["$gte"][1]
+        if value >= threshold:
+            return branch["then"]
+    return switch["default"]
+
+GRADES = sorted(set(
+    [round(g, 2) for g in np.arange(0, 100.01, 0.25)]
+    + [74.99, 75.0, math.nextafter(75.0, math.inf), 75.5, 75.99, 76.0, 95.999, 96.0]
+))
+
+@pytest.mark.parametrize("name", sorted(SCALES))
+def test_evaluators_agree(name):
+    scale = SCALES[name]
+    vectorized = scale.convert(GRADES)
+    expression = scale.switch("$weighted_average")
+    for grade, converted in zip(GRADES, vectorized):
+        assert scale.convert_one(grade) == converted == eval_switch(expression, grade), grade
+
+def test_ph_scale_exact_75_rule():
+    assert PH_SCALE.convert_one(75) == 3.00
+    assert PH_SCALE.convert_one(75.5) == 5.00
+    assert PH_SCALE.convert_one(74.99) == 5.00
+    assert PH_SCALE.convert_one(76) == 2.75
+    assert PH_SCALE.convert_one(96) == 1.00
+    assert list(PH_SCALE.convert([75, 75.5, float("nan")])) == [3.00, 5.00, 5.00]
@@ -0,0 +1,43 @@
+import os
+import sys
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "Distributed Student Performance Analytics System",
+    "Distributed Analytics System"
+)
+sys.path.insert(0, APP_DIR)
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+AUDIT_DBNAME = os.getenv("AUDIT_MONGO_DBNAME", "CSELEC3DB_audit")
+
+@pytest.fixture(scope="module")
+def audit_app():
+    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("MongoDB is not reachable")
+
+    from db.seed_synthetic import seed_database
+    result = seed_database(MONGO_URI, AUDIT_DBNAME, students=500, subjects=24, school_years=1, workers=1, drop=True)
+    assert not any(report["errors"] for report in result["indexes"].values())
+
+    os.environ["MONGO_URI"] = MONGO_URI
+    os.environ["MONGO_DBNAME"] = AUDIT_DBNAME
+    from app_factory import create_app
+    yield create_app()
+
+    client.drop_database(AUDIT_DBNAME)
+
+def test_route_queries_use_indexes(audit_app):
+    from db.query_audit import audit_routes, format_findings
+
+    findings = audit_routes(audit_app)
+    assert findings, "no route queries were captured"
+
+    failures = [f for f in findings if f["problems"]]
+    assert not failures, "\n" + format_findings(failures)
@@ -0,0 +1,51 @@
+import os
+import sys
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "Distributed Student Performance Analytics System",
+    "Distributed Analytics System"
+)
+sys.path.insert(0, APP_DIR)
+
+from utils.rankings import CohortRanking
+
+def cohort():
+    # Best first: 90 (5, 8), 85 (2, 3, 9), 70 (1)
+    return CohortRanking([5, 3, 8, 1, 9, 2], [90, 85, 90, 70, 85, 85])
+
+def test_competition_ranks():
+    ranking = cohort()
+    assert [int(ranking.rank(value)) for value in (90, 85, 70)] == [1, 3, 6]
+    # Averages outside the cohort rank after everyone above them
+    assert int(ranking.rank(95)) == 1
+    assert int(ranking.rank(80)) == 6
+    assert int(ranking.rank(60)) == 7
+
+def test_percentile_counts_half_the_ties():
+    ranking = cohort()
+    # (below + ties / 2) / 6
+    assert ranking.percentile(90) == 83.3
+    assert ranking.percentile(85) == 41.7
+    assert ranking.percentile(70) == 8.3
+    assert ranking.percentile(80) == 16.7
+    assert ranking.percentile(95) == 100.0
+
+def test_value_of():
+    ranking = cohort()
+    assert len(ranking) == 6
+    assert ranking.value_of(3) == 85.0
+    assert ranking.value_of(4) is None
+    assert ranking.value_of(10) is None
+
+def test_top_breaks_ties_by_student_id():
+    assert cohort().top(10) == [
+        (1, 5, 90.0), (1, 8, 90.0), (3, 2, 85.0), (3, 3, 85.0), (3, 9, 85.0), (6, 1, 70.0)
+    ]
+
+def test_top_with_offset():
+    ranking = cohort()
+    # Ranks stay cohort-wide, not relative to the page
+    assert ranking.top(2, offset=1) == [(1, 8, 90.0), (3, 2, 85.0)]
+    assert ranking.top(10, offset=4) == [(3, 9, 85.0), (6, 1, 70.0)]
+    assert ranking.top(10, offset=6) == []
@@ -0,0 +1,107 @@
+import os
+import sys
+from datetime import datetime
+import numpy as np
+import pytest
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "Distributed Student Performance Analytics System",
+    "Distributed Analytics System"
+)
+sys.path.insert(0, APP_DIR)
+
+from utils.analytics_snapshot import GradeSnapshot
+from utils.risk_scores import score_documents, score_snapshot
+
+def small_snapshot():
+    """Three students, all in one 3-unit subject; semester 1 is the latest on the calendar
+
+    Student 10 takes it in semesters 2, 3 and 1 (calendar order) with 90, 87
+    and 78; students 20 and 30 only in semester 2, with 70 and 80. Student 30
+    is missing from students.
+    """
+    columns = {
+        "student": np.array([0, 0, 0, 1, 2], dtype=np.int32),
+        "semester": np.array([0, 1, 2, 1, 1], dtype=np.int16),
+        "subject": np.zeros(5, dtype=np.int16),
+        "grade": np.array([78, 90, 87, 70, 80], dtype=np.int8),
+        "units": np.full(5, 3, dtype=np.int8)
+    }
+    dictionaries = {
+        "student_ids": np.array([10, 20, 30], dtype=np.int64),
+        "student_names": ["Ana", "Ben", None],
+        "student_course": np.array([0, 1, -1], dtype=np.int16),
+        "courses": ["BSCS", "BSIT"],
+        "semester_ids": np.array([1, 2, 3], dtype=np.int64),
+        "semester_names": ["FIRST", "FIRST", "SECOND"],
+        "school_years": ["2024-2025", "2023-2024", "2023-2024"],
+        "subject_codes": ["CS101"],
+        "subject_descriptions": ["Programming"],
+        "subject_units": np.array([3], dtype=np.int8),
+        "subject_known": np.array([True])
+    }
+    return GradeSnapshot(columns, dictionaries, 0, datetime(2024, 1, 1))
+
+def by_key(snapshot, scores, field):
+    student_ids = snapshot.student_ids[scores["student"]].tolist()
+    semester_ids = snapshot.semester_ids[scores["semester"]].tolist()
+    return dict(zip(zip(student_ids, semester_ids), np.asarray(field).tolist()))
+
+def test_groups_follow_the_calendar():
+    snapshot = small_snapshot()
+    scores = score_snapshot(snapshot)
+
+    keys = list(zip(snapshot.student_ids[scores["student"]].tolist(), snapshot.semester_ids[scores["semester"]].tolist()))
+    assert keys == [(10, 2), (10, 3), (10, 1), (20, 2), (30, 2)]
+
+def test_trend_over_several_semesters():
+    snapshot = small_snapshot()
+    scores = score_snapshot(snapshot)
+    trend = by_key(snapshot, scores, scores["values"]["trend"])
+    points = by_key(snapshot, scores, scores["points"]["trend"])
+
+    # Slopes of 90; 90, 87; and 90, 87, 78
+    assert trend[(10, 2)] == pytest.approx(0)
+    assert trend[(10, 3)] == pytest.approx(-3)
+    assert trend[(10, 1)] == pytest.approx(-6)
+    # 3 of the 5 points lost per semester that count fully, and capped beyond it
+    assert points[(10, 3)] == pytest.approx(12)
+    assert points[(10, 1)] == pytest.approx(20)
+
+    score = by_key(snapshot, scores, scores["score"])
+    # 10 above the class average of 80 in semester 2: no class gap risk
+    assert score[(10, 2)] == pytest.approx(0)
+    assert score[(10, 3)] == pytest.approx(12)
+    assert score[(10, 1)] == pytest.approx(20)
+
+def test_single_semester_has_no_trend():
+    snapshot = small_snapshot()
+    scores = score_snapshot(snapshot)
+
+    assert by_key(snapshot, scores, scores["values"]["trend"])[(20, 2)] == 0
+    # One failing grade, half of full risk (20 points), and 10 below the class average (25)
+    assert by_key(snapshot, scores, scores["values"]["failing_grades"])[(20, 2)] == 1
+    assert by_key(snapshot, scores, scores["values"]["class_gap"])[(20, 2)] == pytest.approx(-10)
+    assert by_key(snapshot, scores, scores["score"])[(20, 2)] == pytest.approx(45)
+    # Every load is the 3-unit median
+    assert np.all(scores["points"]["unit_load"] == 0)
+
+def test_student_missing_from_students():
+    snapshot = small_snapshot()
+    scores = score_snapshot(snapshot)
+
+    assert by_key(snapshot, scores, scores["score"])[(30, 2)] == pytest.approx(0)
+    assert by_key(snapshot, scores, scores["values"]["trend"])[(30, 2)] == 0
+
+    documents = {
+        (doc["student_id"], doc["semester_id"]): doc
+        for doc in score_documents(snapshot, scores, datetime(2024, 1, 2))
+    }
+    assert documents[(30, 2)]["course"] is None
+    assert documents[(30, 2)]["name"] is None
+    assert documents[(30, 2)]["top_factors"] == []
+    assert documents[(20, 2)]["course"] == "BSIT"
+    assert documents[(20, 2)]["top_factors"] == ["class_gap", "failing_grades"]
+    assert documents[(10, 1)]["course"] == "BSCS"
+    assert documents[(10, 1)]["factors"] == {"failing_grades": 0.0, "class_gap": 0.0, "trend": 20.0, "unit_load": 0.0}
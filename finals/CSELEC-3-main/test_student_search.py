@@ -0,0 +1,42 @@
+import os
+import sys
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "Distributed Student Performance Analytics System",
+    "Distributed Analytics System"
+)
+sys.path.insert(0, APP_DIR)
+
+from utils.student_search import StudentIndex, normalize
+
+STUDENTS = [
+    (1042, "José Dela Cruz", "BSCS"),
+    (1043, "Josefina  Reyes", "BSIT"),
+    (2001, "Maria Cruz", "BSIT"),
+    (2002, "Cruzita Santos", "BSN"),
+    (10420, "Ana Jose", "BSIT")
+]
+
+def names(results):
+    return [(r["name"], r["matched"]) for r in results]
+
+def test_normalize_folds_case_accents_and_spaces():
+    assert normalize("  JOSÉ   dela Cruz ") == "jose dela cruz"
+
+def test_full_name_matches_rank_before_later_words():
+    index = StudentIndex(STUDENTS)
+    assert names(index.search("jose")) == [
+        ("José Dela Cruz", "name"), ("Josefina  Reyes", "name"), ("Ana Jose", "word")
+    ]
+    assert names(index.search("cruz")) == [
+        ("Cruzita Santos", "name"), ("José Dela Cruz", "word"), ("Maria Cruz", "word")
+    ]
+    assert names(index.search("dela c")) == [("José Dela Cruz", "word")]
+
+def test_id_prefix_and_limit():
+    index = StudentIndex(STUDENTS)
+    assert [r["student_id"] for r in index.search("1042")] == [1042, 10420]
+    assert len(index.search("j", limit=2)) == 2
+    assert index.search("   ") == []
+    assert index.search("xyz") == []